@@ -1,15 +1,21 @@
 """
 App package initialization.
+
+Public names are resolved lazily so that importing a submodule such as
+``app.models`` does not pull in every route and middleware module.
 """
-from .routes import register_routes
-from .middleware import (
-    configure_cors,
-    register_error_handlers,
-    ImageProcessingError,
-    ValidationError
-)
+from importlib import import_module
+
+_LAZY_EXPORTS = {
+    'register_routes': '.routes',
+    'configure_cors': '.middleware',
+    'register_error_handlers': '.middleware',
+    'ImageProcessingError': '.middleware',
+    'ValidationError': '.middleware',
+}
 
 __all__ = [
+    'create_app',
     'register_routes',
     'configure_cors',
     'register_error_handlers',
@@ -17,13 +23,28 @@ __all__ = [
     'ValidationError'
 ]
 
-from flask import Flask
 
-def create_app():
-    app = Flask(__name__)
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def create_app(config_class=None):
+    """
+    Create the Flask application.
 
-    from .routes import main
-    app.register_blueprint(main)
+    Delegates to the factory in ``main`` so there is a single place where
+    the app is assembled.
 
-    return app
+    Args:
+        config_class: Configuration class to use
 
+    Returns:
+        Configured Flask application
+    """
+    from main import create_app as _create_app
+    return _create_app(config_class)
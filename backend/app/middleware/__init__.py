@@ -2,6 +2,7 @@
 Middleware package initialization.
 """
 from .cors_handler import configure_cors
+from .json_provider import OrjsonProvider
 from .error_handler import (
     register_error_handlers,
     register_custom_error_handlers,
@@ -11,6 +12,7 @@ from .error_handler import (
 
 __all__ = [
     'configure_cors',
+    'OrjsonProvider',
     'register_error_handlers',
     'register_custom_error_handlers',
     'ImageProcessingError',
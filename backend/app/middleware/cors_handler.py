@@ -1,27 +1,57 @@
 """
 CORS (Cross-Origin Resource Sharing) handler.
 """
+import re
+from typing import Iterable, Pattern, Tuple, Union
+
 from flask import Flask
 from flask_cors import CORS
 
+_DEFAULT_ORIGINS = ('http://localhost:3000',)
+
+
+def _compile_origins(origins: Iterable[str]) -> Union[Pattern, Tuple[str, ...]]:
+    """
+    Compile a static list of origins into a single anchored regex.
+
+    flask_cors matches a compiled pattern with one ``re.match`` call instead
+    of looping over the origins per request. Lists containing wildcards or
+    regex syntax are returned unchanged so flask_cors keeps its own handling.
+
+    Args:
+        origins: Allowed origin strings
+
+    Returns:
+        Compiled pattern, or the origins as a tuple
+    """
+    origins = tuple(origins)
+    if not origins or any('*' in origin for origin in origins):
+        return origins
+    alternatives = '|'.join(re.escape(origin) for origin in origins)
+    return re.compile(f'(?:{alternatives})\\Z', re.IGNORECASE)
+
 
 def configure_cors(app: Flask) -> None:
     """
     Configure CORS for the Flask application.
-    
+
+    Setting ``CORS_ORIGINS`` to None skips CORS setup entirely.
+
     Args:
         app: Flask application instance
     """
     # Get allowed origins from config
-    allowed_origins = app.config.get('CORS_ORIGINS', ['http://localhost:3000'])
-    
+    allowed_origins = app.config.get('CORS_ORIGINS', _DEFAULT_ORIGINS)
+    if allowed_origins is None:
+        return
+
     # Configure CORS
     CORS(
         app,
-        origins=allowed_origins,
+        origins=_compile_origins(allowed_origins),
         methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
         allow_headers=['Content-Type', 'Authorization', 'X-Requested-With'],
-        expose_headers=['Content-Type', 'X-Total-Count'],
-        supports_credentials=True,
-        max_age=600  # Cache preflight requests for 10 minutes
+        expose_headers=['Content-Type', 'X-Total-Count', 'X-Cache', 'X-Filter-Type'],
+        supports_credentials=app.config.get('CORS_SUPPORTS_CREDENTIALS', False),
+        max_age=86400  # Cache preflight requests for 24 hours
     )
@@ -1,126 +1,46 @@
 """
 Error handling middleware.
 """
-from flask import Flask, jsonify
+from flask import Flask, Response, current_app, request
 from werkzeug.exceptions import HTTPException
-import traceback
+import orjson
 
+_APPLICATION_JSON = 'application/json'
 
-def register_error_handlers(app: Flask) -> None:
-    """
-    Register error handlers for the Flask application.
-    
-    Args:
-        app: Flask application instance
-    """
-    
-    @app.errorhandler(400)
-    def bad_request(error):
-        """Handle 400 Bad Request errors."""
-        return jsonify({
-            'error': 'Bad Request',
-            'message': str(error.description) if hasattr(error, 'description') else 'Invalid request',
-            'status_code': 400
-        }), 400
-    
-    @app.errorhandler(404)
-    def not_found(error):
-        """Handle 404 Not Found errors."""
-        return jsonify({
-            'error': 'Not Found',
-            'message': 'The requested resource was not found',
-            'status_code': 404
-        }), 404
-    
-    @app.errorhandler(405)
-    def method_not_allowed(error):
-        """Handle 405 Method Not Allowed errors."""
-        return jsonify({
-            'error': 'Method Not Allowed',
-            'message': 'The method is not allowed for the requested URL',
-            'status_code': 405
-        }), 405
-    
-    @app.errorhandler(413)
-    def request_entity_too_large(error):
-        """Handle 413 Request Entity Too Large errors."""
-        return jsonify({
-            'error': 'File Too Large',
-            'message': 'The uploaded file exceeds the maximum allowed size',
-            'status_code': 413
-        }), 413
-    
-    @app.errorhandler(415)
-    def unsupported_media_type(error):
-        """Handle 415 Unsupported Media Type errors."""
-        return jsonify({
-            'error': 'Unsupported Media Type',
-            'message': 'The file type is not supported',
-            'status_code': 415
-        }), 415
-    
-    @app.errorhandler(422)
-    def unprocessable_entity(error):
-        """Handle 422 Unprocessable Entity errors."""
-        return jsonify({
-            'error': 'Unprocessable Entity',
-            'message': str(error.description) if hasattr(error, 'description') else 'Unable to process the request',
-            'status_code': 422
-        }), 422
-    
-    @app.errorhandler(429)
-    def too_many_requests(error):
-        """Handle 429 Too Many Requests errors."""
-        return jsonify({
-            'error': 'Too Many Requests',
-            'message': 'Rate limit exceeded. Please try again later.',
-            'status_code': 429
-        }), 429
-    
-    @app.errorhandler(500)
-    def internal_server_error(error):
-        """Handle 500 Internal Server Error."""
-        # Log the error
-        app.logger.error(f'Internal Server Error: {error}')
-        if app.debug:
-            app.logger.error(traceback.format_exc())
-        
-        return jsonify({
-            'error': 'Internal Server Error',
-            'message': 'An unexpected error occurred. Please try again later.',
-            'status_code': 500
-        }), 500
-    
-    @app.errorhandler(HTTPException)
-    def handle_http_exception(error):
-        """Handle all other HTTP exceptions."""
-        return jsonify({
-            'error': error.name,
-            'message': error.description,
-            'status_code': error.code
-        }), error.code
-    
-    @app.errorhandler(Exception)
-    def handle_generic_exception(error):
-        """Handle all unhandled exceptions."""
-        # Log the error
-        app.logger.error(f'Unhandled Exception: {error}')
-        app.logger.error(traceback.format_exc())
-        
-        if app.debug:
-            # In debug mode, return more details
-            return jsonify({
-                'error': 'Internal Server Error',
-                'message': str(error),
-                'traceback': traceback.format_exc(),
-                'status_code': 500
-            }), 500
-        else:
-            return jsonify({
-                'error': 'Internal Server Error',
-                'message': 'An unexpected error occurred',
-                'status_code': 500
-            }), 500
+
+def _json_response(body_bytes: bytes, status: int) -> Response:
+    """Wrap pre-encoded JSON bytes in a response with the given status."""
+    return Response(body_bytes, status=status, mimetype=_APPLICATION_JSON)
+
+
+def _encode_error(error: str, message: str, status_code: int) -> bytes:
+    """Encode an error payload to JSON bytes."""
+    return orjson.dumps({
+        'error': error,
+        'message': message,
+        'status_code': status_code
+    })
+
+
+# Bodies for errors whose payload never changes, encoded once at import.
+# A fresh Response is still built per request because after_request hooks
+# (CORS, cache headers) mutate response headers.
+_STATIC_ERROR_BODIES = {
+    404: _encode_error('Not Found', 'The requested resource was not found', 404),
+    405: _encode_error('Method Not Allowed', 'The method is not allowed for the requested URL', 405),
+    413: _encode_error('File Too Large', 'The uploaded file exceeds the maximum allowed size', 413),
+    415: _encode_error('Unsupported Media Type', 'The file type is not supported', 415),
+    429: _encode_error('Too Many Requests', 'Rate limit exceeded. Please try again later.', 429),
+}
+
+_HTTP_500_BODY = _encode_error('Internal Server Error', 'An unexpected error occurred. Please try again later.', 500)
+_UNHANDLED_500_BODY = _encode_error('Internal Server Error', 'An unexpected error occurred', 500)
+
+# Templates for errors whose message varies; the message is JSON-encoded
+# with orjson (which handles escaping) and %-formatted into the slot.
+_BAD_REQUEST_TMPL = b'{"error":"Bad Request","message":%b,"status_code":400}'
+_UNPROCESSABLE_TMPL = b'{"error":"Unprocessable Entity","message":%b,"status_code":422}'
+_IMAGE_PROCESSING_TMPL = b'{"error":"Image Processing Error","message":%b,"status_code":%d}'
 
 
 class ImageProcessingError(Exception):
@@ -142,32 +62,117 @@ class ValidationError(Exception):
         self.status_code = 422
 
 
-def register_custom_error_handlers(app: Flask) -> None:
+def _image_processing_error_response(error: ImageProcessingError):
+    """Build the response for an image processing error."""
+    body = _IMAGE_PROCESSING_TMPL % (orjson.dumps(error.message), error.status_code)
+    return _json_response(body, error.status_code)
+
+
+_VALIDATION_TMPL = b'{"error":"Validation Error","message":%b,"status_code":%d}'
+_VALIDATION_FIELD_TMPL = b'{"error":"Validation Error","message":%b,"status_code":%d,"field":%b}'
+
+
+def _validation_error_response(error: ValidationError):
+    """Build the response for a validation error."""
+    message = orjson.dumps(error.message)
+    if not error.field:
+        body = _VALIDATION_TMPL % (message, error.status_code)
+    else:
+        body = _VALIDATION_FIELD_TMPL % (message, error.status_code, orjson.dumps(error.field))
+    
+    return _json_response(body, error.status_code)
+
+
+def _handle_http_exception(error: HTTPException) -> Response:
+    """Handle HTTP exceptions."""
+    code = error.code
+    body = _STATIC_ERROR_BODIES.get(code)
+    if body is not None:
+        if request.method == 'HEAD':
+            # Clients discard HEAD bodies; advertise the length only
+            response = _json_response(b'', code)
+            response.content_length = len(body)
+            return response
+        return _json_response(body, code)
+    
+    if code == 400:
+        msg = orjson.dumps(str(getattr(error, 'description', 'Invalid request')))
+        return _json_response(_BAD_REQUEST_TMPL % msg, 400)
+    
+    if code == 422:
+        msg = orjson.dumps(str(getattr(error, 'description', 'Unable to process the request')))
+        return _json_response(_UNPROCESSABLE_TMPL % msg, 422)
+    
+    if code == 500:
+        # Log the error
+        current_app.logger.error('Internal Server Error: %s', error)
+        if current_app.debug:
+            import traceback
+            current_app.logger.error(traceback.format_exc())
+        
+        return _json_response(_HTTP_500_BODY, 500)
+    
+    return _json_response(_encode_error(error.name, error.description, code), code)
+
+
+def _handle_exception(error: Exception) -> Response:
+    """Handle all non-HTTP exceptions."""
+    # Custom exceptions first, most frequent first
+    if isinstance(error, ValidationError):
+        return _validation_error_response(error)
+    if isinstance(error, ImageProcessingError):
+        return _image_processing_error_response(error)
+    
+    # Log the error; the logger formats the traceback only if emitted
+    current_app.logger.exception('Unhandled Exception: %s', error)
+    
+    if current_app.debug:
+        # In debug mode, return more details
+        import traceback
+        tb = traceback.format_exc()
+        return _json_response(orjson.dumps({
+            'error': 'Internal Server Error',
+            'message': str(error),
+            'traceback': tb,
+            'status_code': 500
+        }), 500)
+    else:
+        return _json_response(_UNHANDLED_500_BODY, 500)
+
+
+# Handlers are module-level functions shared by every app, so registering
+# them does not build per-app closures.
+_ERROR_HANDLERS = (
+    (HTTPException, _handle_http_exception),
+    (Exception, _handle_exception),
+)
+
+
+def register_error_handlers(app: Flask) -> None:
     """
-    Register custom error handlers.
+    Register error handlers for the Flask application.
+    
+    HTTP errors go through one handler that serves pre-encoded bodies by
+    status code; everything else goes through one exception handler that
+    checks the custom exception types before the generic fallback.
     
     Args:
         app: Flask application instance
     """
+    for exc_class, handler in _ERROR_HANDLERS:
+        app.register_error_handler(exc_class, handler)
+
+
+def register_custom_error_handlers(app: Flask) -> None:
+    """
+    Register custom error handlers.
     
-    @app.errorhandler(ImageProcessingError)
-    def handle_image_processing_error(error):
-        """Handle image processing errors."""
-        return jsonify({
-            'error': 'Image Processing Error',
-            'message': error.message,
-            'status_code': error.status_code
-        }), error.status_code
+    ``register_error_handlers`` already dispatches these exception types;
+    registering them explicitly lets Flask match them without going
+    through the generic ``Exception`` handler.
     
-    @app.errorhandler(ValidationError)
-    def handle_validation_error(error):
-        """Handle validation errors."""
-        response = {
-            'error': 'Validation Error',
-            'message': error.message,
-            'status_code': error.status_code
-        }
-        if error.field:
-            response['field'] = error.field
-        
-        return jsonify(response), error.status_code
+    Args:
+        app: Flask application instance
+    """
+    app.register_error_handler(ImageProcessingError, _image_processing_error_response)
+    app.register_error_handler(ValidationError, _validation_error_response)
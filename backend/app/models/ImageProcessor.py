@@ -4,12 +4,47 @@ Provides comprehensive image processing functionality with performance optimizat
 """
 import cv2
 import numpy as np
-from scipy import ndimage
-from scipy.signal import wiener
 from typing import Tuple, Optional, List, Dict, Any
 from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import threading
 
+from app.models import filters
+from app.models.filters import _separable_gaussian
+
+# Use every core for FFTs; scipy.fft keeps float32 input in complex64
+_FFT_WORKERS = -1
+
+
+@lru_cache(maxsize=None)
+def _sp_fft():
+    """Import scipy.fft on first use so workers that never run an FFT skip SciPy."""
+    from scipy import fft
+    return fft
+
+
+@lru_cache(maxsize=64)
+def _custom_kernel_plan(kernel_bytes: bytes, shape: Tuple[int, ...]) -> Tuple[np.ndarray, ...]:
+    """
+    Decide once per kernel how to convolve with it.
+
+    Returns ``(row_kernel, column_kernel)`` for rank-1 kernels, which factor
+    into two 1D passes (2K instead of K^2 multiplies per pixel), and
+    ``(kernel,)`` otherwise. Cached by value so repeated previews with the
+    same kernel skip the conversion and SVD.
+    """
+    kernel = np.frombuffer(kernel_bytes, dtype=np.float32).reshape(shape)
+    if kernel.ndim == 2 and min(kernel.shape) > 1:
+        u, sv, vt = np.linalg.svd(kernel)
+        if sv[1] <= sv[0] * 1e-6:
+            scale = np.sqrt(sv[0])
+            return (vt[0] * scale).astype(np.float32), (u[:, 0] * scale).astype(np.float32)
+    return (kernel,)
+
+
+# Per-channel work runs here; NumPy/SciPy release the GIL in native code
+_CHANNEL_POOL = ThreadPoolExecutor(max_workers=3, thread_name_prefix='channel')
+
 
 class ImageProcessor:
     """
@@ -26,32 +61,51 @@ class ImageProcessor:
     _kernel_cache = {}
     _kernel_cache_lock = threading.Lock()
     
+    # Class-level cache for frequency-domain distance grids, keyed by shape
+    _distance_cache = {}
+    _distance_cache_lock = threading.Lock()
+    _MAX_DISTANCE_CACHE = 8
+    
     def __init__(self, image: np.ndarray, optimize_memory: bool = True):
         """
         Initialize the processor with an image.
         
         Args:
             image: Input image as numpy array (BGR or grayscale)
-            optimize_memory: If True, uses views instead of copies where safe
+            optimize_memory: If True, shares the caller's buffer through a
+                read-only view instead of copying it
         """
-        # Use view for read-only operations, copy only when needed
+        # Every operation returns a new array, so the input can be shared;
+        # the read-only view catches accidental in-place writes without
+        # changing the flags of the caller's array
         if optimize_memory:
-            self.image = image
+            self.image = image.view()
+            self.image.flags.writeable = False
         else:
             self.image = image.copy()
         self.is_color = len(image.shape) == 3 and image.shape[2] == 3
         self._grayscale_cache = None
+        self._rng = np.random.default_rng()
         
     def to_grayscale(self) -> np.ndarray:
-        """Convert image to grayscale with caching."""
+        """
+        Convert image to grayscale with caching.
+        
+        The result is read-only and shared by every caller on this instance;
+        copy it before modifying in place.
+        """
         if self._grayscale_cache is not None:
             return self._grayscale_cache
             
         if self.is_color:
-            self._grayscale_cache = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+            gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+            gray.flags.writeable = False
         else:
-            self._grayscale_cache = self.image.copy()
-        return self._grayscale_cache
+            # Already gray; self.image is a read-only view or a private copy
+            gray = self.image.view()
+            gray.flags.writeable = False
+        self._grayscale_cache = gray
+        return gray
     
     @classmethod
     def _get_cached_kernel(cls, kernel_type: str, size: int, **params) -> np.ndarray:
@@ -94,54 +148,34 @@ class ImageProcessor:
         Returns:
             Dictionary with histogram data for each channel
         """
-        histograms = {}
-        
-        if self.is_color:
-            # Process all channels in one pass where possible
-            for i, color in enumerate(['blue', 'green', 'red']):
-                hist = cv2.calcHist([self.image], [i], None, [256], [0, 256])
-                histograms[color] = hist.ravel().tolist()  # ravel is faster than flatten
-        else:
-            hist = cv2.calcHist([self.image], [0], None, [256], [0, 256])
-            histograms['gray'] = hist.ravel().tolist()
-        
-        return histograms
+        return filters.calculate_histogram(self.image)
     
-    def histogram_equalization(self) -> np.ndarray:
+    def histogram_equalization(self, return_hist: bool = False):
         """
         Perform global histogram equalization.
         
+        Args:
+            return_hist: Also return the histogram of the equalized image
+        
         Returns:
-            Equalized image
+            Equalized image, or (image, histogram) when return_hist is set
         """
-        if self.is_color:
-            # Convert to YCrCb, equalize Y channel
-            ycrcb = cv2.cvtColor(self.image, cv2.COLOR_BGR2YCrCb)
-            ycrcb[:, :, 0] = cv2.equalizeHist(ycrcb[:, :, 0])
-            return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2BGR)
-        else:
-            return cv2.equalizeHist(self.image)
+        return filters.histogram_equalization(self.image, return_hist)
     
     def clahe_equalization(self, clip_limit: float = 2.0, 
-                          tile_size: Tuple[int, int] = (8, 8)) -> np.ndarray:
+                          tile_size: Tuple[int, int] = (8, 8), return_hist: bool = False):
         """
         Perform CLAHE (Contrast Limited Adaptive Histogram Equalization).
         
         Args:
             clip_limit: Threshold for contrast limiting
             tile_size: Size of grid for histogram equalization
+            return_hist: Also return the histogram of the equalized image
         
         Returns:
-            CLAHE equalized image
+            CLAHE equalized image, or (image, histogram) when return_hist is set
         """
-        clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_size)
-        
-        if self.is_color:
-            lab = cv2.cvtColor(self.image, cv2.COLOR_BGR2LAB)
-            lab[:, :, 0] = clahe.apply(lab[:, :, 0])
-            return cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
-        else:
-            return clahe.apply(self.image)
+        return filters.clahe_equalization(self.image, clip_limit, tile_size, return_hist)
     
     def adaptive_histogram_equalization(self) -> np.ndarray:
         """Alias for CLAHE with default parameters."""
@@ -160,21 +194,27 @@ class ImageProcessor:
             Contrast stretched image
         """
         if self.is_color:
-            result = np.zeros_like(self.image)
-            for i in range(3):
-                channel = self.image[:, :, i]
-                p_low = np.percentile(channel, low_percentile)
-                p_high = np.percentile(channel, high_percentile)
-                result[:, :, i] = np.clip(
-                    (channel - p_low) * 255.0 / (p_high - p_low), 0, 255
-                ).astype(np.uint8)
-            return result
+            planes = cv2.split(self.image)
         else:
-            p_low = np.percentile(self.image, low_percentile)
-            p_high = np.percentile(self.image, high_percentile)
-            return np.clip(
-                (self.image - p_low) * 255.0 / (p_high - p_low), 0, 255
-            ).astype(np.uint8)
+            planes = [self.image]
+        channels = len(planes)
+        
+        # Both percentiles per channel from one histogram pass each
+        p_low, p_high = np.stack([
+            self._histogram_percentiles(plane, [low_percentile, high_percentile])
+            for plane in planes
+        ], axis=1)
+        span = p_high - p_low
+        
+        # Flat channels (span == 0) are passed through unchanged
+        scale = np.divide(255.0, span, out=np.ones_like(span), where=span > 0)
+        bias = np.where(span > 0, -p_low * scale, 0.0)
+        
+        # The map is monotonic on uint8 input, so evaluate it once per
+        # intensity level and apply it as a (1, 256, channels) lookup table
+        levels = np.arange(256, dtype=np.float32)[:, None]
+        lut = np.clip(levels * scale + bias, 0, 255).astype(np.uint8)
+        return cv2.LUT(self.image, lut.reshape(1, 256, channels))
     
     def get_statistics(self) -> Dict[str, Any]:
         """
@@ -189,46 +229,56 @@ class ImageProcessor:
             'is_color': self.is_color
         }
         
+        # Mean and std for all channels in one pass
+        means, stds = cv2.meanStdDev(self.image)
+        
         if self.is_color:
-            for i, channel in enumerate(['blue', 'green', 'red']):
-                ch = self.image[:, :, i]
-                stats[channel] = {
-                    'mean': float(np.mean(ch)),
-                    'std': float(np.std(ch)),
-                    'min': int(np.min(ch)),
-                    'max': int(np.max(ch)),
-                    'median': float(np.median(ch))
-                }
+            channels = zip(['blue', 'green', 'red'], cv2.split(self.image))
         else:
-            stats['intensity'] = {
-                'mean': float(np.mean(self.image)),
-                'std': float(np.std(self.image)),
-                'min': int(np.min(self.image)),
-                'max': int(np.max(self.image)),
-                'median': float(np.median(self.image))
+            channels = [('intensity', self.image)]
+        
+        for i, (name, ch) in enumerate(channels):
+            min_val, max_val, _, _ = cv2.minMaxLoc(ch)
+            stats[name] = {
+                'mean': float(means[i, 0]),
+                'std': float(stds[i, 0]),
+                'min': int(min_val),
+                'max': int(max_val),
+                'median': float(self._histogram_percentiles(ch, [50])[0])
             }
         
         return stats
     
+    @staticmethod
+    def _histogram_percentiles(channel: np.ndarray, percentiles) -> np.ndarray:
+        """
+        Percentiles of a uint8 channel from its 256-bin histogram.
+        
+        Matches np.percentile's default linear interpolation exactly, with
+        one histogram pass instead of a partial sort.
+        """
+        cdf = np.cumsum(cv2.calcHist([channel], [0], None, [256], [0, 256]).ravel())
+        n = int(cdf[-1])
+        position = np.asarray(percentiles, dtype=np.float64) / 100.0 * (n - 1)
+        k = np.floor(position)
+        # The k-th smallest value (0-based) is the first bin whose count exceeds k
+        lower = np.searchsorted(cdf, k + 1)
+        upper = np.searchsorted(cdf, np.minimum(k + 2, n))
+        return lower + (position - k) * (upper - lower)
+    
     # ==================== Spatial Filters ====================
     
     def gaussian_blur(self, kernel_size: int = 5, sigma: float = 1.0) -> np.ndarray:
         """Apply Gaussian blur."""
-        if kernel_size % 2 == 0:
-            kernel_size += 1
-        return cv2.GaussianBlur(self.image, (kernel_size, kernel_size), sigma)
+        return filters.gaussian_blur(self.image, kernel_size, sigma)
     
     def box_blur(self, kernel_size: int = 5) -> np.ndarray:
         """Apply box (average) blur."""
-        if kernel_size % 2 == 0:
-            kernel_size += 1
-        return cv2.blur(self.image, (kernel_size, kernel_size))
+        return filters.box_blur(self.image, kernel_size)
     
     def median_filter(self, kernel_size: int = 5) -> np.ndarray:
         """Apply median filter."""
-        if kernel_size % 2 == 0:
-            kernel_size += 1
-        return cv2.medianBlur(self.image, kernel_size)
+        return filters.median_filter(self.image, kernel_size)
     
     def bilateral_filter(self, d: int = 9, sigma_color: float = 75, 
                         sigma_space: float = 75) -> np.ndarray:
@@ -237,12 +287,10 @@ class ImageProcessor:
     
     def sharpen(self, strength: float = 1.0) -> np.ndarray:
         """Apply sharpening filter."""
-        kernel = np.array([
-            [0, -1, 0],
-            [-1, 5 + strength, -1],
-            [0, -1, 0]
-        ])
-        return cv2.filter2D(self.image, -1, kernel)
+        # [[0,-1,0],[-1,5+s,-1],[0,-1,0]] == (1 + s) * identity - 4-neighbour
+        # Laplacian; the signed Laplacian keeps negative responses
+        laplacian = cv2.Laplacian(self.image, cv2.CV_16S, ksize=1)
+        return cv2.addWeighted(self.image, 1 + strength, laplacian, -1, 0, dtype=cv2.CV_8U)
     
     def unsharp_mask(self, sigma: float = 1.0, strength: float = 1.5, 
                     threshold: int = 0) -> np.ndarray:
@@ -251,30 +299,26 @@ class ImageProcessor:
         sharpened = cv2.addWeighted(self.image, 1 + strength, blurred, -strength, 0)
         
         if threshold > 0:
-            low_contrast_mask = np.abs(self.image.astype(float) - blurred) < threshold
+            # Both operands are uint8, so the difference stays uint8
+            low_contrast_mask = cv2.absdiff(self.image, blurred) < threshold
             np.copyto(sharpened, self.image, where=low_contrast_mask)
         
         return sharpened
     
     def sobel_edge_detection(self, ksize: int = 3) -> np.ndarray:
         """Apply Sobel edge detection."""
-        gray = self.to_grayscale()
-        sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=ksize)
-        sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=ksize)
-        magnitude = np.sqrt(sobelx**2 + sobely**2)
-        return np.uint8(np.clip(magnitude, 0, 255))
+        return filters.sobel_edge_detection(self.to_grayscale(), ksize)
     
     def laplacian_edge_detection(self, ksize: int = 3) -> np.ndarray:
         """Apply Laplacian edge detection."""
         gray = self.to_grayscale()
-        laplacian = cv2.Laplacian(gray, cv2.CV_64F, ksize=ksize)
-        return np.uint8(np.clip(np.abs(laplacian), 0, 255))
+        laplacian = cv2.Laplacian(gray, cv2.CV_32F, ksize=ksize)
+        return cv2.convertScaleAbs(laplacian)
     
     def canny_edge_detection(self, threshold1: float = 100, 
                             threshold2: float = 200) -> np.ndarray:
         """Apply Canny edge detection."""
-        gray = self.to_grayscale()
-        return cv2.Canny(gray, threshold1, threshold2)
+        return filters.canny_edge_detection(self.to_grayscale(), threshold1, threshold2)
     
     def emboss(self) -> np.ndarray:
         """Apply emboss effect."""
@@ -287,41 +331,88 @@ class ImageProcessor:
     
     def high_pass_filter(self, kernel_size: int = 3) -> np.ndarray:
         """Apply high pass filter."""
-        blurred = cv2.GaussianBlur(self.image, (kernel_size, kernel_size), 0)
+        blurred = _separable_gaussian(self.image, kernel_size, 0)
         high_pass = cv2.subtract(self.image, blurred)
         return cv2.add(self.image, high_pass)
     
     def low_pass_filter(self, kernel_size: int = 5) -> np.ndarray:
         """Apply low pass filter (smoothing)."""
-        return cv2.GaussianBlur(self.image, (kernel_size, kernel_size), 0)
+        return _separable_gaussian(self.image, kernel_size, 0)
     
     def apply_custom_kernel(self, kernel: np.ndarray) -> np.ndarray:
         """Apply a custom convolution kernel."""
-        return cv2.filter2D(self.image, -1, kernel)
+        kernel = np.asarray(kernel, dtype=np.float32)
+        plan = _custom_kernel_plan(kernel.tobytes(), kernel.shape)
+        if len(plan) == 2:
+            return cv2.sepFilter2D(self.image, -1, plan[0], plan[1])
+        return cv2.filter2D(self.image, -1, plan[0])
     
     # ==================== Fourier Transform Operations ====================
     
-    def compute_fft(self, shift: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    def grayscale_spectrum(self, log: bool = False) -> np.ndarray:
+        """
+        Compute the half spectrum (rfft2, unshifted) of the grayscale image.
+        
+        The result can be cached by the caller and passed back through the
+        ``spectrum`` argument of the Fourier methods to skip the forward
+        transform.
+        
+        Args:
+            log: Transform log(1 + image), as used by the homomorphic filter
+        
+        Returns:
+            Complex64 array of shape (rows, cols // 2 + 1)
+        """
+        gray = self.to_grayscale().astype(np.float32)
+        if log:
+            # log(1 + x) in place; the +1 avoids log(0)
+            gray += 1
+            cv2.log(gray, dst=gray)
+        # The input is real, so only half the spectrum is independent
+        return _sp_fft().rfft2(gray, workers=_FFT_WORKERS, overwrite_x=True)
+    
+    def compute_fft(self, shift: bool = True,
+                    spectrum: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
         """
         Compute 2D FFT of the image.
         
         Args:
             shift: Whether to shift zero frequency to center
+            spectrum: Precomputed ``grayscale_spectrum()``; never modified
         
         Returns:
             Tuple of (magnitude_spectrum, phase_spectrum)
         """
-        gray = self.to_grayscale()
-        f = np.fft.fft2(gray.astype(np.float32))
+        cols = self.image.shape[1]
+        f_half = self.grayscale_spectrum() if spectrum is None else spectrum
+        magnitude = self._mirror_half_spectrum(np.abs(f_half), cols)
+        phase = self._mirror_half_spectrum(np.angle(f_half), cols, conjugate=True)
         
         if shift:
-            f = np.fft.fftshift(f)
-        
-        magnitude = np.abs(f)
-        phase = np.angle(f)
+            magnitude = np.fft.fftshift(magnitude)
+            phase = np.fft.fftshift(phase)
         
         return magnitude, phase
     
+    @staticmethod
+    def _mirror_half_spectrum(half: np.ndarray, cols: int,
+                              conjugate: bool = False) -> np.ndarray:
+        """
+        Expand an rfft2-layout array to the full (rows, cols) spectrum.
+        
+        Uses Hermitian symmetry F[u, v] = conj(F[-u, -v]) of real input, so
+        magnitudes are mirrored and phases are mirrored and negated.
+        """
+        rows, n_half = half.shape
+        full = np.empty((rows, cols), dtype=half.dtype)
+        full[:, :n_half] = half
+        # Columns n_half..cols-1 come from columns cols-n_half..1 at row -u
+        mirrored = half[(-np.arange(rows)) % rows, cols - n_half:0:-1]
+        if conjugate:
+            np.negative(mirrored, out=mirrored)
+        full[:, n_half:] = mirrored
+        return full
+    
     def compute_inverse_fft(self, magnitude: np.ndarray, phase: np.ndarray, 
                            shift: bool = True) -> np.ndarray:
         """
@@ -335,28 +426,34 @@ class ImageProcessor:
         Returns:
             Reconstructed image
         """
-        f = magnitude * np.exp(1j * phase)
-        
         if shift:
-            f = np.fft.ifftshift(f)
-        
-        reconstructed = np.fft.ifft2(f).real
+            magnitude = np.fft.ifftshift(magnitude)
+            phase = np.fft.ifftshift(phase)
+        
+        # The spectrum of a real image is Hermitian, so the left half plus
+        # irfft2 reproduces the real part of the full ifft2
+        rows, cols = magnitude.shape
+        half = cols // 2 + 1
+        f = magnitude[:, :half] * np.exp(1j * phase[:, :half])
+        reconstructed = _sp_fft().irfft2(f, s=(rows, cols), workers=_FFT_WORKERS, overwrite_x=True)
         return np.uint8(np.clip(reconstructed, 0, 255))
     
     def visualize_fft_magnitude(self, magnitude: np.ndarray) -> np.ndarray:
         """Create visualization of magnitude spectrum with log scaling."""
-        magnitude_log = np.log1p(magnitude)
-        normalized = (magnitude_log / magnitude_log.max() * 255).astype(np.uint8)
-        return normalized
+        magnitude_log = np.add(magnitude, 1, dtype=np.float32)
+        cv2.log(magnitude_log, dst=magnitude_log)
+        # Scale so the maximum maps to 255 and convert to uint8 in one pass
+        return cv2.normalize(magnitude_log, None, 255, 0, cv2.NORM_INF, dtype=cv2.CV_8U)
     
     def visualize_fft_phase(self, phase: np.ndarray) -> np.ndarray:
         """Create visualization of phase spectrum."""
-        normalized = ((phase + np.pi) / (2 * np.pi) * 255).astype(np.uint8)
-        return normalized
+        # Map [-pi, pi] linearly onto [0, 255] with a fused scale and cast
+        return cv2.convertScaleAbs(phase, alpha=255 / (2 * np.pi), beta=127.5)
     
     def apply_frequency_filter(self, filter_type: str = 'lowpass',
                               cutoff: float = 0.3, cutoff_high: float = 0.7,
-                              order: int = 2, method: str = 'gaussian') -> Tuple[np.ndarray, np.ndarray]:
+                              order: int = 2, method: str = 'gaussian',
+                              spectrum: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
         """
         Apply frequency domain filtering.
         
@@ -366,23 +463,15 @@ class ImageProcessor:
             cutoff_high: High cutoff for bandpass/bandstop
             order: Order for Butterworth filter
             method: 'ideal', 'gaussian', 'butterworth'
+            spectrum: Precomputed ``grayscale_spectrum()``; never modified
         
         Returns:
             Tuple of (filtered_image, filter_mask)
         """
-        gray = self.to_grayscale()
-        rows, cols = gray.shape
-        crow, ccol = rows // 2, cols // 2
-        
-        # Create distance matrix from center
-        u = np.arange(rows)
-        v = np.arange(cols)
-        u, v = np.meshgrid(u - crow, v - ccol, indexing='ij')
-        d = np.sqrt(u**2 + v**2)
+        rows, cols = self.image.shape[:2]
         
-        # Normalize distance
-        d_max = np.sqrt(crow**2 + ccol**2)
-        d_normalized = d / d_max
+        # Normalized distance from center, shared across calls of this shape
+        d_normalized = self._get_distance_grid(rows, cols, normalized=True)
         
         # Create filter mask based on method and type
         if method == 'ideal':
@@ -392,40 +481,95 @@ class ImageProcessor:
         else:  # butterworth
             mask = self._butterworth_filter(d_normalized, filter_type, cutoff, cutoff_high, order)
         
-        # Apply filter in frequency domain
-        f = np.fft.fft2(gray.astype(np.float32))
-        f_shifted = np.fft.fftshift(f)
-        f_filtered = f_shifted * mask
-        f_unshifted = np.fft.ifftshift(f_filtered)
-        filtered = np.fft.ifft2(f_unshifted).real
+        # Apply filter in frequency domain on the real-input half spectrum.
+        # The mask is symmetric about the center, so un-shifting it and
+        # keeping the first cols // 2 + 1 columns matches the rfft2 layout.
+        mask_half = np.fft.ifftshift(mask)[:, :cols // 2 + 1]
+        if spectrum is None:
+            f = self.grayscale_spectrum()
+            f *= mask_half
+        else:
+            f = spectrum * mask_half
+        filtered = _sp_fft().irfft2(f, s=(rows, cols), workers=_FFT_WORKERS, overwrite_x=True)
         
         return np.uint8(np.clip(filtered, 0, 255)), mask
     
+    @classmethod
+    def _get_distance_grid(cls, rows: int, cols: int, normalized: bool = False,
+                           half: bool = False) -> np.ndarray:
+        """
+        Get or create a cached, read-only distance grid.
+        
+        Args:
+            rows: Spectrum height
+            cols: Spectrum width
+            normalized: Divide by the center-to-corner distance
+            half: Unshifted rfft2 layout instead of the centered full spectrum
+        """
+        cache_key = (rows, cols, normalized, half)
+        with cls._distance_cache_lock:
+            grid = cls._distance_cache.get(cache_key)
+            if grid is None:
+                if len(cls._distance_cache) >= cls._MAX_DISTANCE_CACHE:
+                    oldest = next(iter(cls._distance_cache))
+                    del cls._distance_cache[oldest]
+                grid = cls._create_distance_grid(rows, cols, normalized, half)
+                grid.flags.writeable = False
+                cls._distance_cache[cache_key] = grid
+            return grid
+    
+    @staticmethod
+    def _create_distance_grid(rows: int, cols: int, normalized: bool,
+                              half: bool) -> np.ndarray:
+        """Distance of every frequency from the spectrum center as float32."""
+        if half:
+            u = np.fft.ifftshift(np.arange(rows, dtype=np.float32) - rows // 2)
+            v = np.arange(cols // 2 + 1, dtype=np.float32)
+        else:
+            u = np.arange(rows, dtype=np.float32) - rows // 2
+            v = np.arange(cols, dtype=np.float32) - cols // 2
+        # Broadcasting the open grid allocates only the output array
+        d = np.hypot(u[:, None], v[None, :])
+        if normalized:
+            d /= np.sqrt((rows // 2)**2 + (cols // 2)**2)
+        return d
+    
+    @staticmethod
+    def _gaussian_lowpass(d2: np.ndarray, cutoff: float) -> np.ndarray:
+        """exp(-d^2 / (2 * cutoff^2)) from precomputed d^2, in a single buffer."""
+        g = np.multiply(d2, -1.0 / (2 * cutoff**2))
+        return cv2.exp(g, dst=g)
+    
     def _ideal_filter(self, d: np.ndarray, filter_type: str, 
                      cutoff: float, cutoff_high: float) -> np.ndarray:
         """Create ideal frequency filter."""
         if filter_type == 'lowpass':
-            return (d <= cutoff).astype(float)
+            mask = d <= cutoff
         elif filter_type == 'highpass':
-            return (d > cutoff).astype(float)
+            mask = d > cutoff
         elif filter_type == 'bandpass':
-            return ((d >= cutoff) & (d <= cutoff_high)).astype(float)
+            mask = (d >= cutoff) & (d <= cutoff_high)
         else:  # bandstop
-            return ((d < cutoff) | (d > cutoff_high)).astype(float)
+            mask = (d < cutoff) | (d > cutoff_high)
+        return mask.astype(np.float32)
     
     def _gaussian_filter(self, d: np.ndarray, filter_type: str,
                         cutoff: float, cutoff_high: float) -> np.ndarray:
         """Create Gaussian frequency filter."""
+        d2 = np.multiply(d, d)
         if filter_type == 'lowpass':
-            return np.exp(-d**2 / (2 * cutoff**2))
-        elif filter_type == 'highpass':
-            return 1 - np.exp(-d**2 / (2 * cutoff**2))
-        elif filter_type == 'bandpass':
-            low = np.exp(-d**2 / (2 * cutoff_high**2))
-            high = 1 - np.exp(-d**2 / (2 * cutoff**2))
-            return low * high
-        else:  # bandstop
-            return 1 - self._gaussian_filter(d, 'bandpass', cutoff, cutoff_high)
+            return self._gaussian_lowpass(d2, cutoff)
+        
+        mask = self._gaussian_lowpass(d2, cutoff)
+        np.subtract(1, mask, out=mask)
+        if filter_type == 'highpass':
+            return mask
+        
+        # Band filters: lowpass(cutoff_high) * highpass(cutoff), inverted for bandstop
+        mask *= self._gaussian_lowpass(d2, cutoff_high)
+        if filter_type == 'bandstop':
+            np.subtract(1, mask, out=mask)
+        return mask
     
     def _butterworth_filter(self, d: np.ndarray, filter_type: str,
                            cutoff: float, cutoff_high: float, order: int) -> np.ndarray:
@@ -433,18 +577,34 @@ class ImageProcessor:
         eps = 1e-10  # Avoid division by zero
         
         if filter_type == 'lowpass':
-            return 1 / (1 + (d / (cutoff + eps))**(2 * order))
+            t = d / (cutoff + eps)
         elif filter_type == 'highpass':
-            return 1 / (1 + ((cutoff + eps) / (d + eps))**(2 * order))
-        elif filter_type == 'bandpass':
+            t = d + eps
+            np.divide(cutoff + eps, t, out=t)
+        else:
+            # Bandpass t = d * w / (d^2 - center^2); bandstop is 1 - bandpass,
+            # which equals the same response with t inverted
             w = cutoff_high - cutoff
             center = (cutoff + cutoff_high) / 2
-            return 1 / (1 + ((d * w) / (d**2 - center**2 + eps))**(2 * order))
-        else:  # bandstop
-            return 1 - self._butterworth_filter(d, 'bandpass', cutoff, cutoff_high, order)
+            t = np.multiply(d, d)
+            t += eps - center**2
+            # Zero denominators map to an infinite t, i.e. a gain of 0 or 1
+            with np.errstate(divide='ignore'):
+                if filter_type == 'bandpass':
+                    np.divide(d, t, out=t)
+                    t *= w
+                else:  # bandstop
+                    t /= d
+                    t /= w
+        
+        # 1 / (1 + t^(2 * order)), in place with OpenCV's vectorized kernels
+        cv2.pow(t, 2 * order, dst=t)
+        t += 1
+        return cv2.divide(1.0, t, dst=t)
     
     def homomorphic_filter(self, gamma_low: float = 0.3, gamma_high: float = 1.5,
-                          cutoff: float = 30, c: float = 1) -> np.ndarray:
+                          cutoff: float = 30, c: float = 1,
+                          spectrum: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Apply homomorphic filtering for illumination correction.
         
@@ -453,89 +613,85 @@ class ImageProcessor:
             gamma_high: High frequency gain
             cutoff: Cutoff frequency
             c: Constant for sharpness
+            spectrum: Precomputed ``grayscale_spectrum(log=True)``; never modified
         
         Returns:
             Filtered image
         """
-        gray = self.to_grayscale().astype(np.float32)
-        
-        # Add small value to avoid log(0)
-        gray = np.log1p(gray)
-        
-        # FFT
-        rows, cols = gray.shape
-        crow, ccol = rows // 2, cols // 2
+        rows, cols = self.image.shape[:2]
         
-        f = np.fft.fft2(gray)
-        f_shifted = np.fft.fftshift(f)
+        # FFT of log(1 + image), half spectrum only
+        f = self.grayscale_spectrum(log=True) if spectrum is None else spectrum
         
-        # Create homomorphic filter
-        u = np.arange(rows)
-        v = np.arange(cols)
-        u, v = np.meshgrid(u - crow, v - ccol, indexing='ij')
-        d = np.sqrt(u**2 + v**2)
+        # Create homomorphic filter directly on the unshifted half-spectrum grid
+        d = self._get_distance_grid(rows, cols, half=True)
         
-        H = (gamma_high - gamma_low) * (1 - np.exp(-c * (d**2 / cutoff**2))) + gamma_low
+        # H = (gamma_high - gamma_low) * (1 - exp(-c * d^2 / cutoff^2)) + gamma_low
+        H = np.multiply(d, d)
+        H *= -c / cutoff**2
+        cv2.exp(H, dst=H)
+        np.subtract(1, H, out=H)
+        H *= gamma_high - gamma_low
+        H += gamma_low
         
         # Apply filter
-        f_filtered = f_shifted * H
-        f_unshifted = np.fft.ifftshift(f_filtered)
-        filtered = np.fft.ifft2(f_unshifted).real
+        if spectrum is None:
+            f *= H
+        else:
+            f = f * H
+        filtered = _sp_fft().irfft2(f, s=(rows, cols), workers=_FFT_WORKERS, overwrite_x=True)
         
-        # Exponential to reverse log
-        result = np.expm1(filtered)
+        # exp(x) - 1 in place to reverse the log, then saturate to uint8
+        cv2.exp(filtered, dst=filtered)
+        filtered -= 1
         
-        return np.uint8(np.clip(result, 0, 255))
+        return cv2.convertScaleAbs(filtered)
     
     # ==================== Noise Operations ====================
     
     def add_gaussian_noise(self, mean: float = 0, std: float = 25) -> np.ndarray:
         """Add Gaussian noise to the image."""
-        noise = np.random.normal(mean, std, self.image.shape)
-        noisy = self.image.astype(np.float32) + noise
-        return np.uint8(np.clip(noisy, 0, 255))
+        noise = self._rng.standard_normal(self.image.shape, dtype=np.float32)
+        noise *= std
+        noise += mean
+        # Add and saturate to uint8 in one pass
+        return cv2.add(self.image, noise, dtype=cv2.CV_8U)
     
     def add_salt_pepper_noise(self, amount: float = 0.05, 
                              salt_ratio: float = 0.5) -> np.ndarray:
         """Add salt and pepper noise."""
         noisy = self.image.copy()
-        total_pixels = self.image.size
-        
-        # Salt
-        num_salt = int(total_pixels * amount * salt_ratio)
-        salt_coords = [np.random.randint(0, i, num_salt) for i in self.image.shape[:2]]
-        if self.is_color:
-            noisy[salt_coords[0], salt_coords[1], :] = 255
-        else:
-            noisy[salt_coords[0], salt_coords[1]] = 255
         
-        # Pepper
-        num_pepper = int(total_pixels * amount * (1 - salt_ratio))
-        pepper_coords = [np.random.randint(0, i, num_pepper) for i in self.image.shape[:2]]
-        if self.is_color:
-            noisy[pepper_coords[0], pepper_coords[1], :] = 0
-        else:
-            noisy[pepper_coords[0], pepper_coords[1]] = 0
+        # One uniform draw per pixel, split into salt and pepper bands
+        r = self._rng.random(self.image.shape[:2], dtype=np.float32)
+        salt_threshold = amount * salt_ratio
+        noisy[r < salt_threshold] = 255
+        noisy[(r >= salt_threshold) & (r < amount)] = 0
         
         return noisy
     
     def add_poisson_noise(self, scale: float = 1.0) -> np.ndarray:
         """Add Poisson noise."""
-        scaled = self.image.astype(np.float32) * scale
-        noisy = np.random.poisson(scaled).astype(np.float32) / scale
-        return np.uint8(np.clip(noisy, 0, 255))
+        scaled = self.image.astype(np.float32)
+        scaled *= scale
+        noisy = self._rng.poisson(scaled).astype(np.float32)
+        noisy /= scale
+        return np.uint8(np.clip(noisy, 0, 255, out=noisy))
     
     def add_speckle_noise(self, std: float = 0.1) -> np.ndarray:
         """Add speckle (multiplicative) noise."""
-        noise = np.random.randn(*self.image.shape) * std
-        noisy = self.image.astype(np.float32) * (1 + noise)
-        return np.uint8(np.clip(noisy, 0, 255))
+        gain = self._rng.standard_normal(self.image.shape, dtype=np.float32)
+        gain *= std
+        gain += 1
+        # Multiply and saturate to uint8 in one pass
+        return cv2.multiply(self.image, gain, dtype=cv2.CV_8U)
     
     def add_uniform_noise(self, low: float = -50, high: float = 50) -> np.ndarray:
         """Add uniform noise."""
-        noise = np.random.uniform(low, high, self.image.shape)
-        noisy = self.image.astype(np.float32) + noise
-        return np.uint8(np.clip(noisy, 0, 255))
+        noise = self._rng.random(self.image.shape, dtype=np.float32)
+        noise *= high - low
+        noise += low
+        return cv2.add(self.image, noise, dtype=cv2.CV_8U)
     
     def non_local_means_denoise(self, h: float = 10, 
                                 template_window_size: int = 7,
@@ -571,12 +727,13 @@ class ImageProcessor:
     def wiener_filter(self, noise_variance: Optional[float] = None) -> np.ndarray:
         """Apply Wiener filter for denoising."""
         if self.is_color:
-            result = np.zeros_like(self.image)
-            for i in range(3):
-                result[:, :, i] = self._apply_wiener_channel(
-                    self.image[:, :, i], noise_variance
-                )
-            return result
+            # Channels are independent; split to contiguous planes and filter concurrently
+            channels = cv2.split(self.image)
+            results = _CHANNEL_POOL.map(
+                lambda channel: self._apply_wiener_channel(channel, noise_variance),
+                channels
+            )
+            return cv2.merge(list(results))
         else:
             return self._apply_wiener_channel(self.image, noise_variance)
     
@@ -586,10 +743,25 @@ class ImageProcessor:
         if noise_variance is None:
             noise_variance = self._estimate_noise_variance(channel)
         
-        # Simple Wiener implementation
-        filtered = wiener(channel.astype(np.float32), 
-                         noise=noise_variance if noise_variance else None)
-        return np.uint8(np.clip(filtered, 0, 255))
+        # Local mean and variance over a 3x3 window via O(1)-per-pixel box
+        # filters; the zero border matches scipy.signal.wiener
+        window = (3, 3)
+        ch = channel.astype(np.float32)
+        local_mean = cv2.boxFilter(ch, cv2.CV_32F, window, borderType=cv2.BORDER_CONSTANT)
+        local_var = cv2.boxFilter(cv2.multiply(ch, ch), cv2.CV_32F, window,
+                                  borderType=cv2.BORDER_CONSTANT)
+        local_var -= cv2.multiply(local_mean, local_mean)
+        
+        if not noise_variance:
+            noise_variance = float(local_var.mean())
+        
+        # mean + max(var - noise, 0) / max(var, noise) * (x - mean)
+        gain = np.maximum(local_var - noise_variance, 0)
+        gain /= np.maximum(local_var, noise_variance)
+        ch -= local_mean
+        ch *= gain
+        ch += local_mean
+        return np.clip(ch, 0, 255, out=ch).astype(np.uint8)
     
     def _estimate_noise_variance(self, image: np.ndarray) -> float:
         """Estimate noise variance using MAD method."""
@@ -619,9 +791,12 @@ class ImageProcessor:
             laplacian = cv2.Laplacian(gray, cv2.CV_64F)
             sigma = np.sqrt(np.var(laplacian) / 2)
         else:
-            # Simple difference-based estimation
-            diff_h = np.diff(gray.astype(np.float32), axis=1)
-            diff_v = np.diff(gray.astype(np.float32), axis=0)
-            sigma = np.sqrt((np.var(diff_h) + np.var(diff_v)) / 2)
+            # Simple difference-based estimation; neighbour differences are
+            # exact in int16 and each variance comes from one meanStdDev pass
+            diff_h = cv2.subtract(gray[:, 1:], gray[:, :-1], dtype=cv2.CV_16S)
+            diff_v = cv2.subtract(gray[1:, :], gray[:-1, :], dtype=cv2.CV_16S)
+            _, std_h = cv2.meanStdDev(diff_h)
+            _, std_v = cv2.meanStdDev(diff_v)
+            sigma = np.sqrt((std_h[0, 0]**2 + std_v[0, 0]**2) / 2)
         
         return float(sigma)
@@ -1,6 +1,7 @@
 """
 Models package initialization.
 """
+from . import filters
 from .ImageProcessor import ImageProcessor
 
-__all__ = ['ImageProcessor']
+__all__ = ['ImageProcessor', 'filters']
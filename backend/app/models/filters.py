@@ -0,0 +1,208 @@
+"""
+Stateless filter functions operating directly on image arrays.
+
+These back the hot ``ImageProcessor`` methods; routes that apply a single
+operation call them directly instead of constructing a processor.
+"""
+import threading
+from functools import lru_cache
+from typing import Dict, List, Tuple, Union
+
+import cv2
+import numpy as np
+
+# CLAHE objects keep per-call state, so each thread gets its own set
+_clahe_local = threading.local()
+
+
+@lru_cache(maxsize=64)
+def _gaussian_kernel(ksize: int, sigma: float) -> np.ndarray:
+    """1D Gaussian taps shared by the separable blur paths."""
+    kernel = cv2.getGaussianKernel(ksize, sigma, cv2.CV_32F)
+    kernel.flags.writeable = False
+    return kernel
+
+
+def _separable_gaussian(image: np.ndarray, ksize: int, sigma: float) -> np.ndarray:
+    """
+    Gaussian blur as explicit row and column passes.
+
+    Matches cv2.GaussianBlur to within one grey level; for uint8 input
+    sepFilter2D with float taps is faster than GaussianBlur's bit-exact
+    fixed-point path at every kernel size we serve.
+    """
+    kernel = _gaussian_kernel(ksize, sigma)
+    return cv2.sepFilter2D(image, -1, kernel, kernel)
+
+
+def _get_clahe(clip_limit: float, tile_size: Tuple[int, int]):
+    """Get this thread's CLAHE object for the given settings."""
+    cache = getattr(_clahe_local, 'cache', None)
+    if cache is None:
+        cache = _clahe_local.cache = {}
+    key = (clip_limit, tuple(tile_size))
+    clahe = cache.get(key)
+    if clahe is None:
+        clahe = cache[key] = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=key[1])
+    return clahe
+
+
+@lru_cache(maxsize=1)
+def opencl_available() -> bool:
+    """Whether OpenCV can run UMat (T-API) kernels on an OpenCL device."""
+    try:
+        return bool(cv2.ocl.haveOpenCL() and cv2.ocl.useOpenCL())
+    except cv2.error:
+        return False
+
+
+def is_color(image: np.ndarray) -> bool:
+    """Whether the image has three (BGR) channels."""
+    return image.ndim == 3 and image.shape[2] == 3
+
+
+def to_grayscale(image: np.ndarray) -> np.ndarray:
+    """Convert a BGR image to grayscale; grayscale input is returned as is."""
+    if is_color(image):
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+
+def gaussian_blur(image: np.ndarray, kernel_size: int = 5, sigma: float = 1.0) -> np.ndarray:
+    """Apply Gaussian blur."""
+    if kernel_size % 2 == 0:
+        kernel_size += 1
+    return _separable_gaussian(image, kernel_size, sigma)
+
+
+def box_blur(image: np.ndarray, kernel_size: int = 5) -> np.ndarray:
+    """Apply box (average) blur."""
+    if kernel_size % 2 == 0:
+        kernel_size += 1
+    # cv2.blur already runs separable running sums, O(1) per pixel in k
+    return cv2.blur(image, (kernel_size, kernel_size))
+
+
+def median_filter(image: np.ndarray, kernel_size: int = 5) -> np.ndarray:
+    """Apply median filter."""
+    if kernel_size % 2 == 0:
+        kernel_size += 1
+    return cv2.medianBlur(image, kernel_size)
+
+
+def sobel_edge_detection(image: np.ndarray, ksize: int = 3) -> np.ndarray:
+    """Apply Sobel edge detection."""
+    gray = to_grayscale(image)
+    sobelx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=ksize)
+    sobely = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=ksize)
+    # sqrt(x^2 + y^2) and saturation to uint8, each in one OpenCV pass
+    magnitude = cv2.magnitude(sobelx, sobely)
+    return cv2.convertScaleAbs(magnitude)
+
+
+def canny_edge_detection(image: np.ndarray, threshold1: float = 100,
+                         threshold2: float = 200) -> np.ndarray:
+    """Apply Canny edge detection."""
+    return cv2.Canny(to_grayscale(image), threshold1, threshold2)
+
+
+def calculate_histogram(image: np.ndarray, as_lists: bool = True) -> Dict[str, List[int]]:
+    """
+    Calculate histogram for the image using optimized OpenCV functions.
+
+    Args:
+        image: BGR or grayscale image
+        as_lists: Return Python lists; pass False to get the float32 arrays
+            for a serializer that writes NumPy arrays directly
+
+    Returns:
+        Dictionary with histogram data for each channel
+    """
+    histograms = {}
+
+    if is_color(image):
+        for i, color in enumerate(['blue', 'green', 'red']):
+            histograms[color] = cv2.calcHist([image], [i], None, [256], [0, 256]).ravel()
+    else:
+        histograms['gray'] = cv2.calcHist([image], [0], None, [256], [0, 256]).ravel()
+
+    if as_lists:
+        return {channel: hist.tolist() for channel, hist in histograms.items()}
+    return histograms
+
+
+def _equalize_gray(image: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Equalize a single channel, returning the image and its new histogram.
+
+    Rebuilds cv2.equalizeHist's lookup table from the input histogram so
+    the output histogram follows from the table alone, without another
+    pass over the pixels.
+    """
+    hist = cv2.calcHist([image], [0], None, [256], [0, 256]).ravel()
+    first = int(np.flatnonzero(hist)[0])
+    lut = np.full(256, first, dtype=np.uint8)
+    if hist[first] != image.size:
+        # Same float32 scale and rounding as OpenCV's equalizeHist
+        scale = np.float32(255.0 / (image.size - hist[first]))
+        cumulative = np.cumsum(hist, dtype=np.int64)[first:] - int(hist[first])
+        lut[:first] = 0
+        lut[first:] = np.clip(np.rint(cumulative.astype(np.float32) * scale), 0, 255)
+    result = cv2.LUT(image, lut)
+    return result, np.bincount(lut, weights=hist, minlength=256)
+
+
+def histogram_equalization(image: np.ndarray, return_hist: bool = False
+                           ) -> Union[np.ndarray, Tuple[np.ndarray, Dict[str, List[int]]]]:
+    """
+    Perform global histogram equalization.
+
+    Args:
+        image: BGR or grayscale image
+        return_hist: Also return the histogram of the equalized image
+
+    Returns:
+        Equalized image, or (image, histogram) when return_hist is set
+    """
+    if is_color(image):
+        # Convert to YCrCb, equalize Y channel
+        ycrcb = cv2.cvtColor(image, cv2.COLOR_BGR2YCrCb)
+        ycrcb[:, :, 0] = cv2.equalizeHist(ycrcb[:, :, 0])
+        # Convert back in place; the intermediate is ours to overwrite
+        result = cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2BGR, dst=ycrcb)
+        if return_hist:
+            return result, calculate_histogram(result)
+        return result
+
+    if not return_hist:
+        return cv2.equalizeHist(image)
+    result, hist = _equalize_gray(image)
+    return result, {'gray': hist.tolist()}
+
+
+def clahe_equalization(image: np.ndarray, clip_limit: float = 2.0,
+                       tile_size: Tuple[int, int] = (8, 8), return_hist: bool = False
+                       ) -> Union[np.ndarray, Tuple[np.ndarray, Dict[str, List[int]]]]:
+    """
+    Perform CLAHE (Contrast Limited Adaptive Histogram Equalization).
+
+    Args:
+        image: BGR or grayscale image
+        clip_limit: Threshold for contrast limiting
+        tile_size: Size of grid for histogram equalization
+        return_hist: Also return the histogram of the equalized image
+
+    Returns:
+        CLAHE equalized image, or (image, histogram) when return_hist is set
+    """
+    clahe = _get_clahe(clip_limit, tile_size)
+
+    if is_color(image):
+        lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
+        lab[:, :, 0] = clahe.apply(lab[:, :, 0])
+        result = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR, dst=lab)
+    else:
+        result = clahe.apply(image)
+    if return_hist:
+        return result, calculate_histogram(result)
+    return result
@@ -9,6 +9,7 @@ from .histogram_routes import histogram_bp
 from .filter_routes import filter_bp
 from .fourier_routes import fourier_bp
 from .noise_routes import noise_bp
+from .pipeline_routes import pipeline_bp
 
 
 def register_routes(app):
@@ -26,6 +27,7 @@ def register_routes(app):
     app.register_blueprint(filter_bp, url_prefix=f'{api_prefix}/filters')
     app.register_blueprint(fourier_bp, url_prefix=f'{api_prefix}/fourier')
     app.register_blueprint(noise_bp, url_prefix=f'{api_prefix}/noise')
+    app.register_blueprint(pipeline_bp, url_prefix=f'{api_prefix}/pipeline')
     
     # Health check endpoints
     @app.route('/health')
@@ -44,6 +46,7 @@ def register_routes(app):
                 'histogram': '/api/histogram',
                 'filters': '/api/filters',
                 'fourier': '/api/fourier',
-                'noise': '/api/noise'
+                'noise': '/api/noise',
+                'pipeline': '/api/pipeline'
             }
         }
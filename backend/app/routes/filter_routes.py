@@ -1,44 +1,72 @@
 """
 Image filtering routes with performance optimizations.
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request
+import cv2
 import numpy as np
 import hashlib
+import json
+from collections import OrderedDict
 from functools import lru_cache
 import threading
 
 from app.routes.image_routes import get_image_store
+from app.models import filters
 from app.models.ImageProcessor import ImageProcessor
-from app.utils.image_utils import load_image, image_to_base64, resize_for_processing
+from app.utils.image_utils import (
+    encode_image, get_cached_image, image_to_base64, load_image_reduced,
+    resize_image
+)
+from app.utils.responses import json_response
 
 filter_bp = Blueprint('filters', __name__)
 
-# Result cache for filter operations
-_filter_cache = {}
+# LRU result cache for filter operations
+_filter_cache = OrderedDict()
 _filter_cache_lock = threading.Lock()
 _MAX_FILTER_CACHE = 100
+_MAX_FILTER_CACHE_BYTES = 256 * 1024 * 1024
+_filter_cache_bytes = 0
+_HASH = hashlib.blake2b
 
 
 def _get_filter_cache_key(image_id: str, filter_type: str, params: dict) -> str:
-    """Generate cache key for filter result."""
-    param_str = str(sorted(params.items()))
-    return hashlib.md5(f"{image_id}_{filter_type}_{param_str}".encode()).hexdigest()
+    """Generate cache key for filter result from canonical JSON of the request."""
+    return _HASH(
+        json.dumps({'i': image_id, 't': filter_type, 'p': params},
+                   sort_keys=True, separators=(',', ':')).encode(),
+        digest_size=16
+    ).hexdigest()
 
 
 def _get_cached_result(cache_key: str) -> str:
     """Get cached filter result if available."""
     with _filter_cache_lock:
-        return _filter_cache.get(cache_key)
+        result = _filter_cache.get(cache_key)
+        if result is not None:
+            _filter_cache.move_to_end(cache_key)
+        return result
 
 
-def _cache_result(cache_key: str, result: str) -> None:
-    """Cache filter result."""
+def _cache_result(cache_key: str, result) -> None:
+    """
+    Cache filter result.
+    
+    Entries are base64 strings or encoded bytes, so ``len`` is their size.
+    The cache is bounded by total size as well as entry count.
+    """
+    global _filter_cache_bytes
     with _filter_cache_lock:
-        if len(_filter_cache) >= _MAX_FILTER_CACHE:
-            # Remove oldest entry
-            oldest_key = next(iter(_filter_cache))
-            del _filter_cache[oldest_key]
+        previous = _filter_cache.pop(cache_key, None)
+        if previous is not None:
+            _filter_cache_bytes -= len(previous)
         _filter_cache[cache_key] = result
+        _filter_cache_bytes += len(result)
+        while (len(_filter_cache) > _MAX_FILTER_CACHE or
+               _filter_cache_bytes > _MAX_FILTER_CACHE_BYTES):
+            # Evict the least recently used entry
+            _, evicted = _filter_cache.popitem(last=False)
+            _filter_cache_bytes -= len(evicted)
 
 # Available filters with their parameters
 AVAILABLE_FILTERS = {
@@ -118,7 +146,7 @@ def get_available_filters():
     Returns:
         JSON with available filters information
     """
-    return jsonify({
+    return json_response({
         'success': True,
         'filters': AVAILABLE_FILTERS
     })
@@ -141,10 +169,10 @@ def apply_filter():
     data = request.get_json()
     
     if not data or 'image_id' not in data:
-        return jsonify({'error': 'image_id is required'}), 400
+        return json_response({'error': 'image_id is required'}, 400)
     
     if 'filter_type' not in data:
-        return jsonify({'error': 'filter_type is required'}), 400
+        return json_response({'error': 'filter_type is required'}, 400)
     
     image_id = data['image_id']
     filter_type = data['filter_type']
@@ -152,14 +180,14 @@ def apply_filter():
     use_cache = data.get('use_cache', True)
     
     if filter_type not in AVAILABLE_FILTERS:
-        return jsonify({'error': f'Unknown filter type: {filter_type}'}), 400
+        return json_response({'error': f'Unknown filter type: {filter_type}'}, 400)
     
     # Check cache first
     cache_key = _get_filter_cache_key(image_id, filter_type, params)
     if use_cache:
         cached = _get_cached_result(cache_key)
         if cached:
-            return jsonify({
+            return json_response({
                 'success': True,
                 'image_id': image_id,
                 'filter_type': filter_type,
@@ -168,32 +196,29 @@ def apply_filter():
                 'cached': True
             })
     
-    image_store = get_image_store()
+    image_data = get_image_store().get(image_id)
     
-    if image_id not in image_store:
-        return jsonify({'error': 'Image not found'}), 404
+    if image_data is None:
+        return json_response({'error': 'Image not found'}, 404)
     
-    image_data = image_store[image_id]
-    image = load_image(image_data['filepath'])
+    image = get_cached_image(image_data['filepath'])
     
     if image is None:
-        return jsonify({'error': 'Failed to load image'}), 500
-    
-    processor = ImageProcessor(image)
+        return json_response({'error': 'Failed to load image'}, 500)
     
     # Apply appropriate filter with parameters
     try:
-        result = apply_filter_to_image(processor, filter_type, params)
+        result = apply_filter_to_image(image, filter_type, params)
     except Exception as e:
-        return jsonify({'error': f'Filter application failed: {str(e)}'}), 500
+        return json_response({'error': f'Filter application failed: {str(e)}'}, 500)
     
-    result_base64 = image_to_base64(result)
+    result_base64 = image_to_base64(result, format='jpeg')
     
     # Cache the result
     if use_cache:
         _cache_result(cache_key, result_base64)
     
-    return jsonify({
+    return json_response({
         'success': True,
         'image_id': image_id,
         'filter_type': filter_type,
@@ -203,66 +228,199 @@ def apply_filter():
     })
 
 
-def apply_filter_to_image(processor, filter_type, params):
+@filter_bp.route('/apply_binary', methods=['POST'])
+def apply_filter_binary():
+    """
+    Apply a filter and return the encoded image bytes instead of base64 JSON.
+    
+    Takes the same request JSON as ``/apply``. Skips base64 on both ends and
+    its 33% size overhead; clients can display the body through
+    ``URL.createObjectURL``.
+    
+    Returns:
+        JPEG image body with ``X-Cache: HIT|MISS`` and ``X-Filter-Type`` headers
     """
-    Apply the specified filter to the image processor.
+    data = request.get_json()
+    
+    if not data or 'image_id' not in data:
+        return json_response({'error': 'image_id is required'}, 400)
+    
+    if 'filter_type' not in data:
+        return json_response({'error': 'filter_type is required'}, 400)
+    
+    image_id = data['image_id']
+    filter_type = data['filter_type']
+    params = data.get('params', {})
+    use_cache = data.get('use_cache', True)
+    
+    if filter_type not in AVAILABLE_FILTERS:
+        return json_response({'error': f'Unknown filter type: {filter_type}'}, 400)
+    
+    # Binary results share the LRU with the base64 ones under their own keys
+    cache_key = 'bin:' + _get_filter_cache_key(image_id, filter_type, params)
+    cached = _get_cached_result(cache_key) if use_cache else None
+    
+    if cached is None:
+        image_data = get_image_store().get(image_id)
+        
+        if image_data is None:
+            return json_response({'error': 'Image not found'}, 404)
+        
+        image = get_cached_image(image_data['filepath'])
+        
+        if image is None:
+            return json_response({'error': 'Failed to load image'}, 500)
+        
+        try:
+            result = apply_filter_to_image(image, filter_type, params)
+        except Exception as e:
+            return json_response({'error': f'Filter application failed: {str(e)}'}, 500)
+        
+        buffer, _ = encode_image(result, format='jpeg')
+        body = buffer.tobytes()
+        if use_cache:
+            _cache_result(cache_key, body)
+    else:
+        body = cached
+    
+    response = Response(body, mimetype='image/jpeg')
+    response.headers['X-Cache'] = 'MISS' if cached is None else 'HIT'
+    response.headers['X-Filter-Type'] = filter_type
+    return response
+
+
+@lru_cache(maxsize=32)
+def _kernel_array(kernel: tuple) -> np.ndarray:
+    """Convert a hashable kernel to a shared read-only float32 array."""
+    array = np.array(kernel, dtype=np.float32)
+    array.flags.writeable = False
+    return array
+
+
+def _custom_kernel(image, p):
+    """Apply a user-supplied kernel from the request parameters."""
+    kernel = p['kernel']
+    try:
+        # Preview sliders resend the same kernel; reuse its converted array
+        array = _kernel_array(tuple(map(tuple, kernel)))
+    except TypeError:
+        array = np.array(kernel, dtype=np.float32)
+    return ImageProcessor(image).apply_custom_kernel(array)
+
+
+# Filter type -> callable(image, merged_params). Hot filters call the
+# stateless functions directly; the rest go through ImageProcessor.
+_FILTER_DISPATCH = {
+    'blur': lambda img, p: filters.gaussian_blur(img, p['kernel_size'], p['sigma']),
+    'box_blur': lambda img, p: filters.box_blur(img, p['kernel_size']),
+    'median': lambda img, p: filters.median_filter(img, p['kernel_size']),
+    'bilateral': lambda img, p: ImageProcessor(img).bilateral_filter(
+        p['d'], p['sigma_color'], p['sigma_space']
+    ),
+    'sharpen': lambda img, p: ImageProcessor(img).sharpen(p['strength']),
+    'unsharp_mask': lambda img, p: ImageProcessor(img).unsharp_mask(
+        p['sigma'], p['strength'], p['threshold']
+    ),
+    'edge_sobel': lambda img, p: filters.sobel_edge_detection(img, p['ksize']),
+    'edge_laplacian': lambda img, p: ImageProcessor(img).laplacian_edge_detection(p['ksize']),
+    'edge_canny': lambda img, p: filters.canny_edge_detection(
+        img, p['threshold1'], p['threshold2']
+    ),
+    'emboss': lambda img, p: ImageProcessor(img).emboss(),
+    'high_pass': lambda img, p: ImageProcessor(img).high_pass_filter(p['kernel_size']),
+    'low_pass': lambda img, p: ImageProcessor(img).low_pass_filter(p['kernel_size']),
+    'custom': _custom_kernel,
+}
+
+
+def _umat(image) -> cv2.UMat:
+    """Wrap an array for OpenCV's transparent OpenCL path."""
+    return cv2.UMat(np.ascontiguousarray(image))
+
+
+# Compute-bound filters worth the host/device copies when an OpenCL device
+# is present: filter type -> (predicate on merged params, callable(image,
+# merged_params)). Cheap settings stay on the CPU.
+_OPENCL_DISPATCH = {
+    'bilateral': (
+        lambda p: p['d'] >= 9,
+        lambda img, p: cv2.bilateralFilter(
+            _umat(img), p['d'], p['sigma_color'], p['sigma_space']
+        ).get(),
+    ),
+    'median': (
+        lambda p: p['kernel_size'] >= 7,
+        lambda img, p: cv2.medianBlur(_umat(img), p['kernel_size'] | 1).get(),
+    ),
+    'edge_canny': (
+        lambda p: True,
+        lambda img, p: cv2.Canny(
+            _umat(filters.to_grayscale(img)), p['threshold1'], p['threshold2']
+        ).get(),
+    ),
+}
+
+
+def apply_filter_to_image(image, filter_type, params):
+    """
+    Apply the specified filter to an image.
     
     Args:
-        processor: ImageProcessor instance
+        image: Input image as numpy array
         filter_type: Type of filter
         params: Filter parameters
     
     Returns:
         Filtered image as numpy array
     """
+    handler = _FILTER_DISPATCH.get(filter_type)
+    if handler is None:
+        raise ValueError(f'Unsupported filter type: {filter_type}')
+    
+    # Merge provided params with defaults; the defaults are only read
     defaults = AVAILABLE_FILTERS[filter_type]['defaults']
+    merged_params = {**defaults, **params} if params else defaults
     
-    # Merge provided params with defaults
-    merged_params = {**defaults, **params}
-    
-    if filter_type == 'blur':
-        return processor.gaussian_blur(
-            merged_params['kernel_size'],
-            merged_params['sigma']
-        )
-    elif filter_type == 'box_blur':
-        return processor.box_blur(merged_params['kernel_size'])
-    elif filter_type == 'median':
-        return processor.median_filter(merged_params['kernel_size'])
-    elif filter_type == 'bilateral':
-        return processor.bilateral_filter(
-            merged_params['d'],
-            merged_params['sigma_color'],
-            merged_params['sigma_space']
-        )
-    elif filter_type == 'sharpen':
-        return processor.sharpen(merged_params['strength'])
-    elif filter_type == 'unsharp_mask':
-        return processor.unsharp_mask(
-            merged_params['sigma'],
-            merged_params['strength'],
-            merged_params['threshold']
-        )
-    elif filter_type == 'edge_sobel':
-        return processor.sobel_edge_detection(merged_params['ksize'])
-    elif filter_type == 'edge_laplacian':
-        return processor.laplacian_edge_detection(merged_params['ksize'])
-    elif filter_type == 'edge_canny':
-        return processor.canny_edge_detection(
-            merged_params['threshold1'],
-            merged_params['threshold2']
-        )
-    elif filter_type == 'emboss':
-        return processor.emboss()
-    elif filter_type == 'high_pass':
-        return processor.high_pass_filter(merged_params['kernel_size'])
-    elif filter_type == 'low_pass':
-        return processor.low_pass_filter(merged_params['kernel_size'])
-    elif filter_type == 'custom':
-        kernel = np.array(merged_params['kernel'], dtype=np.float32)
-        return processor.apply_custom_kernel(kernel)
-    else:
-        raise ValueError(f'Unsupported filter type: {filter_type}')
+    opencl = _OPENCL_DISPATCH.get(filter_type)
+    if opencl is not None and filters.opencl_available() and opencl[0](merged_params):
+        try:
+            return opencl[1](image, merged_params)
+        except cv2.error:
+            # Driver or kernel build failures fall back to the CPU path
+            pass
+    
+    return handler(image, merged_params)
+
+
+# Previews are rendered on a thumbnail no larger than this on its long side
+_PREVIEW_MAX_DIMENSION = 512
+
+# Parameters measured in pixels, rescaled so a thumbnail preview looks like
+# the full-resolution result: (window sizes, Gaussian sigmas)
+_PREVIEW_SCALED_PARAMS = {
+    'blur': (('kernel_size',), ('sigma',)),
+    'box_blur': (('kernel_size',), ()),
+    'median': (('kernel_size',), ()),
+    'bilateral': (('d',), ('sigma_space',)),
+    'unsharp_mask': ((), ('sigma',)),
+}
+
+
+def _scale_preview_params(filter_type: str, params: dict, scale: float) -> dict:
+    """Rescale pixel-sized filter parameters for a downsampled preview."""
+    scaled_keys = _PREVIEW_SCALED_PARAMS.get(filter_type)
+    if scaled_keys is None:
+        return params
+    
+    size_keys, sigma_keys = scaled_keys
+    scaled = {**AVAILABLE_FILTERS[filter_type]['defaults'], **params}
+    for key in size_keys:
+        # Non-positive sizes mean "derive from sigma" and are left alone
+        if scaled[key] > 0:
+            scaled[key] = int(round(scaled[key] * scale)) | 1
+    for key in sigma_keys:
+        scaled[key] = scaled[key] * scale
+    return scaled
 
 
 @filter_bp.route('/preview', methods=['POST'])
@@ -270,6 +428,10 @@ def preview_filter():
     """
     Preview filter effect on a small portion of the image.
     
+    The preview is a thumbnail: the image (or region) is downsampled to at
+    most 512 px on its long side before filtering, and pixel-sized
+    parameters are scaled to match.
+    
     Request JSON:
         - image_id: Image identifier
         - filter_type: Type of filter
@@ -282,39 +444,53 @@ def preview_filter():
     data = request.get_json()
     
     if not data or 'image_id' not in data:
-        return jsonify({'error': 'image_id is required'}), 400
+        return json_response({'error': 'image_id is required'}, 400)
     
     image_id = data['image_id']
     filter_type = data.get('filter_type', 'blur')
     params = data.get('params', {})
     region = data.get('region')
     
-    image_store = get_image_store()
+    image_data = get_image_store().get(image_id)
     
-    if image_id not in image_store:
-        return jsonify({'error': 'Image not found'}), 404
+    if image_data is None:
+        return json_response({'error': 'Image not found'}, 404)
     
-    image_data = image_store[image_id]
-    image = load_image(image_data['filepath'])
+    if region:
+        image = get_cached_image(image_data['filepath'])
+    else:
+        # Whole-image previews can be decoded at reduced scale
+        size = None
+        if image_data.get('width') and image_data.get('height'):
+            size = (image_data['width'], image_data['height'])
+        image = load_image_reduced(image_data['filepath'], _PREVIEW_MAX_DIMENSION, size)
     
     if image is None:
-        return jsonify({'error': 'Failed to load image'}), 500
+        return json_response({'error': 'Failed to load image'}, 500)
     
     # Extract region if specified
     if region:
         x, y, w, h = region['x'], region['y'], region['width'], region['height']
         image = image[y:y+h, x:x+w]
+        width = image.shape[1]
+    else:
+        width = image_data.get('width') or image.shape[1]
     
-    processor = ImageProcessor(image)
+    # Parameters are scaled against the full-resolution width, which a
+    # reduced decode has already shrunk
+    if max(image.shape[:2]) > _PREVIEW_MAX_DIMENSION:
+        image = resize_image(image, _PREVIEW_MAX_DIMENSION)
+    if image.shape[1] < width:
+        params = _scale_preview_params(filter_type, params, image.shape[1] / width)
     
     try:
-        result = apply_filter_to_image(processor, filter_type, params)
+        result = apply_filter_to_image(image, filter_type, params)
     except Exception as e:
-        return jsonify({'error': f'Preview failed: {str(e)}'}), 500
+        return json_response({'error': f'Preview failed: {str(e)}'}, 500)
     
-    result_base64 = image_to_base64(result)
+    result_base64 = image_to_base64(result, format='jpeg')
     
-    return jsonify({
+    return json_response({
         'success': True,
         'preview_image': result_base64
     })
@@ -1,18 +1,22 @@
 """
 Fourier transform and frequency domain filtering routes.
 """
-from flask import Blueprint, request, jsonify
-import numpy as np
+from flask import Blueprint
+import cv2
 
-from app.routes.image_routes import get_image_store
 from app.models.ImageProcessor import ImageProcessor
-from app.utils.image_utils import load_image, image_to_base64
+from app.utils.image_utils import get_cached_fft, image_to_base64
+from app.utils.response_cache import cached_response
+from app.utils.responses import json_response
+from app.utils.route_helpers import with_image
 
 fourier_bp = Blueprint('fourier', __name__)
 
 
 @fourier_bp.route('/transform', methods=['POST'])
-def compute_fft():
+@cached_response('fourier.transform', param_keys=['shift', 'log_scale'])
+@with_image(metadata=True)
+def compute_fft(data, image, image_data):
     """
     Compute the Fourier Transform of an image.
     
@@ -24,47 +28,35 @@ def compute_fft():
     Returns:
         Base64 encoded magnitude spectrum image
     """
-    data = request.get_json()
-    
-    if not data or 'image_id' not in data:
-        return jsonify({'error': 'image_id is required'}), 400
-    
     image_id = data['image_id']
     shift = data.get('shift', True)
     log_scale = data.get('log_scale', True)
     
-    image_store = get_image_store()
-    
-    if image_id not in image_store:
-        return jsonify({'error': 'Image not found'}), 404
-    
-    image_data = image_store[image_id]
-    image = load_image(image_data['filepath'])
-    
-    if image is None:
-        return jsonify({'error': 'Failed to load image'}), 500
-    
     processor = ImageProcessor(image)
-    magnitude_spectrum, phase_spectrum = processor.compute_fft(shift=shift)
+    spectrum = get_cached_fft(image_data['filepath'])
+    magnitude_spectrum, phase_spectrum = processor.compute_fft(shift=shift, spectrum=spectrum)
     
     # Create visualization
     if log_scale:
         magnitude_vis = processor.visualize_fft_magnitude(magnitude_spectrum)
     else:
-        magnitude_vis = (magnitude_spectrum / magnitude_spectrum.max() * 255).astype(np.uint8)
+        # Scale so the maximum maps to 255 and convert in one OpenCV pass
+        magnitude_vis = cv2.normalize(magnitude_spectrum, None, 255, 0, cv2.NORM_INF, dtype=cv2.CV_8U)
     
     phase_vis = processor.visualize_fft_phase(phase_spectrum)
     
-    return jsonify({
+    return json_response({
         'success': True,
         'image_id': image_id,
-        'magnitude_spectrum': image_to_base64(magnitude_vis),
-        'phase_spectrum': image_to_base64(phase_vis)
+        'magnitude_spectrum': image_to_base64(magnitude_vis, format='png'),
+        'phase_spectrum': image_to_base64(phase_vis, format='png')
     })
 
 
 @fourier_bp.route('/inverse', methods=['POST'])
-def compute_inverse_fft():
+@cached_response('fourier.inverse')
+@with_image(metadata=True)
+def compute_inverse_fft(data, image, image_data):
     """
     Compute inverse FFT from magnitude and phase data.
     
@@ -74,39 +66,28 @@ def compute_inverse_fft():
     Returns:
         Base64 encoded reconstructed image
     """
-    data = request.get_json()
-    
-    if not data or 'image_id' not in data:
-        return jsonify({'error': 'image_id is required'}), 400
-    
     image_id = data['image_id']
     
-    image_store = get_image_store()
-    
-    if image_id not in image_store:
-        return jsonify({'error': 'Image not found'}), 404
-    
-    image_data = image_store[image_id]
-    image = load_image(image_data['filepath'])
-    
-    if image is None:
-        return jsonify({'error': 'Failed to load image'}), 500
-    
     processor = ImageProcessor(image)
     
     # Compute FFT and then inverse to demonstrate reconstruction
-    magnitude, phase = processor.compute_fft(shift=True)
+    spectrum = get_cached_fft(image_data['filepath'])
+    magnitude, phase = processor.compute_fft(shift=True, spectrum=spectrum)
     reconstructed = processor.compute_inverse_fft(magnitude, phase, shift=True)
     
-    return jsonify({
+    return json_response({
         'success': True,
         'image_id': image_id,
-        'reconstructed_image': image_to_base64(reconstructed)
+        'reconstructed_image': image_to_base64(reconstructed, format='jpeg')
     })
 
 
 @fourier_bp.route('/filter', methods=['POST'])
-def apply_frequency_filter():
+@cached_response('fourier.filter', param_keys=[
+    'filter_type', 'cutoff', 'cutoff_high', 'filter_order', 'filter_method'
+])
+@with_image(metadata=True)
+def apply_frequency_filter(data, image, image_data):
     """
     Apply frequency domain filtering.
     
@@ -121,11 +102,6 @@ def apply_frequency_filter():
     Returns:
         Base64 encoded filtered image and filter mask
     """
-    data = request.get_json()
-    
-    if not data or 'image_id' not in data:
-        return jsonify({'error': 'image_id is required'}), 400
-    
     image_id = data['image_id']
     filter_type = data.get('filter_type', 'lowpass')
     cutoff = data.get('cutoff', 0.3)
@@ -133,17 +109,6 @@ def apply_frequency_filter():
     filter_order = data.get('filter_order', 2)
     filter_method = data.get('filter_method', 'gaussian')
     
-    image_store = get_image_store()
-    
-    if image_id not in image_store:
-        return jsonify({'error': 'Image not found'}), 404
-    
-    image_data = image_store[image_id]
-    image = load_image(image_data['filepath'])
-    
-    if image is None:
-        return jsonify({'error': 'Failed to load image'}), 500
-    
     processor = ImageProcessor(image)
     
     try:
@@ -152,26 +117,29 @@ def apply_frequency_filter():
             cutoff=cutoff,
             cutoff_high=cutoff_high,
             order=filter_order,
-            method=filter_method
+            method=filter_method,
+            spectrum=get_cached_fft(image_data['filepath'])
         )
     except Exception as e:
-        return jsonify({'error': f'Frequency filtering failed: {str(e)}'}), 500
+        return json_response({'error': f'Frequency filtering failed: {str(e)}'}, 500)
     
     # Visualize filter mask
-    filter_vis = (filter_mask * 255).astype(np.uint8)
+    filter_vis = cv2.convertScaleAbs(filter_mask, alpha=255)
     
-    return jsonify({
+    return json_response({
         'success': True,
         'image_id': image_id,
         'filter_type': filter_type,
         'filter_method': filter_method,
-        'result_image': image_to_base64(result),
-        'filter_mask': image_to_base64(filter_vis)
+        'result_image': image_to_base64(result, format='png'),
+        'filter_mask': image_to_base64(filter_vis, format='png')
     })
 
 
 @fourier_bp.route('/homomorphic', methods=['POST'])
-def homomorphic_filter():
+@cached_response('fourier.homomorphic', param_keys=['gamma_low', 'gamma_high', 'cutoff', 'c'])
+@with_image(metadata=True)
+def homomorphic_filter(data, image, image_data):
     """
     Apply homomorphic filtering for illumination correction.
     
@@ -185,28 +153,12 @@ def homomorphic_filter():
     Returns:
         Base64 encoded filtered image
     """
-    data = request.get_json()
-    
-    if not data or 'image_id' not in data:
-        return jsonify({'error': 'image_id is required'}), 400
-    
     image_id = data['image_id']
     gamma_low = data.get('gamma_low', 0.3)
     gamma_high = data.get('gamma_high', 1.5)
     cutoff = data.get('cutoff', 30)
     c = data.get('c', 1)
     
-    image_store = get_image_store()
-    
-    if image_id not in image_store:
-        return jsonify({'error': 'Image not found'}), 404
-    
-    image_data = image_store[image_id]
-    image = load_image(image_data['filepath'])
-    
-    if image is None:
-        return jsonify({'error': 'Failed to load image'}), 500
-    
     processor = ImageProcessor(image)
     
     try:
@@ -214,15 +166,16 @@ def homomorphic_filter():
             gamma_low=gamma_low,
             gamma_high=gamma_high,
             cutoff=cutoff,
-            c=c
+            c=c,
+            spectrum=get_cached_fft(image_data['filepath'], log=True)
         )
     except Exception as e:
-        return jsonify({'error': f'Homomorphic filtering failed: {str(e)}'}), 500
+        return json_response({'error': f'Homomorphic filtering failed: {str(e)}'}, 500)
     
-    return jsonify({
+    return json_response({
         'success': True,
         'image_id': image_id,
-        'result_image': image_to_base64(result)
+        'result_image': image_to_base64(result, format='jpeg')
     })
 
 
@@ -268,7 +221,7 @@ def get_available_frequency_filters():
         'butterworth': 'Adjustable transition sharpness'
     }
     
-    return jsonify({
+    return json_response({
         'success': True,
         'filters': filters,
         'methods': methods
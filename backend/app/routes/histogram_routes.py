@@ -1,15 +1,15 @@
 """
 Histogram analysis and equalization routes.
 """
-import base64
-import io
-from flask import Blueprint, request, jsonify
-import numpy as np
-import cv2
+from flask import Blueprint
 
 from app.routes.image_routes import get_image_store
+from app.models import filters
 from app.models.ImageProcessor import ImageProcessor
-from app.utils.image_utils import load_image, image_to_base64
+from app.utils.image_utils import get_cached_image, image_to_base64
+from app.utils.response_cache import cached_response
+from app.utils.responses import json_response
+from app.utils.route_helpers import with_image
 
 histogram_bp = Blueprint('histogram', __name__)
 
@@ -25,21 +25,20 @@ def get_histogram(image_id):
     Returns:
         JSON with histogram data for each channel
     """
-    image_store = get_image_store()
+    image_data = get_image_store().get(image_id)
     
-    if image_id not in image_store:
-        return jsonify({'error': 'Image not found'}), 404
+    if image_data is None:
+        return json_response({'error': 'Image not found'}, 404)
     
-    image_data = image_store[image_id]
-    image = load_image(image_data['filepath'])
+    image = get_cached_image(image_data['filepath'])
     
     if image is None:
-        return jsonify({'error': 'Failed to load image'}), 500
+        return json_response({'error': 'Failed to load image'}, 500)
     
-    processor = ImageProcessor(image)
-    histogram_data = processor.calculate_histogram()
+    # json_response writes the float32 arrays without building Python lists
+    histogram_data = filters.calculate_histogram(image, as_lists=False)
     
-    return jsonify({
+    return json_response({
         'success': True,
         'image_id': image_id,
         'histogram': histogram_data
@@ -47,7 +46,9 @@ def get_histogram(image_id):
 
 
 @histogram_bp.route('/equalize', methods=['POST'])
-def equalize_histogram():
+@cached_response('histogram.equalize', param_keys=['method', 'clip_limit', 'tile_size'])
+@with_image()
+def equalize_histogram(data, image):
     """
     Perform histogram equalization on an image.
     
@@ -60,44 +61,25 @@ def equalize_histogram():
     Returns:
         Base64 encoded equalized image
     """
-    data = request.get_json()
-    
-    if not data or 'image_id' not in data:
-        return jsonify({'error': 'image_id is required'}), 400
-    
     image_id = data['image_id']
     method = data.get('method', 'global')
     clip_limit = data.get('clip_limit', 2.0)
     tile_size = data.get('tile_size', 8)
     
-    image_store = get_image_store()
-    
-    if image_id not in image_store:
-        return jsonify({'error': 'Image not found'}), 404
-    
-    image_data = image_store[image_id]
-    image = load_image(image_data['filepath'])
-    
-    if image is None:
-        return jsonify({'error': 'Failed to load image'}), 500
-    
-    processor = ImageProcessor(image)
-    
+    # Equalization returns the output histogram alongside the image
     if method == 'clahe':
-        result = processor.clahe_equalization(clip_limit, (tile_size, tile_size))
+        result, equalized_histogram = filters.clahe_equalization(
+            image, clip_limit, (tile_size, tile_size), return_hist=True
+        )
     elif method == 'adaptive':
-        result = processor.adaptive_histogram_equalization()
+        result, equalized_histogram = filters.clahe_equalization(image, return_hist=True)
     else:
-        result = processor.histogram_equalization()
-    
-    # Get histogram of equalized image
-    result_processor = ImageProcessor(result)
-    equalized_histogram = result_processor.calculate_histogram()
+        result, equalized_histogram = filters.histogram_equalization(image, return_hist=True)
     
     # Convert result to base64
-    result_base64 = image_to_base64(result)
+    result_base64 = image_to_base64(result, format='jpeg')
     
-    return jsonify({
+    return json_response({
         'success': True,
         'image_id': image_id,
         'method': method,
@@ -107,7 +89,9 @@ def equalize_histogram():
 
 
 @histogram_bp.route('/stretch', methods=['POST'])
-def contrast_stretch():
+@cached_response('histogram.stretch', param_keys=['low_percentile', 'high_percentile'])
+@with_image()
+def contrast_stretch(data, image):
     """
     Perform contrast stretching on an image.
     
@@ -119,32 +103,16 @@ def contrast_stretch():
     Returns:
         Base64 encoded stretched image
     """
-    data = request.get_json()
-    
-    if not data or 'image_id' not in data:
-        return jsonify({'error': 'image_id is required'}), 400
-    
     image_id = data['image_id']
     low_percentile = data.get('low_percentile', 2)
     high_percentile = data.get('high_percentile', 98)
     
-    image_store = get_image_store()
-    
-    if image_id not in image_store:
-        return jsonify({'error': 'Image not found'}), 404
-    
-    image_data = image_store[image_id]
-    image = load_image(image_data['filepath'])
-    
-    if image is None:
-        return jsonify({'error': 'Failed to load image'}), 500
-    
     processor = ImageProcessor(image)
     result = processor.contrast_stretch(low_percentile, high_percentile)
     
-    result_base64 = image_to_base64(result)
+    result_base64 = image_to_base64(result, format='jpeg')
     
-    return jsonify({
+    return json_response({
         'success': True,
         'image_id': image_id,
         'result_image': result_base64
@@ -162,21 +130,20 @@ def get_image_statistics(image_id):
     Returns:
         JSON with image statistics (mean, std, min, max, etc.)
     """
-    image_store = get_image_store()
+    image_data = get_image_store().get(image_id)
     
-    if image_id not in image_store:
-        return jsonify({'error': 'Image not found'}), 404
+    if image_data is None:
+        return json_response({'error': 'Image not found'}, 404)
     
-    image_data = image_store[image_id]
-    image = load_image(image_data['filepath'])
+    image = get_cached_image(image_data['filepath'])
     
     if image is None:
-        return jsonify({'error': 'Failed to load image'}), 500
+        return json_response({'error': 'Failed to load image'}, 500)
     
     processor = ImageProcessor(image)
     statistics = processor.get_statistics()
     
-    return jsonify({
+    return json_response({
         'success': True,
         'image_id': image_id,
         'statistics': statistics
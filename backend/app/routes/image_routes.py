@@ -2,23 +2,25 @@
 Image upload and management routes.
 """
 import os
-import uuid
-from flask import Blueprint, request, jsonify, current_app, send_file
+import re
+import secrets
+from flask import Blueprint, request, current_app, send_file
 from werkzeug.utils import secure_filename
 
 from app.utils.validation import validate_image_file
-from app.utils.image_utils import load_image, save_image, get_image_info
+from app.utils.image_utils import decode_image, get_image_info, save_upload
+from app.utils.responses import json_response
 
 image_bp = Blueprint('images', __name__)
 
-# In-memory storage for image metadata (use database in production)
-image_store = {}
+_EXTENSION_RE = re.compile(r'.*\.([^.]+)\Z', re.DOTALL)
 
 
 def allowed_file(filename):
     """Check if file extension is allowed."""
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
+    match = _EXTENSION_RE.match(filename)
+    return match is not None and \
+           match.group(1).lower() in current_app.config['ALLOWED_EXTENSIONS']
 
 
 @image_bp.route('/upload', methods=['POST'])
@@ -30,49 +32,55 @@ def upload_image():
         JSON with image ID and metadata
     """
     if 'file' not in request.files:
-        return jsonify({'error': 'No file provided'}), 400
+        return json_response({'error': 'No file provided'}, 400)
     
     file = request.files['file']
     
     if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
+        return json_response({'error': 'No file selected'}, 400)
     
     if not allowed_file(file.filename):
-        return jsonify({'error': 'File type not allowed'}), 400
+        return json_response({'error': 'File type not allowed'}, 400)
     
     # Validate image
     is_valid, error_msg = validate_image_file(file)
     if not is_valid:
-        return jsonify({'error': error_msg}), 400
+        return json_response({'error': error_msg}, 400)
     
     # Generate unique ID and save file
-    image_id = str(uuid.uuid4())
+    image_id = secrets.token_hex(16)
     filename = secure_filename(file.filename)
     extension = filename.rsplit('.', 1)[1].lower()
     saved_filename = f"{image_id}.{extension}"
     filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], saved_filename)
     
+    # Decode from memory, so the cache is primed without reading the file back
     file.seek(0)  # Reset file pointer after validation
-    file.save(filepath)
+    data = file.read()
+    image = decode_image(data)
+    if image is None:
+        return json_response({'error': 'Failed to decode image'}, 400)
+    save_upload(filepath, data, image)
     
     # Get image info
-    image_info = get_image_info(filepath)
+    image_info = get_image_info(filepath, image)
     
-    # Store metadata
-    image_store[image_id] = {
+    # Store metadata once the file is in place, so no worker can look up
+    # the id before its file exists
+    get_image_store().put(image_id, {
         'id': image_id,
         'original_filename': filename,
         'filepath': filepath,
         'extension': extension,
         **image_info
-    }
+    })
     
-    return jsonify({
+    return json_response({
         'success': True,
         'image_id': image_id,
         'filename': filename,
         **image_info
-    }), 201
+    }, 201)
 
 
 @image_bp.route('/<image_id>', methods=['GET'])
@@ -86,23 +94,34 @@ def get_image(image_id):
     Returns:
         Image file or error response
     """
-    if image_id not in image_store:
-        return jsonify({'error': 'Image not found'}), 404
+    image_data = get_image_store().get(image_id)
     
-    image_data = image_store[image_id]
+    if image_data is None:
+        return json_response({'error': 'Image not found'}, 404)
     
     # Check if requesting metadata or file
     if request.args.get('metadata') == 'true':
-        return jsonify({
+        return json_response({
             'id': image_data['id'],
             'filename': image_data['original_filename'],
             'width': image_data.get('width'),
             'height': image_data.get('height'),
             'channels': image_data.get('channels'),
-            'format': image_data.get('format')
+            'format': image_data.get('format'),
+            'etag': image_data['id']
         })
     
-    return send_file(image_data['filepath'], mimetype=f"image/{image_data['extension']}")
+    # Uploads are immutable per id, so the id is a strong ETag and repeat
+    # requests revalidate to a bodyless 304
+    response = send_file(
+        image_data['filepath'],
+        mimetype=f"image/{image_data['extension']}",
+        conditional=True,
+        etag=image_data['id'],
+        max_age=3600
+    )
+    response.cache_control.public = True
+    return response
 
 
 @image_bp.route('/<image_id>', methods=['DELETE'])
@@ -116,10 +135,11 @@ def delete_image(image_id):
     Returns:
         Success or error response
     """
-    if image_id not in image_store:
-        return jsonify({'error': 'Image not found'}), 404
+    image_store = get_image_store()
+    image_data = image_store.get(image_id)
     
-    image_data = image_store[image_id]
+    if image_data is None:
+        return json_response({'error': 'Image not found'}, 404)
     
     # Delete file
     try:
@@ -128,9 +148,9 @@ def delete_image(image_id):
         pass  # File might already be deleted
     
     # Remove from store
-    del image_store[image_id]
+    image_store.delete(image_id)
     
-    return jsonify({'success': True, 'message': 'Image deleted'}), 200
+    return json_response({'success': True, 'message': 'Image deleted'}, 200)
 
 
 @image_bp.route('/list', methods=['GET'])
@@ -148,13 +168,13 @@ def list_images():
             'width': data.get('width'),
             'height': data.get('height')
         }
-        for data in image_store.values()
+        for data in get_image_store().list()
     ]
     
-    return jsonify({'images': images, 'count': len(images)})
+    return json_response({'images': images, 'count': len(images)})
 
 
 # Export image store for use by other routes
 def get_image_store():
-    """Get the image store dictionary."""
-    return image_store
+    """Get the application's image metadata store."""
+    return current_app.extensions['image_store']
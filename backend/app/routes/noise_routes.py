@@ -1,15 +1,24 @@
 """
 Noise addition and removal routes.
 """
-from flask import Blueprint, request, jsonify
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from flask import Blueprint, Response, request, stream_with_context
 import numpy as np
 
-from app.routes.image_routes import get_image_store
 from app.models.ImageProcessor import ImageProcessor
-from app.utils.image_utils import load_image, image_to_base64
+from app.utils.image_utils import image_to_base64
+from app.utils.responses import json_dumps, json_response
+from app.utils.route_helpers import with_image
 
 noise_bp = Blueprint('noise', __name__)
 
+# Denoisers for /compare run side by side; OpenCV releases the GIL
+_COMPARE_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 1,
+                                   thread_name_prefix='denoise')
+
 # Available noise types
 NOISE_TYPES = {
     'gaussian': {
@@ -74,6 +83,11 @@ DENOISE_METHODS = {
 }
 
 
+# The listings never change, so their bodies are serialized once at import
+_NOISE_TYPES_JSON = json_dumps({'success': True, 'noise_types': NOISE_TYPES})
+_DENOISE_METHODS_JSON = json_dumps({'success': True, 'denoise_methods': DENOISE_METHODS})
+
+
 @noise_bp.route('/types', methods=['GET'])
 def get_noise_types():
     """
@@ -82,10 +96,7 @@ def get_noise_types():
     Returns:
         JSON with noise types information
     """
-    return jsonify({
-        'success': True,
-        'noise_types': NOISE_TYPES
-    })
+    return Response(_NOISE_TYPES_JSON, mimetype='application/json')
 
 
 @noise_bp.route('/denoise-methods', methods=['GET'])
@@ -96,14 +107,12 @@ def get_denoise_methods():
     Returns:
         JSON with denoising methods information
     """
-    return jsonify({
-        'success': True,
-        'denoise_methods': DENOISE_METHODS
-    })
+    return Response(_DENOISE_METHODS_JSON, mimetype='application/json')
 
 
 @noise_bp.route('/add', methods=['POST'])
-def add_noise():
+@with_image('noise_type')
+def add_noise(data, image):
     """
     Add noise to an image.
     
@@ -115,31 +124,12 @@ def add_noise():
     Returns:
         Base64 encoded noisy image
     """
-    data = request.get_json()
-    
-    if not data or 'image_id' not in data:
-        return jsonify({'error': 'image_id is required'}), 400
-    
-    if 'noise_type' not in data:
-        return jsonify({'error': 'noise_type is required'}), 400
-    
     image_id = data['image_id']
     noise_type = data['noise_type']
     params = data.get('params', {})
     
     if noise_type not in NOISE_TYPES:
-        return jsonify({'error': f'Unknown noise type: {noise_type}'}), 400
-    
-    image_store = get_image_store()
-    
-    if image_id not in image_store:
-        return jsonify({'error': 'Image not found'}), 404
-    
-    image_data = image_store[image_id]
-    image = load_image(image_data['filepath'])
-    
-    if image is None:
-        return jsonify({'error': 'Failed to load image'}), 500
+        return json_response({'error': f'Unknown noise type: {noise_type}'}, 400)
     
     processor = ImageProcessor(image)
     
@@ -150,11 +140,11 @@ def add_noise():
     try:
         result = add_noise_to_image(processor, noise_type, merged_params)
     except Exception as e:
-        return jsonify({'error': f'Noise addition failed: {str(e)}'}), 500
+        return json_response({'error': f'Noise addition failed: {str(e)}'}, 500)
     
     result_base64 = image_to_base64(result)
     
-    return jsonify({
+    return json_response({
         'success': True,
         'image_id': image_id,
         'noise_type': noise_type,
@@ -190,7 +180,8 @@ def add_noise_to_image(processor, noise_type, params):
 
 
 @noise_bp.route('/remove', methods=['POST'])
-def remove_noise():
+@with_image()
+def remove_noise(data, image):
     """
     Remove noise from an image.
     
@@ -202,28 +193,12 @@ def remove_noise():
     Returns:
         Base64 encoded denoised image
     """
-    data = request.get_json()
-    
-    if not data or 'image_id' not in data:
-        return jsonify({'error': 'image_id is required'}), 400
-    
     image_id = data['image_id']
     method = data.get('method', 'median')
     params = data.get('params', {})
     
     if method not in DENOISE_METHODS:
-        return jsonify({'error': f'Unknown denoising method: {method}'}), 400
-    
-    image_store = get_image_store()
-    
-    if image_id not in image_store:
-        return jsonify({'error': 'Image not found'}), 404
-    
-    image_data = image_store[image_id]
-    image = load_image(image_data['filepath'])
-    
-    if image is None:
-        return jsonify({'error': 'Failed to load image'}), 500
+        return json_response({'error': f'Unknown denoising method: {method}'}, 400)
     
     processor = ImageProcessor(image)
     
@@ -234,11 +209,11 @@ def remove_noise():
     try:
         result = denoise_image(processor, method, merged_params)
     except Exception as e:
-        return jsonify({'error': f'Denoising failed: {str(e)}'}), 500
+        return json_response({'error': f'Denoising failed: {str(e)}'}, 500)
     
     result_base64 = image_to_base64(result)
     
-    return jsonify({
+    return json_response({
         'success': True,
         'image_id': image_id,
         'method': method,
@@ -287,7 +262,8 @@ def denoise_image(processor, method, params):
 
 
 @noise_bp.route('/estimate', methods=['POST'])
-def estimate_noise():
+@with_image()
+def estimate_noise(data, image):
     """
     Estimate noise level in an image.
     
@@ -298,33 +274,17 @@ def estimate_noise():
     Returns:
         Estimated noise level
     """
-    data = request.get_json()
-    
-    if not data or 'image_id' not in data:
-        return jsonify({'error': 'image_id is required'}), 400
-    
     image_id = data['image_id']
     method = data.get('method', 'mad')
     
-    image_store = get_image_store()
-    
-    if image_id not in image_store:
-        return jsonify({'error': 'Image not found'}), 404
-    
-    image_data = image_store[image_id]
-    image = load_image(image_data['filepath'])
-    
-    if image is None:
-        return jsonify({'error': 'Failed to load image'}), 500
-    
     processor = ImageProcessor(image)
     
     try:
         noise_level = processor.estimate_noise(method)
     except Exception as e:
-        return jsonify({'error': f'Noise estimation failed: {str(e)}'}), 500
+        return json_response({'error': f'Noise estimation failed: {str(e)}'}, 500)
     
-    return jsonify({
+    return json_response({
         'success': True,
         'image_id': image_id,
         'method': method,
@@ -333,59 +293,137 @@ def estimate_noise():
 
 
 @noise_bp.route('/compare', methods=['POST'])
-def compare_denoising():
+@with_image()
+def compare_denoising(data, image):
     """
     Compare multiple denoising methods on an image.
     
     Request JSON:
         - image_id: Image identifier
         - methods: List of methods to compare (optional, defaults to all)
+        - mosaic: Return one tiled image plus per-method tile rectangles
+          instead of one image per method (default False)
+        - stream: Send each result as a server-sent event as soon as it is
+          ready (default False; also chosen by ``Accept: text/event-stream``)
     
     Returns:
-        Base64 encoded results for each method with quality metrics
+        Base64 encoded results for each method with quality metrics, or a
+        ``text/event-stream`` of per-method results ending in a ``done`` event
     """
-    data = request.get_json()
-    
-    if not data or 'image_id' not in data:
-        return jsonify({'error': 'image_id is required'}), 400
-    
     image_id = data['image_id']
     methods = data.get('methods', list(DENOISE_METHODS.keys()))
+    mosaic = bool(data.get('mosaic', False))
+    stream = (bool(data.get('stream', False)) or
+              request.accept_mimetypes.best == 'text/event-stream')
     
-    image_store = get_image_store()
-    
-    if image_id not in image_store:
-        return jsonify({'error': 'Image not found'}), 404
-    
-    image_data = image_store[image_id]
-    image = load_image(image_data['filepath'])
-    
-    if image is None:
-        return jsonify({'error': 'Failed to load image'}), 500
-    
-    results = {}
-    
-    for method in methods:
-        if method not in DENOISE_METHODS:
-            continue
-        
-        try:
-            processor = ImageProcessor(image.copy())
-            defaults = DENOISE_METHODS[method]['defaults']
-            result = denoise_image(processor, method, defaults)
-            
-            results[method] = {
-                'name': DENOISE_METHODS[method]['name'],
-                'result_image': image_to_base64(result)
-            }
-        except Exception as e:
-            results[method] = {
-                'name': DENOISE_METHODS[method]['name'],
-                'error': str(e)
-            }
-    
-    return jsonify({
+    methods = [method for method in dict.fromkeys(methods) if method in DENOISE_METHODS]
+    
+    # Processors only read their input, so every method shares the image
+    futures = {
+        _COMPARE_POOL.submit(_compare_one, image, method, stream or not mosaic): method
+        for method in methods
+    }
+    
+    if stream:
+        response = Response(
+            stream_with_context(_stream_compare(image_id, futures)),
+            mimetype='text/event-stream'
+        )
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'  # Keep proxies from buffering events
+        return response
+    
+    completed = {}
+    for future in as_completed(futures):
+        completed[futures[future]] = future.result()
+    results = {method: completed[method][0] for method in methods}
+    
+    response = {
         'success': True,
         'image_id': image_id,
         'results': results
-    })
+    }
+    
+    if mosaic:
+        # One PNG encode and one base64 pass regardless of the method count
+        tiles = [(method, completed[method][1]) for method in methods
+                 if completed[method][1] is not None]
+        if tiles:
+            mosaic_image, layout = _build_mosaic(tiles)
+            response['mosaic_image'] = image_to_base64(mosaic_image, format='png')
+            response['layout'] = layout
+    
+    return json_response(response)
+
+
+def _stream_compare(image_id, futures):
+    """
+    Yield /compare results as server-sent events in completion order.
+    
+    Args:
+        image_id: Image identifier echoed in the final event
+        futures: Mapping of pending ``_compare_one`` futures to methods
+    
+    Yields:
+        One ``data:`` event per method, then a ``done`` event
+    """
+    for future in as_completed(futures):
+        entry, _ = future.result()
+        payload = json_dumps({'method': futures[future], **entry}).decode()
+        yield f'data: {payload}\n\n'
+    yield f'event: done\ndata: {json_dumps({"success": True, "image_id": image_id}).decode()}\n\n'
+
+
+def _compare_one(image, method, encode=True):
+    """
+    Denoise one /compare entry.
+    
+    Args:
+        image: Input image, shared read-only between methods
+        method: Denoising method
+        encode: Whether to add the base64 result to the entry
+    
+    Returns:
+        Tuple of (result entry, denoised image or None on error)
+    """
+    try:
+        defaults = DENOISE_METHODS[method]['defaults']
+        result = denoise_image(ImageProcessor(image), method, defaults)
+    except Exception as e:
+        return {
+            'name': DENOISE_METHODS[method]['name'],
+            'error': str(e)
+        }, None
+    
+    entry = {'name': DENOISE_METHODS[method]['name']}
+    if encode:
+        entry['result_image'] = image_to_base64(result)
+    return entry, result
+
+
+def _build_mosaic(tiles):
+    """
+    Tile images into a near-square grid.
+    
+    Args:
+        tiles: List of (method, image) pairs in display order
+    
+    Returns:
+        Tuple of (mosaic image, {method: {x, y, width, height}})
+    """
+    columns = math.ceil(math.sqrt(len(tiles)))
+    rows = math.ceil(len(tiles) / columns)
+    cell_height = max(tile.shape[0] for _, tile in tiles)
+    cell_width = max(tile.shape[1] for _, tile in tiles)
+    
+    mosaic = np.zeros((rows * cell_height, columns * cell_width) + tiles[0][1].shape[2:],
+                      dtype=tiles[0][1].dtype)
+    layout = {}
+    for index, (method, tile) in enumerate(tiles):
+        y = (index // columns) * cell_height
+        x = (index % columns) * cell_width
+        height, width = tile.shape[:2]
+        mosaic[y:y + height, x:x + width] = tile
+        layout[method] = {'x': x, 'y': y, 'width': width, 'height': height}
+    
+    return mosaic, layout
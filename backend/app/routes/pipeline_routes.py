@@ -0,0 +1,195 @@
+"""
+Pipeline route: run several operations on an image in one request.
+"""
+from flask import Blueprint, request
+import orjson
+
+from app.models import filters
+from app.models.ImageProcessor import ImageProcessor
+from app.routes.filter_routes import AVAILABLE_FILTERS, apply_filter_to_image
+from app.routes.image_routes import get_image_store
+from app.routes.noise_routes import (
+    DENOISE_METHODS, NOISE_TYPES, add_noise_to_image, denoise_image
+)
+from app.utils.image_utils import (
+    base64_to_image, decode_image, get_cached_image, image_to_base64
+)
+from app.utils.responses import json_response
+from app.utils.validation import validate_image_file
+
+pipeline_bp = Blueprint('pipeline', __name__)
+
+_MAX_STEPS = 16
+
+
+def _equalize(image, step):
+    method = step.get('method', 'global')
+    if method == 'clahe':
+        tile_size = step.get('tile_size', 8)
+        return filters.clahe_equalization(image, step.get('clip_limit', 2.0),
+                                          (tile_size, tile_size))
+    if method == 'adaptive':
+        return filters.clahe_equalization(image)
+    return filters.histogram_equalization(image)
+
+
+def _add_noise(image, step):
+    noise_type = step['noise_type']
+    params = {**NOISE_TYPES[noise_type]['defaults'], **step.get('params', {})}
+    return add_noise_to_image(ImageProcessor(image), noise_type, params)
+
+
+def _denoise(image, step):
+    method = step.get('method', 'median')
+    params = {**DENOISE_METHODS[method]['defaults'], **step.get('params', {})}
+    return denoise_image(ImageProcessor(image), method, params)
+
+
+def _is_choice(value, choices):
+    """Whether a JSON value names one of ``choices``; lists and objects never do."""
+    return isinstance(value, str) and value in choices
+
+
+# Operation -> (validate(step) -> error message or None, apply(image, step)).
+# Steps take the same fields as the request bodies of the single-operation
+# routes, plus ``op``.
+_PIPELINE_OPS = {
+    'filter': (
+        lambda s: None if _is_choice(s.get('filter_type'), AVAILABLE_FILTERS)
+        else f"Unknown filter type: {s.get('filter_type')}",
+        lambda img, s: apply_filter_to_image(img, s['filter_type'], s.get('params', {})),
+    ),
+    'equalize': (
+        lambda s: None,
+        _equalize,
+    ),
+    'stretch': (
+        lambda s: None,
+        lambda img, s: ImageProcessor(img).contrast_stretch(
+            s.get('low_percentile', 2), s.get('high_percentile', 98)
+        ),
+    ),
+    'add_noise': (
+        lambda s: None if _is_choice(s.get('noise_type'), NOISE_TYPES)
+        else f"Unknown noise type: {s.get('noise_type')}",
+        _add_noise,
+    ),
+    'denoise': (
+        lambda s: None if _is_choice(s.get('method', 'median'), DENOISE_METHODS)
+        else f"Unknown denoising method: {s.get('method')}",
+        _denoise,
+    ),
+}
+
+
+def _validate_steps(steps):
+    """Return an error message for a malformed step list, or None."""
+    if not isinstance(steps, list) or not steps:
+        return 'ops must be a non-empty list'
+    if len(steps) > _MAX_STEPS:
+        return f'At most {_MAX_STEPS} ops are allowed'
+    for index, step in enumerate(steps):
+        if not isinstance(step, dict) or not _is_choice(step.get('op'), _PIPELINE_OPS):
+            op = step.get('op') if isinstance(step, dict) else step
+            return f'Unknown op at step {index}: {op}'
+        if not isinstance(step.get('params', {}), dict):
+            return f'Step {index}: params must be an object'
+        error = _PIPELINE_OPS[step['op']][0](step)
+        if error:
+            return f'Step {index}: {error}'
+    return None
+
+
+def _load_source():
+    """
+    Read the image and steps from the request.
+
+    Returns:
+        (image, steps, error response); image and steps are None on error
+    """
+    if request.files:
+        file = request.files.get('file')
+        is_valid, error_msg = validate_image_file(file)
+        if not is_valid:
+            return None, None, json_response({'error': error_msg}, 400)
+        try:
+            steps = orjson.loads(request.form.get('ops', ''))
+        except orjson.JSONDecodeError:
+            return None, None, json_response({'error': 'ops must be a JSON list'}, 400)
+        image = decode_image(file.read())
+        if image is None:
+            return None, None, json_response({'error': 'Failed to decode image'}, 400)
+    else:
+        try:
+            data = orjson.loads(request.get_data())
+        except orjson.JSONDecodeError:
+            data = None
+        if not isinstance(data, dict):
+            return None, None, json_response({'error': 'JSON body is required'}, 400)
+        steps = data.get('ops')
+        if 'image_id' in data:
+            image_data = get_image_store().get(data['image_id'])
+            if image_data is None:
+                return None, None, json_response({'error': 'Image not found'}, 404)
+            image = get_cached_image(image_data['filepath'])
+        elif 'image' in data:
+            image = base64_to_image(data['image'])
+            if image is None:
+                return None, None, json_response({'error': 'Invalid image data'}, 400)
+        else:
+            return None, None, json_response({'error': 'image_id or image is required'}, 400)
+
+    if image is None:
+        return None, None, json_response({'error': 'Failed to load image'}, 500)
+    return image, steps, None
+
+
+@pipeline_bp.route('', methods=['POST'])
+def run_pipeline():
+    """
+    Apply a sequence of operations to an image and return only the result.
+
+    Saves a round trip per operation: an image can be sent, processed by
+    several steps and returned without an upload request or intermediate
+    encodes.
+
+    Request (JSON):
+        - image_id: Stored image identifier, or
+        - image: Base64 encoded image (data URL prefix optional)
+        - ops: List of steps, each ``{"op": ..., ...}`` with the fields of
+          the matching single-operation request: ``filter`` (filter_type,
+          params), ``equalize`` (method, clip_limit, tile_size), ``stretch``
+          (low_percentile, high_percentile), ``add_noise`` (noise_type,
+          params) or ``denoise`` (method, params)
+
+    Request (multipart/form-data):
+        - file: Image file
+        - ops: The step list as a JSON string
+
+    Returns:
+        Base64 encoded result of the last step
+    """
+    image, steps, error = _load_source()
+    if error is not None:
+        return error
+
+    message = _validate_steps(steps)
+    if message:
+        return json_response({'error': message}, 400)
+
+    result = image
+    for index, step in enumerate(steps):
+        try:
+            result = _PIPELINE_OPS[step['op']][1](result, step)
+        except Exception as e:
+            return json_response(
+                {'error': f"Step {index} ({step['op']}) failed: {str(e)}"}, 500
+            )
+
+    return json_response({
+        'success': True,
+        'ops': [step['op'] for step in steps],
+        'width': int(result.shape[1]),
+        'height': int(result.shape[0]),
+        'result_image': image_to_base64(result)
+    })
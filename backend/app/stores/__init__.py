@@ -0,0 +1,6 @@
+"""
+Stores package initialization.
+"""
+from .image_store import MetadataStore, SQLiteMetadataStore
+
+__all__ = ['MetadataStore', 'SQLiteMetadataStore']
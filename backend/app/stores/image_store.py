@@ -0,0 +1,131 @@
+"""
+Image metadata stores shared between worker processes.
+"""
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+
+class MetadataStore(ABC):
+    """
+    Interface for image metadata storage.
+
+    Metadata is a JSON-serializable dict per image id. Implementations must
+    be safe to share between threads, and between processes when several
+    workers serve the same upload folder.
+    """
+
+    @abstractmethod
+    def get(self, image_id: str) -> Optional[Dict[str, Any]]:
+        """Return the metadata for an image, or None if unknown."""
+
+    @abstractmethod
+    def put(self, image_id: str, metadata: Dict[str, Any]) -> None:
+        """Insert or replace the metadata for an image."""
+
+    @abstractmethod
+    def delete(self, image_id: str) -> bool:
+        """Remove an image; returns False if it was not stored."""
+
+    @abstractmethod
+    def list(self) -> List[Dict[str, Any]]:
+        """Return the metadata of every stored image."""
+
+    def __contains__(self, image_id: str) -> bool:
+        return self.get(image_id) is not None
+
+
+class SQLiteMetadataStore(MetadataStore):
+    """
+    Metadata store backed by a SQLite database in WAL mode.
+
+    Every worker opens the same file, so an upload handled by one process
+    is visible to the others; WAL lets readers proceed while a writer
+    commits. Connections must not cross ``fork()``, so each process opens
+    its own on first use and shares it between its threads under an RLock.
+    A store inherited across ``fork()`` is therefore safe to keep using.
+    """
+
+    def __init__(self, path: str):
+        """
+        Create the metadata database if needed.
+
+        The schema is set up on a connection that is closed again, so the
+        creating process holds no connection a forked child could inherit.
+
+        Args:
+            path: Database file path
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = None
+        self._pid = None
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS images (id TEXT PRIMARY KEY, data BLOB NOT NULL)'
+            )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new autocommit connection to the database."""
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False,
+                               isolation_level=None)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        """This process's connection, opened on first use; call under the lock."""
+        pid = os.getpid()
+        if self._pid != pid:
+            # Inherited from the parent: abandon it without closing, since
+            # closing would touch the parent's database handle
+            self._conn = self._connect()
+            self._pid = pid
+        return self._conn
+
+    def get(self, image_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT data FROM images WHERE id = ?', (image_id,)
+            ).fetchone()
+        return orjson.loads(row[0]) if row else None
+
+    def put(self, image_id: str, metadata: Dict[str, Any]) -> None:
+        with self._lock:
+            self._connection().execute(
+                'INSERT OR REPLACE INTO images (id, data) VALUES (?, ?)',
+                (image_id, orjson.dumps(metadata))
+            )
+
+    def delete(self, image_id: str) -> bool:
+        with self._lock:
+            cursor = self._connection().execute(
+                'DELETE FROM images WHERE id = ?', (image_id,)
+            )
+        return cursor.rowcount > 0
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._connection().execute(
+                'SELECT data FROM images ORDER BY rowid'
+            ).fetchall()
+        return [orjson.loads(row[0]) for row in rows]
+
+    def close(self) -> None:
+        """Close this process's connection, if it has opened one."""
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+            self._pid = None
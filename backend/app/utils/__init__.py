@@ -3,6 +3,8 @@ Utils package initialization.
 """
 from .image_utils import (
     load_image,
+    get_cached_image,
+    get_cached_fft,
     save_image,
     image_to_base64,
     base64_to_image,
@@ -38,6 +40,8 @@ from .converters import (
 __all__ = [
     # Image utils
     'load_image',
+    'get_cached_image',
+    'get_cached_fft',
     'save_image',
     'image_to_base64',
     'base64_to_image',
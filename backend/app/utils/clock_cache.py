@@ -0,0 +1,267 @@
+"""
+Scan-resistant cache with per-entry reference bits.
+"""
+import queue
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable, Optional
+
+
+class _Entry:
+    """Cached value with its weight, reference bit and queue."""
+    __slots__ = ('value', 'weight', 'referenced', 'in_main')
+
+    def __init__(self, value: Any, weight: int, in_main: bool):
+        self.value = value
+        self.weight = weight
+        self.referenced = False
+        self.in_main = in_main
+
+
+class ClockProCache:
+    """
+    Bounded, scan-resistant cache with S3-FIFO style eviction.
+
+    New keys enter a small probation FIFO. Keys evicted from it unreferenced
+    are dropped (and remembered as ghosts), while referenced ones move to the
+    main queue, which is swept with the CLOCK (second chance) policy. A scan
+    of one-off keys therefore only churns the probation queue. A ghost key
+    that comes back goes straight to the main queue.
+
+    A hit only sets the entry's reference bit, so readers never relink a
+    shared list or take the eviction lock. The index is split into shards,
+    each with its own lock for inserts and removals.
+
+    With ``background_eviction`` an insert only links the new entry and
+    signals a daemon thread, which evicts down to the limits shortly after;
+    the inserting request no longer pays for sweeping the queues. The
+    limits may then be exceeded briefly, and an insert still evicts inline
+    once the cache is twice over them.
+
+    Args:
+        max_entries: Maximum number of entries
+        max_weight: Maximum total weight of all entries
+        weigher: Weight of a value, e.g. its size in bytes
+        shards: Number of index shards
+        background_eviction: Evict on a background thread instead of
+            in ``insert``
+    """
+
+    def __init__(self, max_entries: int, max_weight: float = float('inf'),
+                 weigher: Callable[[Any], int] = lambda value: 1, shards: int = 16,
+                 background_eviction: bool = False):
+        self.max_entries = max_entries
+        self.max_weight = max_weight
+        self._weigher = weigher
+        self._shards = [{} for _ in range(shards)]
+        self._shard_locks = [threading.RLock() for _ in range(shards)]
+        # Probation and main queues, plus keys recently dropped from probation
+        self._small = deque()
+        self._main = deque()
+        self._ghosts = OrderedDict()
+        self._small_target = max(1, max_entries // 10)
+        self._weight = 0
+        self._queue_lock = threading.Lock()
+        # Loads in progress, so concurrent misses for a key share one load
+        self._loading = {}
+        self._loading_lock = threading.Lock()
+        # Eviction requests from inserts, drained by the evictor thread
+        self._background = background_eviction
+        self._evictions = queue.SimpleQueue()
+        self._evictor = None
+        self._evictor_lock = threading.Lock()
+
+    def _shard(self, key: Hashable) -> int:
+        return hash(key) % len(self._shards)
+
+    def __len__(self) -> int:
+        return len(self._small) + len(self._main)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._shards[self._shard(key)]
+
+    @property
+    def weight(self) -> int:
+        """Total weight of the cached entries."""
+        return self._weight
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a value, marking it recently used.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value or None
+        """
+        # A single dict read is atomic, so hits take no lock at all
+        entry = self._shards[self._shard(key)].get(key)
+        if entry is None:
+            return None
+        entry.referenced = True
+        return entry.value
+
+    def insert(self, key: Hashable, value: Any) -> None:
+        """
+        Add or replace a value, evicting entries to stay within both limits.
+
+        Values heavier than ``max_weight`` are not cached.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        weight = self._weigher(value)
+        if weight > self.max_weight:
+            return
+        with self._queue_lock:
+            old = self._remove(key)
+            if old is not None:
+                (self._main if old.in_main else self._small).remove(key)
+            if self._background:
+                # Only when the evictor has fallen far behind
+                if (len(self) >= 2 * self.max_entries or
+                        self._weight + weight > 2 * self.max_weight):
+                    self._evict(weight)
+            else:
+                self._evict(weight)
+            # Replaced entries and returning ghosts have proven reuse
+            in_main = old is not None or key in self._ghosts
+            self._ghosts.pop(key, None)
+            index = self._shard(key)
+            with self._shard_locks[index]:
+                self._shards[index][key] = _Entry(value, weight, in_main)
+            (self._main if in_main else self._small).append(key)
+            self._weight += weight
+        if self._background:
+            self._request_eviction(None)
+
+    def _request_eviction(self, done: Optional[threading.Event]) -> None:
+        """Wake the evictor thread, starting it in this process if needed."""
+        if self._evictor is None or not self._evictor.is_alive():
+            with self._evictor_lock:
+                # Threads do not survive a fork, so workers start their own
+                if self._evictor is None or not self._evictor.is_alive():
+                    self._evictor = threading.Thread(target=self._evict_loop,
+                                                     name='cache-evictor', daemon=True)
+                    self._evictor.start()
+        self._evictions.put(done)
+
+    def _evict_loop(self) -> None:
+        """Evict down to the limits whenever inserts ask for it."""
+        while True:
+            requests = [self._evictions.get()]
+            # One sweep covers every insert queued meanwhile
+            while True:
+                try:
+                    requests.append(self._evictions.get_nowait())
+                except queue.Empty:
+                    break
+            with self._queue_lock:
+                self._evict(0, room=0)
+            for done in requests:
+                if done is not None:
+                    done.set()
+
+    def flush(self) -> None:
+        """Wait until pending background evictions have run."""
+        if self._background:
+            done = threading.Event()
+            self._request_eviction(done)
+            done.wait()
+
+    def _remove(self, key: Hashable) -> Optional[_Entry]:
+        """Drop a key from the index. Caller holds the queue lock."""
+        index = self._shard(key)
+        with self._shard_locks[index]:
+            entry = self._shards[index].pop(key, None)
+        if entry is not None:
+            self._weight -= entry.weight
+        return entry
+
+    def _evict(self, incoming: int, room: int = 1) -> None:
+        """
+        Evict until ``incoming`` weight and ``room`` more entries fit.
+        Caller holds the queue lock.
+        """
+        small, main = self._small, self._main
+        while (small or main) and (len(small) + len(main) + room > self.max_entries or
+                                   self._weight + incoming > self.max_weight):
+            if small and (len(small) > self._small_target or not main):
+                key = small.popleft()
+                entry = self._shards[self._shard(key)][key]
+                if entry.referenced:
+                    entry.referenced = False
+                    entry.in_main = True
+                    main.append(key)
+                    continue
+                self._remove(key)
+                self._ghosts[key] = None
+                while len(self._ghosts) > self.max_entries:
+                    self._ghosts.popitem(last=False)
+            else:
+                key = main.popleft()
+                entry = self._shards[self._shard(key)][key]
+                if entry.referenced:
+                    # Second chance: clear the bit and go round again
+                    entry.referenced = False
+                    main.append(key)
+                    continue
+                self._remove(key)
+
+    def get_or_insert(self, key: Hashable, loader: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """
+        Return the cached value, loading it once on a miss.
+
+        Concurrent callers missing on the same key wait for the first
+        caller's load instead of each running ``loader``. A None result
+        is returned to every waiter but not cached.
+
+        Args:
+            key: Cache key
+            loader: Called without arguments to produce the value
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._loading_lock:
+            future = self._loading.get(key)
+            owner = future is None
+            if owner:
+                # The previous load may have finished since the lookup
+                value = self.get(key)
+                if value is not None:
+                    return value
+                future = self._loading[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            value = loader()
+            if value is not None:
+                self.insert(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._loading_lock:
+                del self._loading[key]
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._queue_lock:
+            for index, shard in enumerate(self._shards):
+                with self._shard_locks[index]:
+                    shard.clear()
+            self._small.clear()
+            self._main.clear()
+            self._ghosts.clear()
+            self._weight = 0
@@ -3,16 +3,33 @@ Data converters and format utilities.
 """
 import numpy as np
 import cv2
-import base64
-import io
-from typing import Dict, Any, List, Optional
-from PIL import Image
+import orjson
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.utils.image_utils import PNG_RESPONSE_PARAMS, decode_image
+from app.utils.responses import json_dumps
+
+
+# Rows (1, bin) of an 8-bit histogram: one product gives count and weighted sum
+_MOMENTS = np.stack([np.ones(256), np.arange(256)])
+
+# Bin labels shared by every histogram_to_dict result; treat as read-only
+_BINS_LIST = list(range(256))
+
+# Element types OpenCV's arithmetic and normalize handle natively
+_CV_NORMALIZE_DTYPES = frozenset(np.dtype(t) for t in (
+    np.uint8, np.int8, np.uint16, np.int16, np.int32, np.float32, np.float64
+))
 
 
 def numpy_to_list(arr: np.ndarray) -> List:
     """
     Convert numpy array to Python list for JSON serialization.
     
+    Only needed for consumers other than ``json_response``, which serializes
+    arrays directly; the list costs a Python object per element.
+    
     Args:
         arr: Numpy array
     
@@ -47,32 +64,34 @@ def image_to_bytes(image: np.ndarray, format: str = 'PNG') -> bytes:
     Returns:
         Image as bytes
     """
-    # Handle grayscale images
-    if len(image.shape) == 2:
-        pil_image = Image.fromarray(image, mode='L')
-    else:
-        # Convert BGR to RGB
-        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        pil_image = Image.fromarray(rgb_image)
+    # imencode takes BGR and grayscale directly, with no RGB copy or PIL image
+    extension = '.' + format.lower()
+    params = []
+    if extension == '.png':
+        params = PNG_RESPONSE_PARAMS
+    elif extension in ('.jpg', '.jpeg'):
+        params = [cv2.IMWRITE_JPEG_QUALITY, 85]
     
-    buffer = io.BytesIO()
-    pil_image.save(buffer, format=format)
-    return buffer.getvalue()
+    ok, buffer = cv2.imencode(extension, image, params)
+    if not ok:
+        raise ValueError(f'Failed to encode image as {format}')
+    return buffer.tobytes()
 
 
-def bytes_to_image(data: bytes) -> Optional[np.ndarray]:
+def bytes_to_image(data: bytes, max_dim: Optional[int] = None) -> Optional[np.ndarray]:
     """
     Convert bytes to numpy image.
     
     Args:
         data: Image bytes
+        max_dim: Optional maximum width or height; oversized JPEGs are
+            decoded at reduced scale before the final resize
     
     Returns:
         Image as numpy array
     """
     try:
-        nparr = np.frombuffer(data, np.uint8)
-        return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        return decode_image(data, max_dim)
     except Exception:
         return None
 
@@ -87,16 +106,23 @@ def histogram_to_dict(histogram: np.ndarray,
         channel_name: Name of the channel
     
     Returns:
-        Dictionary with histogram data
+        Dictionary with histogram data; ``bins`` is a shared list and must
+        not be modified
     """
+    values = histogram.ravel()
+    occupied = np.flatnonzero(values)
+    # Both moments in one pass, converted to Python floats together
+    total, weighted = (_MOMENTS @ values).tolist()
+    
+    # An empty histogram reports zeros instead of failing
     return {
         'channel': channel_name,
-        'values': histogram.flatten().tolist(),
-        'bins': list(range(256)),
-        'min': int(np.argmax(histogram > 0)),
-        'max': int(255 - np.argmax(histogram[::-1] > 0)),
-        'peak': int(np.argmax(histogram)),
-        'mean': float(np.average(range(256), weights=histogram.flatten()))
+        'values': values.tolist(),
+        'bins': _BINS_LIST,
+        'min': int(occupied[0]) if occupied.size else 0,
+        'max': int(occupied[-1]) if occupied.size else 0,
+        'peak': int(values.argmax()),
+        'mean': weighted / total if total else 0.0
     }
 
 
@@ -117,34 +143,80 @@ def statistics_to_dict(image: np.ndarray) -> Dict[str, Any]:
     }
     
     if len(image.shape) == 2:
-        # Grayscale
-        stats['channels'] = {
-            'gray': {
-                'min': int(np.min(image)),
-                'max': int(np.max(image)),
-                'mean': float(np.mean(image)),
-                'std': float(np.std(image)),
-                'median': float(np.median(image))
-            }
-        }
+        channel_names = ['gray']
+        flat = image.reshape(-1, 1)
     else:
         # Color (BGR)
         channel_names = ['blue', 'green', 'red']
-        stats['channels'] = {}
-        
-        for i, name in enumerate(channel_names):
-            channel = image[:, :, i]
-            stats['channels'][name] = {
-                'min': int(np.min(channel)),
-                'max': int(np.max(channel)),
-                'mean': float(np.mean(channel)),
-                'std': float(np.std(channel)),
-                'median': float(np.median(channel))
-            }
+        flat = image.reshape(-1, image.shape[-1])
+    
+    # One reduction per statistic covers every channel at once
+    mins = flat.min(axis=0)
+    maxs = flat.max(axis=0)
+    means = flat.mean(axis=0)
+    stds = np.sqrt(flat.var(axis=0))
+    medians = np.median(flat, axis=0)
+    
+    stats['channels'] = {
+        name: {
+            'min': int(mins[i]),
+            'max': int(maxs[i]),
+            'mean': float(means[i]),
+            'std': float(stds[i]),
+            'median': float(medians[i])
+        }
+        for i, name in enumerate(channel_names)
+    }
     
     return stats
 
 
+# Direct cv2.cvtColor codes between the supported color spaces
+_COLOR_CONVERSIONS = {
+    ('bgr', 'rgb'): cv2.COLOR_BGR2RGB,
+    ('rgb', 'bgr'): cv2.COLOR_RGB2BGR,
+    ('bgr', 'gray'): cv2.COLOR_BGR2GRAY,
+    ('rgb', 'gray'): cv2.COLOR_RGB2GRAY,
+    ('bgr', 'hsv'): cv2.COLOR_BGR2HSV,
+    ('hsv', 'bgr'): cv2.COLOR_HSV2BGR,
+    ('bgr', 'lab'): cv2.COLOR_BGR2LAB,
+    ('lab', 'bgr'): cv2.COLOR_LAB2BGR,
+    ('rgb', 'hsv'): cv2.COLOR_RGB2HSV,
+    ('hsv', 'rgb'): cv2.COLOR_HSV2RGB,
+}
+
+
+def _build_color_plans(conversions: Dict[Tuple[str, str], int]) -> Dict[Tuple[str, str], Tuple[int, ...]]:
+    """Shortest cvtColor code sequence for every reachable (source, target) pair."""
+    graph: Dict[str, List[Tuple[str, int]]] = {}
+    for (src, dst), code in conversions.items():
+        graph.setdefault(src, []).append((dst, code))
+        graph.setdefault(dst, [])
+    
+    plans = {}
+    for source in graph:
+        # Breadth-first search yields the fewest conversions
+        paths = {source: ()}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            for dst, code in graph[node]:
+                if dst not in paths:
+                    paths[dst] = paths[node] + (code,)
+                    queue.append(dst)
+        for target, path in paths.items():
+            plans[(source, target)] = path
+    return plans
+
+
+_COLOR_PLANS = _build_color_plans(_COLOR_CONVERSIONS)
+
+# Conversions that keep three channels and can overwrite their input
+_IN_PLACE_CODES = frozenset(
+    code for (src, dst), code in _COLOR_CONVERSIONS.items() if 'gray' not in (src, dst)
+)
+
+
 def color_space_convert(image: np.ndarray, 
                        source: str, target: str) -> np.ndarray:
     """
@@ -156,37 +228,17 @@ def color_space_convert(image: np.ndarray,
         target: Target color space
     
     Returns:
-        Converted image
-    """
-    # Conversion map
-    conversions = {
-        ('bgr', 'rgb'): cv2.COLOR_BGR2RGB,
-        ('rgb', 'bgr'): cv2.COLOR_RGB2BGR,
-        ('bgr', 'gray'): cv2.COLOR_BGR2GRAY,
-        ('rgb', 'gray'): cv2.COLOR_RGB2GRAY,
-        ('bgr', 'hsv'): cv2.COLOR_BGR2HSV,
-        ('hsv', 'bgr'): cv2.COLOR_HSV2BGR,
-        ('bgr', 'lab'): cv2.COLOR_BGR2LAB,
-        ('lab', 'bgr'): cv2.COLOR_LAB2BGR,
-        ('rgb', 'hsv'): cv2.COLOR_RGB2HSV,
-        ('hsv', 'rgb'): cv2.COLOR_HSV2RGB,
-    }
-    
-    key = (source.lower(), target.lower())
-    
-    if key in conversions:
-        return cv2.cvtColor(image, conversions[key])
-    
-    # If direct conversion not found, try via BGR
-    if source.lower() != 'bgr' and target.lower() != 'bgr':
-        # Convert to BGR first
-        to_bgr = (source.lower(), 'bgr')
-        from_bgr = ('bgr', target.lower())
-        
-        if to_bgr in conversions and from_bgr in conversions:
-            intermediate = cv2.cvtColor(image, conversions[to_bgr])
-            return cv2.cvtColor(intermediate, conversions[from_bgr])
+        Converted image; unchanged if no conversion path exists
+    """
+    plan = _COLOR_PLANS.get((source, target))
+    if plan is None:
+        plan = _COLOR_PLANS.get((source.lower(), target.lower()), ())
     
+    for step, code in enumerate(plan):
+        # After the first step the intermediate is ours, so three-channel
+        # conversions reuse its buffer instead of allocating another
+        dst = image if step and code in _IN_PLACE_CODES else None
+        image = cv2.cvtColor(image, code, dst=dst)
     return image
 
 
@@ -203,6 +255,13 @@ def normalize_image(image: np.ndarray,
     Returns:
         Normalized image
     """
+    if image.dtype in _CV_NORMALIZE_DTYPES:
+        # Min/max search and the affine rescale in one native call; constant
+        # images map to min_val like the NumPy path. OpenCV drops a trailing
+        # single-channel axis, so restore the input shape
+        normalized = cv2.normalize(image, None, min_val, max_val, cv2.NORM_MINMAX)
+        return normalized.reshape(image.shape)
+    
     img_min = np.min(image)
     img_max = np.max(image)
     
@@ -221,8 +280,20 @@ def clip_image(image: np.ndarray) -> np.ndarray:
         image: Input image
     
     Returns:
-        Clipped image as uint8
+        Clipped image as uint8; uint8 input is returned unchanged
     """
+    if image.dtype == np.uint8:
+        return image
+    if image.dtype in _CV_NORMALIZE_DTYPES and (
+            image.ndim == 2 or (image.ndim == 3 and image.shape[2] == 3)):
+        # Saturating conversion in one pass (rounds to nearest). Unlike
+        # convertScaleAbs it maps negatives to 0 rather than |x|. Other
+        # shapes go through NumPy: OpenCV reads a short 1-D array as a
+        # scalar and drops a trailing single-channel axis
+        try:
+            return cv2.add(image, 0, dtype=cv2.CV_8U)
+        except cv2.error:
+            pass
     return np.clip(image, 0, 255).astype(np.uint8)
 
 
@@ -230,21 +301,14 @@ def encode_json_safe(data: Any) -> Any:
     """
     Make data JSON serializable.
     
+    Round-trips through orjson, which handles NumPy arrays and scalars in C
+    instead of walking the structure in Python. Routes should pass NumPy
+    data straight to ``json_response`` rather than converting it first.
+    
     Args:
         data: Input data (may contain numpy types)
     
     Returns:
         JSON-safe data
     """
-    if isinstance(data, np.ndarray):
-        return data.tolist()
-    elif isinstance(data, np.integer):
-        return int(data)
-    elif isinstance(data, np.floating):
-        return float(data)
-    elif isinstance(data, dict):
-        return {k: encode_json_safe(v) for k, v in data.items()}
-    elif isinstance(data, (list, tuple)):
-        return [encode_json_safe(item) for item in data]
-    else:
-        return data
+    return orjson.loads(json_dumps(data))
@@ -0,0 +1,160 @@
+"""
+Batched JPEG decoding on the GPU with nvJPEG.
+
+Concurrent requests that decode JPEGs within a short window are coalesced
+into one ``torchvision.io.decode_jpeg`` call on the CUDA device, which
+amortizes the kernel launches across the batch. Lone requests are left to
+the CPU decoders, where a GPU round trip does not pay off.
+
+Decoding here is off until ``enable`` is called (see ``GPU_JPEG_DECODE``)
+and stays off when torchvision or a CUDA device is missing.
+"""
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+
+import numpy as np
+
+_BATCH_WINDOW = 0.002  # Seconds a batch stays open for more requests
+_MAX_BATCH = 32
+
+_batcher = None
+
+
+class JpegBatcher:
+    """
+    Coalesce concurrent decodes into batches.
+
+    A caller only joins a batch when another decode is already in flight
+    (on either path), so isolated requests go straight to the CPU. The
+    first caller to open a batch leads it: it waits ``window`` seconds for
+    others to join, then decodes everything collected in one call and hands
+    each follower its result. Batches smaller than ``min_batch``, and
+    failed batches, fall back to the CPU decoder for every caller.
+
+    Args:
+        decode_batch: Decodes a list of JPEG byte strings into BGR arrays
+        window: Seconds the leader waits for the batch to fill
+        min_batch: Smallest batch worth decoding together
+        max_batch: Largest batch; later callers start a new one
+    """
+
+    def __init__(self, decode_batch: Callable[[List[bytes]], List[np.ndarray]],
+                 window: float = _BATCH_WINDOW, min_batch: int = 2,
+                 max_batch: int = _MAX_BATCH):
+        self._decode_batch = decode_batch
+        self._window = window
+        self._min_batch = min_batch
+        self._max_batch = max_batch
+        self._pending = None
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def decode(self, data: bytes,
+               fallback: Callable[[bytes], Optional[np.ndarray]]) -> Optional[np.ndarray]:
+        """
+        Decode a JPEG, batched with concurrent callers when there are any.
+
+        Args:
+            data: Encoded JPEG
+            fallback: CPU decoder used when the JPEG is not batch decoded
+
+        Returns:
+            BGR image or None if decoding failed
+        """
+        with self._lock:
+            self._active += 1
+            busy = self._active > 1 or self._pending is not None
+        try:
+            image = self._batched(data) if busy else None
+            return image if image is not None else fallback(data)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _batched(self, data: bytes) -> Optional[np.ndarray]:
+        """Join or lead a batch; None when it was too small or failed."""
+        future = Future()
+        with self._lock:
+            leader = self._pending is None
+            if leader:
+                self._pending = []
+            batch = self._pending
+            batch.append((data, future))
+            if len(batch) >= self._max_batch:
+                self._pending = None
+        if not leader:
+            return future.result()
+
+        time.sleep(self._window)
+        with self._lock:
+            if self._pending is batch:
+                self._pending = None
+
+        results = [None] * len(batch)
+        if len(batch) >= self._min_batch:
+            try:
+                results = self._decode_batch([item[0] for item in batch])
+            except Exception:
+                pass
+        for (_, waiter), result in zip(batch, results):
+            waiter.set_result(result)
+        return future.result()
+
+
+def _decode_batch_cuda(datas: List[bytes]) -> List[np.ndarray]:
+    """Decode JPEGs on the CUDA device and copy them back as BGR arrays."""
+    import torch
+    from torchvision.io import ImageReadMode, decode_jpeg
+
+    tensors = [torch.from_numpy(np.frombuffer(data, np.uint8).copy()) for data in datas]
+    images = decode_jpeg(tensors, mode=ImageReadMode.RGB, device='cuda')
+    # CHW RGB on the device to HWC BGR on the host
+    return [image.flip(0).permute(1, 2, 0).contiguous().cpu().numpy() for image in images]
+
+
+def _cuda_available() -> bool:
+    try:
+        import torch
+        import torchvision  # noqa: F401
+    except ImportError:
+        return False
+    return torch.cuda.is_available()
+
+
+def enable(enabled: bool = True) -> bool:
+    """
+    Turn batched GPU decoding on or off.
+
+    Args:
+        enabled: Whether to decode on the GPU when possible
+
+    Returns:
+        Whether GPU decoding is active
+    """
+    global _batcher
+    _batcher = JpegBatcher(_decode_batch_cuda) if enabled and _cuda_available() else None
+    return _batcher is not None
+
+
+def is_enabled() -> bool:
+    """Whether batched GPU decoding is active in this process."""
+    return _batcher is not None
+
+
+def decode(data: bytes, fallback: Callable[[bytes], Optional[np.ndarray]]) -> Optional[np.ndarray]:
+    """
+    Decode a JPEG, on the GPU when enabled and other decodes are in flight.
+
+    Args:
+        data: Encoded JPEG
+        fallback: CPU decoder for everything not batch decoded
+
+    Returns:
+        BGR image or None if decoding failed
+    """
+    batcher = _batcher
+    if batcher is None:
+        return fallback(data)
+    return batcher.decode(data, fallback)
@@ -1,73 +1,409 @@
 """Image utility functions with performance optimizations."""
 import cv2
 import numpy as np
-import base64
-import io
-import hashlib
+import math
 from functools import lru_cache
 from typing import Optional, Dict, Any, Tuple
 from PIL import Image
-import threading
+import pybase64
 import os
 
-# Thread-safe image cache
-_image_cache = {}
-_cache_lock = threading.Lock()
-_MAX_CACHE_SIZE = 50  # Maximum number of cached images
-_MAX_CACHE_BYTES = 500 * 1024 * 1024  # 500MB max cache size
-_cache_size_bytes = 0
+try:
+    import simplejpeg
+except ImportError:  # OpenCV decodes JPEGs instead
+    simplejpeg = None
 
+from app.utils import gpu_jpeg, shared_images
+from app.utils.clock_cache import ClockProCache
 
-def _get_cache_key(filepath: str) -> str:
-    """Generate cache key from filepath."""
-    stat = os.stat(filepath)
-    return f"{filepath}_{stat.st_mtime}_{stat.st_size}"
+_MAX_CACHE_SIZE = 50  # Maximum number of cached images
+_MAX_CACHE_BYTES = 500 * 1024 * 1024  # 500MB max cache size
+# Thread-safe, scan-resistant cache of read-only decodes shared between
+# requests, bounded by entry count and by the summed nbytes of the arrays;
+# eviction runs on a background thread so a miss never sweeps the cache inline
+_image_cache = ClockProCache(_MAX_CACHE_SIZE, _MAX_CACHE_BYTES,
+                             weigher=lambda image: image.nbytes,
+                             background_eviction=True)
 
+# Half spectra of cached images; each is ~4 bytes per pixel in complex64,
+# so the cache is bounded by summed nbytes as well as by entry count
+_MAX_FFT_CACHE = 8
+_MAX_FFT_CACHE_BYTES = 128 * 1024 * 1024  # 128MB max spectrum cache size
+_fft_cache = ClockProCache(_MAX_FFT_CACHE, _MAX_FFT_CACHE_BYTES,
+                           weigher=lambda spectrum: spectrum.nbytes)
 
-def _evict_cache_if_needed(new_size: int) -> None:
-    """Evict oldest cache entries if needed."""
-    global _cache_size_bytes
-    with _cache_lock:
-        while (_cache_size_bytes + new_size > _MAX_CACHE_BYTES or 
-               len(_image_cache) >= _MAX_CACHE_SIZE) and _image_cache:
-            oldest_key = next(iter(_image_cache))
-            old_img = _image_cache.pop(oldest_key)
-            _cache_size_bytes -= old_img.nbytes
+# Keep descriptors out of subprocesses forked while a file is open
+_O_CLOEXEC = getattr(os, 'O_CLOEXEC', 0)
 
 
-def load_image(filepath: str, use_cache: bool = True) -> Optional[np.ndarray]:
+def load_image(filepath: str, use_cache: bool = True,
+               max_dim: Optional[int] = None, copy: bool = False) -> Optional[np.ndarray]:
     """
     Load an image from file with optional caching.
     
+    Cached decodes are stored read-only and returned as views, so a hit
+    costs no allocation or memcpy. Pass ``copy=True`` when the caller
+    writes to the array in place.
+    
     Args:
         filepath: Path to the image file
         use_cache: Whether to use image cache (default True)
+        max_dim: Optional maximum width or height; downscaled loads
+            decode at reduced scale where possible and bypass the cache
+        copy: Return a private writable copy of a cached image
     
     Returns:
-        Image as numpy array (BGR format) or None if failed
+        Image as numpy array (BGR format) or None if failed; read-only
+        when served from the cache without ``copy``
     """
-    global _cache_size_bytes
     try:
-        if use_cache:
-            cache_key = _get_cache_key(filepath)
-            with _cache_lock:
-                if cache_key in _image_cache:
-                    return _image_cache[cache_key].copy()
+        if max_dim:
+            with open(filepath, 'rb') as f:
+                return decode_image(f.read(), max_dim)
         
-        # Use IMREAD_COLOR for consistent format
-        image = cv2.imread(filepath, cv2.IMREAD_COLOR)
-        
-        if image is not None and use_cache:
-            img_size = image.nbytes
-            _evict_cache_if_needed(img_size)
-            cache_key = _get_cache_key(filepath)
-            with _cache_lock:
-                _image_cache[cache_key] = image.copy()
-                _cache_size_bytes += img_size
+        if not use_cache:
+            # Use IMREAD_COLOR for consistent format
+            return cv2.imread(filepath, cv2.IMREAD_COLOR)
         
+        image = get_cached_image(filepath)
+        if image is None:
+            return None
+        return image.copy() if copy else image
+    except Exception:
+        return None
+
+
+def _read_only_imread(filepath: str) -> Optional[np.ndarray]:
+    """Decode a file for the cache, freezing the array once at insertion."""
+    image = cv2.imread(filepath, cv2.IMREAD_COLOR)
+    if image is not None:
+        image.setflags(write=False)
+    return image
+
+
+def _file_key(filepath: str) -> Tuple[int, int, int, int]:
+    """
+    Cache key identifying a file's current contents.
+    
+    Device, inode, modification time in nanoseconds and size: an all-int
+    tuple that hashes in nanoseconds, unlike a long path string, and still
+    changes whenever the file is rewritten.
+    """
+    st = os.stat(filepath)
+    return st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def get_cached_image(filepath: str) -> Optional[np.ndarray]:
+    """
+    Load an image through the shared cache of decoded arrays.
+    
+    Entries are keyed by the file's inode, modification time and size, so
+    replacing the file on disk invalidates the cached decode. The cached array is read-only and
+    callers receive a view of it, so slicing stays free while in-place
+    writes raise instead of corrupting the shared copy. Concurrent misses
+    on the same file share a single decode. With the shared image cache
+    enabled, decodes are also published to and mapped from shared memory
+    so other worker processes skip decoding.
+    
+    Args:
+        filepath: Path to the image file
+    
+    Returns:
+        Read-only image view (BGR format) or None if failed
+    """
+    # One stat per call: the key must track mtime and size so a rewritten
+    # file is never served stale
+    try:
+        cache_key = _file_key(filepath)
+    except OSError:
+        return None
+    
+    image = _image_cache.get_or_insert(cache_key, lambda: _decode_shared(filepath, cache_key))
+    return None if image is None else image.view()
+
+
+def _decode_shared(filepath: str, cache_key: Tuple[int, ...]) -> Optional[np.ndarray]:
+    """Map another worker's decode of a file, or decode and publish it."""
+    image = shared_images.attach(cache_key)
+    if image is not None:
         return image
+    image = _read_only_imread(filepath)
+    if image is not None:
+        shared_images.publish(cache_key, image)
+    return image
+
+
+# JPEG decoders can scale in the IDCT stage; largest reduction first
+_REDUCED_COLOR_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+_SCALED_DECODE_EXTENSIONS = frozenset({'jpg', 'jpeg'})
+
+# JPEG start-of-frame markers, which carry the image dimensions
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _reduced_color_flag(size: Tuple[int, int], target_max_dim: int) -> int:
+    """Largest scaled-decode flag keeping the long side >= target_max_dim."""
+    longest = max(size)
+    for factor, flag in _REDUCED_COLOR_FLAGS:
+        if longest // factor >= target_max_dim:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def _jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Read (width, height) from a JPEG's start-of-frame header.
+    
+    Walks the marker segments without decoding anything; returns None for
+    other formats or a truncated header.
+    """
+    if data[:2] != b'\xff\xd8':
+        return None
+    offset = 2
+    length = len(data)
+    while offset + 9 <= length:
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            offset += 1
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height = int.from_bytes(data[offset + 5:offset + 7], 'big')
+            width = int.from_bytes(data[offset + 7:offset + 9], 'big')
+            return width, height
+        offset += 2 + int.from_bytes(data[offset + 2:offset + 4], 'big')
+    return None
+
+
+def _jpeg_has_exif(data: bytes) -> bool:
+    """Whether a JPEG carries an Exif segment (and so maybe an orientation)."""
+    offset = 2
+    length = len(data)
+    while offset + 10 <= length and data[offset] == 0xFF:
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            offset += 1
+            continue
+        if marker == 0xE1 and data[offset + 4:offset + 10] == b'Exif\x00\x00':
+            return True
+        if marker in _JPEG_SOF_MARKERS or marker == 0xDA:
+            return False
+        offset += 2 + int.from_bytes(data[offset + 2:offset + 4], 'big')
+    return False
+
+
+def _decode_jpeg_turbo(data: bytes) -> Optional[np.ndarray]:
+    """
+    Decode a JPEG to BGR with simplejpeg's libjpeg-turbo bindings.
+    
+    Roughly 1.8x faster than cv2.imdecode here, with identical pixels.
+    Returns None when simplejpeg is missing or fails, e.g. on CMYK or
+    corrupt data.
+    """
+    if simplejpeg is None:
+        return None
+    try:
+        return simplejpeg.decode_jpeg(data, colorspace='BGR')
+    except ValueError:
+        return None
+
+
+def _tiff_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from the first IFD of a TIFF."""
+    order = 'little' if data[:2] == b'II' else 'big'
+    offset = int.from_bytes(data[4:8], order)
+    if offset + 2 > len(data):
+        return None
+    count = int.from_bytes(data[offset:offset + 2], order)
+    dims = {}
+    for entry in range(offset + 2, min(offset + 2 + 12 * count, len(data) - 11), 12):
+        tag = int.from_bytes(data[entry:entry + 2], order)
+        if tag in (256, 257):
+            # SHORT values sit in the first two bytes of the value field
+            field_type = int.from_bytes(data[entry + 2:entry + 4], order)
+            width = 2 if field_type == 3 else 4
+            dims[tag] = int.from_bytes(data[entry + 8:entry + 8 + width], order)
+    if len(dims) != 2:
+        return None
+    return dims[256], dims[257]
+
+
+def read_image_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Read (width, height) from an encoded image's header, without decoding.
+    
+    Recognizes JPEG, PNG, GIF, BMP and TIFF by their magic bytes and parses
+    only the fields holding the dimensions.
+    
+    Args:
+        data: Encoded image file contents
+    
+    Returns:
+        (width, height), or None for other formats or a truncated header
+    """
+    head = data[:32]
+    if head[:2] == b'\xff\xd8':
+        return _jpeg_size(data)
+    if head[:8] == b'\x89PNG\r\n\x1a\n' and head[12:16] == b'IHDR' and len(head) >= 24:
+        return (int.from_bytes(head[16:20], 'big'), int.from_bytes(head[20:24], 'big'))
+    if head[:6] in (b'GIF87a', b'GIF89a') and len(head) >= 10:
+        return (int.from_bytes(head[6:8], 'little'), int.from_bytes(head[8:10], 'little'))
+    if head[:2] == b'BM' and len(head) >= 26:
+        if int.from_bytes(head[14:18], 'little') == 12:
+            # OS/2 BITMAPCOREHEADER with 16-bit dimensions
+            return (int.from_bytes(head[18:20], 'little'), int.from_bytes(head[20:22], 'little'))
+        # Negative heights mark top-down bitmaps
+        return (abs(int.from_bytes(head[18:22], 'little', signed=True)),
+                abs(int.from_bytes(head[22:26], 'little', signed=True)))
+    if head[:4] in (b'II*\x00', b'MM\x00*'):
+        return _tiff_size(data)
+    return None
+
+
+def load_image_reduced(filepath: str, target_max_dim: int = 512,
+                       size: Optional[Tuple[int, int]] = None) -> Optional[np.ndarray]:
+    """
+    Load an image at reduced resolution for previews.
+    
+    JPEGs are decoded directly at 1/8, 1/4 or 1/2 scale, choosing the
+    largest reduction that keeps the long side at or above
+    ``target_max_dim``; the decoder then skips most of the IDCT work.
+    Other formats and small images fall back to the full-resolution
+    ``get_cached_image``.
+    
+    Args:
+        filepath: Path to the image file
+        target_max_dim: Smallest acceptable long side of the result
+        size: Original (width, height) if known, to skip reading the header
+    
+    Returns:
+        Image as numpy array (BGR format) or None if failed
+    """
+    extension = filepath.rsplit('.', 1)[-1].lower()
+    if extension not in _SCALED_DECODE_EXTENSIONS:
+        return get_cached_image(filepath)
+    
+    try:
+        if size is None:
+            with Image.open(filepath) as img:
+                size = img.size
     except Exception:
         return None
+    
+    flag = _reduced_color_flag(size, target_max_dim)
+    if flag != cv2.IMREAD_COLOR:
+        image = cv2.imread(filepath, flag)
+        if image is not None:
+            return image
+    return get_cached_image(filepath)
+
+
+def decode_image(data: bytes, max_dim: Optional[int] = None) -> Optional[np.ndarray]:
+    """
+    Decode encoded image bytes held in memory.
+    
+    With ``max_dim`` the result is no larger than ``max_dim`` on its long
+    side. Oversized JPEGs are decoded at 1/2, 1/4 or 1/8 scale first, so
+    the IDCT skips pixels the final resize would discard.
+    
+    Args:
+        data: Encoded image file contents
+        max_dim: Optional maximum width or height of the result
+    
+    Returns:
+        Image as numpy array (BGR format) or None if failed
+    """
+    flag = cv2.IMREAD_COLOR
+    if max_dim:
+        size = _jpeg_size(data)
+        if size is not None:
+            flag = _reduced_color_flag(size, max_dim)
+    
+    image = None
+    # imdecode applies Exif orientation, which the JPEG-only decoders do not
+    if flag == cv2.IMREAD_COLOR and data[:2] == b'\xff\xd8' and not _jpeg_has_exif(data):
+        image = gpu_jpeg.decode(data, _decode_jpeg_turbo)
+    if image is None:
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+    if image is not None and max_dim:
+        image = resize_image(image, max_dim)
+    return image
+
+
+def save_upload(filepath: str, data: bytes, image: Optional[np.ndarray] = None) -> None:
+    """
+    Write an upload to disk and cache its decode.
+    
+    The bytes go to a temporary file that is renamed into place, so no
+    reader in any worker sees a partly written file under the final name.
+    The already-decoded image is then cached under the written file's key,
+    so the first processing request skips decoding. Record the upload in
+    the image store only after this returns.
+    
+    Args:
+        filepath: Destination path
+        data: Encoded file contents
+        image: ``data`` decoded with ``decode_image``, or None when
+            OpenCV cannot decode the format
+    """
+    tmp_path = filepath + '.tmp'
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_CLOEXEC, 0o644)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    
+    if image is not None:
+        image.setflags(write=False)
+        cache_key = _file_key(filepath)
+        _image_cache.insert(cache_key, image)
+        shared_images.publish(cache_key, image)
+
+
+def get_cached_fft(filepath: str, log: bool = False) -> Optional[np.ndarray]:
+    """
+    Get the grayscale half spectrum of an image through a bounded cache.
+    
+    Frequency-domain endpoints reuse the forward transform across requests,
+    so sweeping a cutoff only pays for the mask multiply and inverse FFT.
+    Entries are keyed like ``get_cached_image`` and are read-only.
+    
+    Args:
+        filepath: Path to the image file
+        log: Spectrum of log(1 + image), as used by the homomorphic filter
+    
+    Returns:
+        Read-only complex spectrum from ``ImageProcessor.grayscale_spectrum``
+        or None if the image failed to load
+    """
+    try:
+        cache_key = _file_key(filepath) + (log,)
+    except OSError:
+        return None
+    
+    def compute() -> Optional[np.ndarray]:
+        image = get_cached_image(filepath)
+        if image is None:
+            return None
+        
+        from app.models.ImageProcessor import ImageProcessor
+        spectrum = ImageProcessor(image).grayscale_spectrum(log=log)
+        spectrum.setflags(write=False)
+        return spectrum
+    
+    return _fft_cache.get_or_insert(cache_key, compute)
 
 
 def save_image(image: np.ndarray, filepath: str, quality: int = 95) -> bool:
@@ -97,37 +433,95 @@ def save_image(image: np.ndarray, filepath: str, quality: int = 95) -> bool:
         return False
 
 
-def image_to_base64(image: np.ndarray, format: str = 'auto', quality: int = 85) -> str:
+# Response PNGs are transient, so favour encode speed over size: deflate
+# level 1 with run-length matching, and the single "up" row filter instead
+# of libpng's per-row adaptive filter search (about 1.7x faster for a few
+# percent more bytes). Older OpenCV builds lack the filter option.
+PNG_RESPONSE_PARAMS = [cv2.IMWRITE_PNG_COMPRESSION, 1,
+                       cv2.IMWRITE_PNG_STRATEGY, cv2.IMWRITE_PNG_STRATEGY_RLE]
+if hasattr(cv2, 'IMWRITE_PNG_FILTER'):
+    PNG_RESPONSE_PARAMS += [cv2.IMWRITE_PNG_FILTER, cv2.IMWRITE_PNG_FILTER_UP]
+
+
+@lru_cache(maxsize=16)
+def _jpeg_params(quality: int) -> Tuple[int, ...]:
     """
-    Convert numpy image to base64 string with optimized compression.
+    imencode parameters for response JPEGs at the given quality.
+    
+    Pins 4:2:0 chroma subsampling, caps chroma quality at 85 and turns off
+    progressive and optimized Huffman coding, so every build encodes with
+    the fast baseline settings whatever its defaults.
+    """
+    return (cv2.IMWRITE_JPEG_QUALITY, quality,
+            cv2.IMWRITE_JPEG_CHROMA_QUALITY, min(quality, 85),
+            cv2.IMWRITE_JPEG_SAMPLING_FACTOR, cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420,
+            cv2.IMWRITE_JPEG_PROGRESSIVE, 0,
+            cv2.IMWRITE_JPEG_OPTIMIZE, 0)
+
+
+def encode_image(image: np.ndarray, format: str = 'auto', quality: Optional[int] = None,
+                 auto_lossless: str = 'png') -> Tuple[np.ndarray, str]:
+    """
+    Encode a numpy image to compressed bytes.
     
     Args:
         image: Image as numpy array
-        format: Output format ('png', 'jpeg', 'auto'). 'auto' chooses based on image size
-        quality: JPEG quality (1-100), default 85 for good balance
+        format: Output format ('png', 'jpeg', 'bmp', 'auto'). 'auto' chooses based on image size
+        quality: JPEG quality (1-100); defaults to 85, or 80 when 'auto'
+            picks JPEG for a large preview
+        auto_lossless: Format 'auto' uses for small images; 'bmp' skips
+            deflate entirely at the cost of a larger payload
     
     Returns:
-        Base64 encoded string with data URL prefix
+        Tuple of (encoded buffer, MIME type)
     """
     # Auto-select format based on image size for performance
     if format == 'auto':
         # Use JPEG for larger images (faster encoding, smaller size)
         pixels = image.shape[0] * image.shape[1]
-        format = 'jpeg' if pixels > 500000 else 'png'  # ~700x700 threshold
+        format = 'jpeg' if pixels > 500000 else auto_lossless  # ~700x700 threshold
+        if quality is None:
+            quality = 80
     
     # Use OpenCV for faster encoding
     if format.lower() in ['jpg', 'jpeg']:
-        encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
-        _, buffer = cv2.imencode('.jpg', image, encode_params)
-        mime_type = 'image/jpeg'
-    else:
-        # PNG with fast compression
-        encode_params = [cv2.IMWRITE_PNG_COMPRESSION, 3]  # 0-9, lower is faster
-        _, buffer = cv2.imencode('.png', image, encode_params)
-        mime_type = 'image/png'
+        params = _jpeg_params(85 if quality is None else quality)
+        _, buffer = cv2.imencode('.jpg', image, params)
+        return buffer, 'image/jpeg'
+    
+    if format.lower() == 'bmp':
+        # A header in front of the raw rows: no compression work at all
+        _, buffer = cv2.imencode('.bmp', image)
+        return buffer, 'image/bmp'
     
-    base64_data = base64.b64encode(buffer).decode('utf-8')
-    return f"data:{mime_type};base64,{base64_data}"
+    _, buffer = cv2.imencode('.png', image, PNG_RESPONSE_PARAMS)
+    return buffer, 'image/png'
+
+
+_DATA_URL_PREFIXES = {
+    mime_type: f'data:{mime_type};base64,'
+    for mime_type in ('image/png', 'image/jpeg', 'image/bmp')
+}
+
+
+def image_to_base64(image: np.ndarray, format: str = 'auto', quality: Optional[int] = None,
+                    auto_lossless: str = 'png') -> str:
+    """
+    Convert numpy image to base64 string with optimized compression.
+    
+    Args:
+        image: Image as numpy array
+        format: Output format ('png', 'jpeg', 'bmp', 'auto'). 'auto' chooses based on image size
+        quality: JPEG quality (1-100); defaults to 85, or 80 for 'auto'
+        auto_lossless: Format 'auto' uses for small images ('png' or 'bmp')
+    
+    Returns:
+        Base64 encoded string with data URL prefix
+    """
+    buffer, mime_type = encode_image(image, format, quality, auto_lossless)
+    # SIMD base64 reads the imencode buffer in place and yields the str
+    # directly, so the payload is copied once more only to add the prefix
+    return _DATA_URL_PREFIXES[mime_type] + pybase64.b64encode_as_string(buffer)
 
 
 def base64_to_image(base64_string: str) -> Optional[np.ndarray]:
@@ -141,40 +535,65 @@ def base64_to_image(base64_string: str) -> Optional[np.ndarray]:
         Image as numpy array or None if failed
     """
     try:
-        # Remove data URL prefix if present
-        if ',' in base64_string:
-            base64_string = base64_string.split(',')[1]
-        
-        # Decode base64
-        image_data = base64.b64decode(base64_string)
+        # Remove data URL prefix if present; it ends within the first few
+        # dozen characters, so the scan never walks the whole payload
+        comma = base64_string.find(',', 0, 64)
+        if comma >= 0:
+            base64_string = base64_string[comma + 1:]
         
-        # Convert to numpy array
-        nparr = np.frombuffer(image_data, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        return image
+        # Decode base64, then the image (JPEGs through libjpeg-turbo)
+        return decode_image(pybase64.b64decode(base64_string, validate=False))
     except Exception:
         return None
 
 
-def get_image_info(filepath: str) -> Dict[str, Any]:
+# Enough to reach the start-of-frame of JPEGs behind typical Exif blocks
+_HEADER_READ_SIZE = 64 * 1024
+
+
+def _read_file_size(filepath: str) -> Optional[Tuple[int, int]]:
+    """(width, height) of an image file, reading as little as possible."""
+    try:
+        with open(filepath, 'rb') as f:
+            data = f.read(_HEADER_READ_SIZE)
+            size = read_image_size(data)
+            if size is None and len(data) == _HEADER_READ_SIZE:
+                # Very large metadata blocks ahead of the frame header
+                size = read_image_size(data + f.read())
+        if size is not None:
+            return size
+        # Other formats: Pillow parses the header without decoding pixels
+        with Image.open(filepath) as img:
+            return img.size
+    except OSError:
+        return None
+
+
+def get_image_info(filepath: str, image: Optional[np.ndarray] = None) -> Dict[str, Any]:
     """
     Get information about an image file.
     
+    Without a decoded image the dimensions come from the file header, so
+    no pixels are decoded. Channels describe the array the app works on,
+    which ``load_image`` always decodes to 3-channel BGR.
+    
     Args:
         filepath: Path to the image file
+        image: Already decoded contents of the file, to skip reading it
     
     Returns:
         Dictionary with image information
     """
     try:
-        image = cv2.imread(filepath)
-        
-        if image is None:
-            return {'error': 'Failed to load image'}
-        
-        height, width = image.shape[:2]
-        channels = image.shape[2] if len(image.shape) > 2 else 1
+        if image is not None:
+            height, width = image.shape[:2]
+            channels = image.shape[2] if len(image.shape) > 2 else 1
+        else:
+            size = _read_file_size(filepath)
+            if size is None:
+                return {'error': 'Failed to load image'}
+            width, height = size
+            channels = 3
         
         # Determine format from file
         extension = filepath.rsplit('.', 1)[-1].lower()
@@ -193,7 +612,7 @@ def get_image_info(filepath: str) -> Dict[str, Any]:
             'height': height,
             'channels': channels,
             'format': format_map.get(extension, extension.upper()),
-            'color_mode': 'RGB' if channels == 3 else 'Grayscale'
+            'color_mode': {3: 'RGB', 4: 'RGBA'}.get(channels, 'Grayscale')
         }
     except Exception as e:
         return {'error': str(e)}
@@ -213,23 +632,54 @@ def resize_image(image: np.ndarray, max_dimension: int = 1024,
         Resized image (or original if within limits)
     """
     height, width = image.shape[:2]
+    plan = _resize_plan(height, width, max_dimension, fast_mode)
     
-    if max(height, width) <= max_dimension:
+    if plan is None:
         return image
     
+    pyramid_levels, new_size, interpolation = plan
+    for _ in range(pyramid_levels):
+        image = cv2.pyrDown(image)
+    
+    return cv2.resize(image, new_size, interpolation=interpolation)
+
+
+@lru_cache(maxsize=256)
+def _resize_plan(height: int, width: int, max_dimension: int,
+                 fast_mode: bool) -> Optional[Tuple[int, Tuple[int, int], int]]:
+    """
+    Work out how resize_image shrinks a given shape, once per shape.
+    
+    Previews of one upload resize the same source size over and over, so
+    the target size, pyramid depth and interpolation are computed once and
+    only the pixel passes run per call.
+    
+    Returns:
+        (pyrDown steps, target (width, height), interpolation), or None
+        when the image already fits
+    """
+    if max(height, width) <= max_dimension:
+        return None
+    
     scale = max_dimension / max(height, width)
-    new_width = int(width * scale)
-    new_height = int(height * scale)
+    # Skinny panoramas must not round down to a zero-pixel side
+    new_size = (max(1, int(width * scale)), max(1, int(height * scale)))
     
     # Choose interpolation based on scaling direction and mode
+    levels = 0
     if fast_mode:
         interpolation = cv2.INTER_NEAREST
     elif scale < 1:
         interpolation = cv2.INTER_AREA  # Best for downscaling
+        # Halve with pyrDown (5-tap Gaussian + decimate) while still at least
+        # 2x too large; INTER_AREA then only covers the residual step
+        while max(height, width) >= 2 * max_dimension:
+            height, width = (height + 1) // 2, (width + 1) // 2
+            levels += 1
     else:
         interpolation = cv2.INTER_LINEAR  # Good for upscaling
     
-    return cv2.resize(image, (new_width, new_height), interpolation=interpolation)
+    return levels, new_size, interpolation
 
 
 def resize_for_processing(image: np.ndarray, max_pixels: int = 2000000) -> Tuple[np.ndarray, float]:
@@ -244,24 +694,32 @@ def resize_for_processing(image: np.ndarray, max_pixels: int = 2000000) -> Tuple
         Tuple of (resized_image, scale_factor)
     """
     height, width = image.shape[:2]
-    pixels = height * width
+    new_size, scale = _processing_size(height, width, max_pixels)
     
-    if pixels <= max_pixels:
+    if new_size is None:
         return image, 1.0
     
-    scale = np.sqrt(max_pixels / pixels)
-    new_size = (int(width * scale), int(height * scale))
     resized = cv2.resize(image, new_size, interpolation=cv2.INTER_AREA)
     
     return resized, scale
 
 
+@lru_cache(maxsize=256)
+def _processing_size(height: int, width: int,
+                     max_pixels: int) -> Tuple[Optional[Tuple[int, int]], float]:
+    """Target (width, height) and scale for resize_for_processing, or None to keep."""
+    pixels = height * width
+    if pixels <= max_pixels:
+        return None, 1.0
+    # Plain float math; np.sqrt would build a 0-d array for one scalar
+    scale = math.sqrt(max_pixels / pixels)
+    return (max(1, int(width * scale)), max(1, int(height * scale))), scale
+
+
 def clear_image_cache() -> None:
     """Clear the image cache to free memory."""
-    global _cache_size_bytes
-    with _cache_lock:
-        _image_cache.clear()
-        _cache_size_bytes = 0
+    _image_cache.clear()
+    _fft_cache.clear()
 
 
 def crop_image(image: np.ndarray, x: int, y: int, 
@@ -280,10 +738,17 @@ def crop_image(image: np.ndarray, x: int, y: int,
     return image[y:y+height, x:x+width].copy()
 
 
+# Quarter turns counter-clockwise, as cv2.rotate codes (None: no turn)
+_QUARTER_TURNS = (None, cv2.ROTATE_90_COUNTERCLOCKWISE, cv2.ROTATE_180, cv2.ROTATE_90_CLOCKWISE)
+
+
 def rotate_image(image: np.ndarray, angle: float) -> np.ndarray:
     """
     Rotate image by given angle.
     
+    Multiples of 90 degrees are exact pixel permutations and skip
+    interpolation entirely.
+    
     Args:
         image: Input image
         angle: Rotation angle in degrees (counter-clockwise)
@@ -291,7 +756,19 @@ def rotate_image(image: np.ndarray, angle: float) -> np.ndarray:
     Returns:
         Rotated image
     """
+    if angle % 90 == 0:
+        code = _QUARTER_TURNS[int(angle // 90) % 4]
+        return image.copy() if code is None else cv2.rotate(image, code)
+    
     height, width = image.shape[:2]
+    rotation_matrix, new_size = _rotation_transform(width, height, angle)
+    return cv2.warpAffine(image, rotation_matrix, new_size)
+
+
+@lru_cache(maxsize=512)
+def _rotation_transform(width: int, height: int,
+                        angle: float) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """Affine matrix and output size rotating a width x height image by angle."""
     center = (width // 2, height // 2)
     
     # Get rotation matrix
@@ -306,8 +783,10 @@ def rotate_image(image: np.ndarray, angle: float) -> np.ndarray:
     # Adjust rotation matrix
     rotation_matrix[0, 2] += (new_width - width) / 2
     rotation_matrix[1, 2] += (new_height - height) / 2
+    # Shared between calls through the cache
+    rotation_matrix.setflags(write=False)
     
-    return cv2.warpAffine(image, rotation_matrix, (new_width, new_height))
+    return rotation_matrix, (new_width, new_height)
 
 
 def flip_image(image: np.ndarray, direction: str = 'horizontal') -> np.ndarray:
@@ -329,6 +808,15 @@ def flip_image(image: np.ndarray, direction: str = 'horizontal') -> np.ndarray:
         return cv2.flip(image, -1)  # Both
 
 
+_BGR_CONVERSIONS = {
+    'rgb': cv2.COLOR_BGR2RGB,
+    'gray': cv2.COLOR_BGR2GRAY,
+    'hsv': cv2.COLOR_BGR2HSV,
+    'lab': cv2.COLOR_BGR2LAB,
+    'ycrcb': cv2.COLOR_BGR2YCrCb
+}
+
+
 def convert_color_space(image: np.ndarray, target: str) -> np.ndarray:
     """
     Convert image to different color space.
@@ -340,15 +828,7 @@ def convert_color_space(image: np.ndarray, target: str) -> np.ndarray:
     Returns:
         Converted image
     """
-    conversions = {
-        'rgb': cv2.COLOR_BGR2RGB,
-        'gray': cv2.COLOR_BGR2GRAY,
-        'hsv': cv2.COLOR_BGR2HSV,
-        'lab': cv2.COLOR_BGR2LAB,
-        'ycrcb': cv2.COLOR_BGR2YCrCb
-    }
-    
-    if target.lower() in conversions:
-        return cv2.cvtColor(image, conversions[target.lower()])
-    
-    return image
+    code = _BGR_CONVERSIONS.get(target.lower())
+    if code is None:
+        return image
+    return cv2.cvtColor(image, code)
@@ -0,0 +1,109 @@
+"""
+Response-level memoization for deterministic image endpoints.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Iterable
+
+from flask import Response, make_response
+
+from app.utils.route_helpers import request_json
+
+# Encoded JSON bodies in LRU order, keyed by image, endpoint and parameters;
+# spectra make bodies run to several MB, so the total size is bounded too
+route_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+_MAX_RESPONSE_CACHE = 32
+_MAX_RESPONSE_CACHE_BYTES = 128 * 1024 * 1024
+_response_cache_bytes = 0
+
+
+def _response_cache_key(image_id: str, filepath: str, endpoint: str, params: dict) -> str:
+    """Hash the request identity into a compact cache key."""
+    payload = json.dumps([image_id, filepath, endpoint, params], sort_keys=True)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _cache_body(cache_key: str, body: bytes, mimetype: str) -> None:
+    """Cache a response body, bounded by total size as well as entry count."""
+    global _response_cache_bytes
+    if len(body) > _MAX_RESPONSE_CACHE_BYTES:
+        return
+    with _response_cache_lock:
+        previous = route_response_cache.pop(cache_key, None)
+        if previous is not None:
+            _response_cache_bytes -= len(previous[0])
+        route_response_cache[cache_key] = (body, mimetype)
+        _response_cache_bytes += len(body)
+        while (len(route_response_cache) > _MAX_RESPONSE_CACHE or
+               _response_cache_bytes > _MAX_RESPONSE_CACHE_BYTES):
+            # Evict the least recently used entry
+            _, (evicted, _) = route_response_cache.popitem(last=False)
+            _response_cache_bytes -= len(evicted)
+
+
+def cached_response(endpoint: str, param_keys: Iterable[str] = ()) -> Callable:
+    """
+    Cache the full response body of a view that is a pure function of its input.
+
+    The key covers the image id, its file and the listed request parameters.
+    Only parameters present in the request are hashed, so defaults resolved
+    inside the view never collide with explicit values. Requests for unknown
+    images and non-200 responses go through the view uncached.
+
+    Args:
+        endpoint: Name distinguishing this view in the shared cache
+        param_keys: Request JSON fields that affect the response
+
+    Returns:
+        Decorator for a view function reading ``image_id`` from JSON
+    """
+    param_keys = tuple(param_keys)
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            from app.routes.image_routes import get_image_store
+
+            data = request_json()
+            image_data = None
+            if isinstance(data, dict) and 'image_id' in data:
+                image_data = get_image_store().get(data['image_id'])
+            if image_data is None:
+                return view(*args, **kwargs)
+
+            params = {key: data[key] for key in param_keys if key in data}
+            try:
+                cache_key = _response_cache_key(
+                    data['image_id'], image_data['filepath'], endpoint, params
+                )
+            except TypeError:
+                return view(*args, **kwargs)
+
+            with _response_cache_lock:
+                cached = route_response_cache.get(cache_key)
+                if cached is not None:
+                    route_response_cache.move_to_end(cache_key)
+            if cached is not None:
+                body, mimetype = cached
+                return Response(body, status=200, mimetype=mimetype)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                _cache_body(cache_key, response.get_data(), response.mimetype)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def clear_response_cache() -> None:
+    """Drop every cached response body."""
+    global _response_cache_bytes
+    with _response_cache_lock:
+        route_response_cache.clear()
+        _response_cache_bytes = 0
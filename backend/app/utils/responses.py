@@ -0,0 +1,42 @@
+"""
+JSON response helpers.
+"""
+from typing import Any
+
+import numpy as np
+import orjson
+from flask import Response
+
+# NumPy arrays and scalars serialize natively; int keys become strings
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for arrays orjson cannot serialize in place (e.g. non-contiguous)."""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f'Type is not JSON serializable: {type(obj).__name__}')
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Serialize a payload, including NumPy values, to JSON bytes."""
+    return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+
+
+def json_response(obj: Any, status: int = 200) -> Response:
+    """
+    Serialize a payload straight to a JSON response with orjson.
+
+    Skips the ``jsonify`` argument handling and provider lookup; route
+    payloads carry multi-megabyte base64 strings, which orjson copies in a
+    single pass. NumPy arrays and scalars are written directly without
+    converting them to Python lists first.
+
+    Args:
+        obj: JSON-serializable payload
+        status: HTTP status code
+
+    Returns:
+        Flask response with an ``application/json`` body
+    """
+    return Response(json_dumps(obj), status=status, mimetype='application/json')
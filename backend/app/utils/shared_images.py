@@ -0,0 +1,167 @@
+"""
+Decoded images published to POSIX shared memory.
+
+With several worker processes each one would otherwise decode the same
+upload into its own cache. Once any worker has decoded an image it copies
+the pixels into a named shared-memory segment; the name is derived from the
+file's device, inode, mtime and size, so every worker can find and map it
+without coordination and without touching the file.
+
+Publishing is off until ``enable`` is called (see ``SHARED_IMAGE_CACHE``).
+"""
+import atexit
+import hashlib
+import struct
+import threading
+from collections import OrderedDict
+from multiprocessing import resource_tracker, shared_memory
+from typing import Hashable, Optional
+
+import numpy as np
+
+# Header: ready flag, ndim, three dimensions, dtype string
+_HEADER = struct.Struct('<II3Q16s')
+_HEADER_SIZE = 64
+_READY = 0x50584C31
+
+# Segments this process created (owned) or mapped, in LRU order
+_segments = OrderedDict()
+_segments_lock = threading.Lock()
+_MAX_SHARED_IMAGES = 16
+_enabled = False
+
+
+def enable(enabled: bool = True) -> None:
+    """Turn publishing and lookups on or off; disabling releases every segment."""
+    global _enabled
+    _enabled = enabled
+    if not enabled:
+        release_all()
+
+
+def is_enabled() -> bool:
+    """Whether shared-memory publishing is active in this process."""
+    return _enabled
+
+
+def _segment_name(cache_key: Hashable) -> str:
+    """Short, deterministic segment name for a cache key."""
+    return 'pxl_' + hashlib.blake2b(repr(cache_key).encode(), digest_size=12).hexdigest()
+
+
+def _remember(name: str, segment: shared_memory.SharedMemory, owned: bool) -> None:
+    """Track a segment, releasing the least recently used beyond the limit."""
+    with _segments_lock:
+        _segments[name] = (segment, owned)
+        _segments.move_to_end(name)
+        evicted = []
+        while len(_segments) > _MAX_SHARED_IMAGES:
+            evicted.append(_segments.popitem(last=False)[1])
+    for segment, owned in evicted:
+        _release(segment, owned)
+
+
+def _release(segment: shared_memory.SharedMemory, owned: bool) -> None:
+    """Unlink owned segments and drop this process's mapping if unused."""
+    if owned:
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+    try:
+        segment.close()
+    except BufferError:
+        # Arrays still view the mapping; it is freed once they are collected
+        pass
+
+
+def publish(cache_key: Hashable, image: np.ndarray) -> None:
+    """
+    Copy a decoded image into a named segment other processes can map.
+
+    Args:
+        cache_key: Key identifying the file contents
+        image: Decoded image
+    """
+    if not _enabled or image.ndim > 3:
+        return
+    name = _segment_name(cache_key)
+    with _segments_lock:
+        if name in _segments:
+            return
+    try:
+        segment = shared_memory.SharedMemory(
+            name=name, create=True, size=_HEADER_SIZE + image.nbytes
+        )
+    except FileExistsError:
+        # Another worker published it first
+        return
+
+    target = np.ndarray(image.shape, image.dtype, buffer=segment.buf, offset=_HEADER_SIZE)
+    target[...] = image
+    del target
+    # The ready flag goes in last so readers never map a partial copy
+    shape = tuple(image.shape) + (0,) * (3 - image.ndim)
+    _HEADER.pack_into(segment.buf, 0, _READY, image.ndim, *shape, image.dtype.str.encode())
+    _remember(name, segment, owned=True)
+
+
+def attach(cache_key: Hashable) -> Optional[np.ndarray]:
+    """
+    Map an image another process published, without copying it.
+
+    Args:
+        cache_key: Key identifying the file contents
+
+    Returns:
+        Read-only array backed by the shared segment, or None if absent
+    """
+    if not _enabled:
+        return None
+    name = _segment_name(cache_key)
+    with _segments_lock:
+        entry = _segments.get(name)
+        if entry is not None:
+            _segments.move_to_end(name)
+    if entry is not None:
+        segment = entry[0]
+    else:
+        try:
+            segment = shared_memory.SharedMemory(name=name)
+        except (FileNotFoundError, ValueError):
+            # Absent, or created but not yet sized by the publisher
+            return None
+        # Only the publisher unlinks; stop this process's tracker from
+        # removing the segment when the worker exits
+        resource_tracker.unregister(segment._name, 'shared_memory')
+
+    image = None
+    try:
+        ready, ndim, *dims, dtype = _HEADER.unpack_from(segment.buf, 0)
+        if ready == _READY:
+            image = np.ndarray(tuple(dims[:ndim]), np.dtype(dtype.rstrip(b'\0').decode()),
+                               buffer=segment.buf, offset=_HEADER_SIZE)
+    except (struct.error, TypeError, ValueError):
+        # Truncated segment or malformed header
+        pass
+    if image is None:
+        if entry is None:
+            segment.close()
+        return None
+    if entry is None:
+        _remember(name, segment, owned=False)
+
+    image.setflags(write=False)
+    return image
+
+
+def release_all() -> None:
+    """Unlink every segment this process published and drop all mappings."""
+    with _segments_lock:
+        entries = list(_segments.values())
+        _segments.clear()
+    for segment, owned in entries:
+        _release(segment, owned)
+
+
+atexit.register(release_all)
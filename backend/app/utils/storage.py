@@ -1,23 +1,142 @@
+"""
+Array storage for processed images.
+
+Recently written, likely hot arrays are kept as plain ``.npy`` files and
+memory-mapped on load, so readers only page in what they touch. Arrays
+moved to cold storage are compressed with Blosc2 instead.
+
+Files are spread over 256 subdirectories named after the first two hex
+digits of the id, so no single directory grows large, and every file is
+written under a temporary name and renamed into place once complete.
+Arrays stored before sharding, directly under ``BASE_DIR``, are still
+found by ``load_image`` and ``delete_image``.
+"""
 import uuid
 import os
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import blosc2
 import numpy as np
 
 BASE_DIR = "uploads"
 os.makedirs(BASE_DIR, exist_ok=True)
 
-def save_image(image_array):
+# LZ4 at a low level compresses faster than the disk writes; byte shuffle
+# at the element size groups the like bytes of multi-byte dtypes
+_CODEC = blosc2.Codec.LZ4
+_CLEVEL = 3
+
+# Keep descriptors out of subprocesses forked while a file is open
+_O_CLOEXEC = getattr(os, 'O_CLOEXEC', 0)
+
+
+@lru_cache(maxsize=1024)
+def _ensure_dir(path: str) -> str:
+    """Create a shard directory once per process."""
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _array_path(image_id: str, compressed: bool = False) -> str:
+    extension = 'b2nd' if compressed else 'npy'
+    return os.path.join(BASE_DIR, image_id[:2], f"{image_id}.{extension}")
+
+
+def _stored_paths(image_id: str, compressed: bool = False) -> Tuple[str, str]:
+    """Sharded path, then the flat path arrays were stored at before sharding."""
+    extension = 'b2nd' if compressed else 'npy'
+    return _array_path(image_id, compressed), os.path.join(BASE_DIR, f"{image_id}.{extension}")
+
+
+def _drop_from_page_cache(path: str) -> None:
+    """Ask the kernel not to keep a freshly written file's pages cached."""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    fd = os.open(path, os.O_RDONLY | _O_CLOEXEC)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def save_image(image_array: np.ndarray, compress: bool = False) -> str:
+    """
+    Store an array on disk.
+
+    Args:
+        image_array: Image to store
+        compress: Write Blosc2-compressed cold storage instead of an
+            uncompressed array that loads memory-mapped
+
+    Returns:
+        Id to load or delete the image with
+    """
     image_id = str(uuid.uuid4())
-    path = os.path.join(BASE_DIR, f"{image_id}.npy")
-    np.save(path, image_array)
+    path = _array_path(image_id, compress)
+    _ensure_dir(os.path.dirname(path))
+    # Readers never see a partly written file under the final name
+    tmp_path = path + '.tmp'
+    try:
+        if compress:
+            cparams = {'codec': _CODEC, 'clevel': _CLEVEL, 'typesize': image_array.dtype.itemsize}
+            blosc2.save_array(np.ascontiguousarray(image_array), tmp_path, mode='w', cparams=cparams)
+        else:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_CLOEXEC, 0o644)
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, image_array, allow_pickle=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if compress:
+        # Keep other requests' hot data in the page cache instead of this write
+        _drop_from_page_cache(path)
     return image_id
 
-def load_image(image_id):
-    path = os.path.join(BASE_DIR, f"{image_id}.npy")
-    if not os.path.exists(path):
-        return None
-    return np.load(path)
 
-def delete_image(image_id):
-    path = os.path.join(BASE_DIR, f"{image_id}.npy")
-    if os.path.exists(path):
-        os.remove(path)
+def load_image(image_id: str) -> Optional[np.ndarray]:
+    """
+    Load a stored array.
+
+    Uncompressed arrays are memory-mapped read-only rather than copied
+    into memory; use ``load_image_writable`` to modify the result.
+
+    Args:
+        image_id: Id returned by ``save_image``
+
+    Returns:
+        Array or None if not found
+    """
+    for path in _stored_paths(image_id):
+        if os.path.exists(path):
+            return np.load(path, mmap_mode='r', allow_pickle=False)
+    for path in _stored_paths(image_id, compressed=True):
+        if os.path.exists(path):
+            return blosc2.load_array(path)
+    return None
+
+
+def load_image_writable(image_id: str) -> Optional[np.ndarray]:
+    """
+    Load a stored array into a writable in-memory buffer.
+
+    Args:
+        image_id: Id returned by ``save_image``
+
+    Returns:
+        Writable array or None if not found
+    """
+    image = load_image(image_id)
+    if image is None or image.flags.writeable:
+        return image
+    return np.array(image, copy=True)
+
+
+def delete_image(image_id: str) -> None:
+    """Remove a stored array if it exists."""
+    for compressed in (False, True):
+        for path in _stored_paths(image_id, compressed):
+            if os.path.exists(path):
+                os.remove(path)
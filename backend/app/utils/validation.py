@@ -6,6 +6,8 @@ from typing import Tuple
 from PIL import Image
 from werkzeug.datastructures import FileStorage
 
+from app.utils.image_utils import _HEADER_READ_SIZE, read_image_size
+
 
 def validate_image_file(file: FileStorage) -> Tuple[bool, str]:
     """
@@ -25,32 +27,39 @@ def validate_image_file(file: FileStorage) -> Tuple[bool, str]:
     
     # Check file content is actually an image
     try:
-        # Read file content
-        file_content = file.read()
-        file.seek(0)  # Reset for later use
+        stream = file.stream
         
-        # Try to open as image
-        img = Image.open(io.BytesIO(file_content))
-        img.verify()
+        # Check file size (should be done by Flask config, but double-check)
+        stream.seek(0, io.SEEK_END)
+        file_size = stream.tell()
+        max_size = 16 * 1024 * 1024  # 16MB
+        if file_size > max_size:
+            return False, f"File size too large. Maximum allowed: {max_size // (1024*1024)}MB"
         
-        # Check dimensions
-        img = Image.open(io.BytesIO(file_content))
-        width, height = img.size
+        # Dimensions come from the header alone, so oversized images are
+        # rejected before any decoder runs and the upload is never copied
+        # into memory here. Pillow opens the same stream and parses just the
+        # header too; it covers formats the probe does not know and confirms
+        # the content is an image Pillow recognizes. Only then does verify()
+        # walk the file, catching truncated or corrupt uploads.
+        stream.seek(0)
+        size = read_image_size(stream.read(_HEADER_READ_SIZE))
+        stream.seek(0)
+        img = Image.open(stream)
+        width, height = size if size is not None else img.size
         
         max_dimension = 4096
         if width > max_dimension or height > max_dimension:
             return False, f"Image dimensions too large. Maximum allowed: {max_dimension}x{max_dimension}"
         
-        # Check file size (should be done by Flask config, but double-check)
-        file_size = len(file_content)
-        max_size = 16 * 1024 * 1024  # 16MB
-        if file_size > max_size:
-            return False, f"File size too large. Maximum allowed: {max_size // (1024*1024)}MB"
+        img.verify()
         
         return True, ""
         
     except Exception as e:
         return False, f"Invalid image file: {str(e)}"
+    finally:
+        file.seek(0)  # Reset for later use
 
 
 def validate_filter_params(filter_type: str, params: dict) -> Tuple[bool, str]:
@@ -158,6 +167,10 @@ def validate_frequency_params(params: dict) -> Tuple[bool, str]:
     return True, ""
 
 
+# Characters dropped from filenames: path separators and null bytes
+_UNSAFE_FILENAME_CHARS = str.maketrans('', '', '/\\\x00')
+
+
 def sanitize_filename(filename: str) -> str:
     """
     Sanitize a filename to prevent directory traversal attacks.
@@ -168,17 +181,6 @@ def sanitize_filename(filename: str) -> str:
     Returns:
         Sanitized filename
     """
-    # Remove path separators
-    filename = filename.replace('/', '').replace('\\', '')
-    
-    # Remove null bytes
-    filename = filename.replace('\x00', '')
-    
-    # Remove leading/trailing dots and spaces
-    filename = filename.strip('. ')
-    
-    # Ensure filename is not empty
-    if not filename:
-        filename = 'unnamed'
-    
-    return filename
+    # Remove path separators and null bytes in a single pass, then
+    # leading/trailing dots and spaces; fall back if nothing is left
+    return filename.translate(_UNSAFE_FILENAME_CHARS).strip('. ') or 'unnamed'
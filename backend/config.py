@@ -16,6 +16,22 @@ class Config:
     
     # CORS settings
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000').split(',')
+    CORS_SUPPORTS_CREDENTIALS = os.environ.get('CORS_SUPPORTS_CREDENTIALS', 'false').lower() == 'true'
+    
+    # Image metadata database; defaults to metadata.sqlite3 in UPLOAD_FOLDER
+    IMAGE_STORE_PATH = os.environ.get('IMAGE_STORE_PATH')
+    
+    # gzip and zstd levels for JSON responses; base64 payloads gain little
+    # from higher levels, while low ones keep compression far cheaper than the encode
+    GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 1))
+    ZSTD_LEVEL = int(os.environ.get('ZSTD_LEVEL', 3))
+    
+    # Publish decoded images to shared memory so other worker processes can
+    # map them instead of decoding; useful with several gunicorn workers
+    SHARED_IMAGE_CACHE = os.environ.get('SHARED_IMAGE_CACHE', 'false').lower() == 'true'
+    
+    # Batch concurrent JPEG decodes on a CUDA GPU with nvJPEG (needs torchvision)
+    GPU_JPEG_DECODE = os.environ.get('GPU_JPEG_DECODE', 'false').lower() == 'true'
     
     # Image processing settings
     MAX_IMAGE_DIMENSION = 4096
@@ -0,0 +1,23 @@
+"""
+Gunicorn settings for production deployment.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+One worker process per core sidesteps the GIL for decode and encode work,
+and a few threads per worker overlap uploads and responses with it.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = 120
+
+# No preload_app: each worker builds its own app after forking, since CUDA
+# contexts and SQLite connections opened in the master must not cross fork()
+
+# Each worker gets its own listening socket and the kernel spreads
+# connections between them instead of waking every worker on accept
+reuse_port = True
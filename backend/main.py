@@ -1,42 +1,41 @@
 """
 Main Flask application entry point with performance optimizations.
 """
-from flask import Flask, request, after_this_request
-from flask_cors import CORS
+from flask import Flask, request
 import os
 import gzip
-from io import BytesIO
-from functools import wraps
+import threading
+
+import zstandard
 
 from config import get_config
 from app.routes import register_routes
 from app.middleware.error_handler import register_error_handlers
 from app.middleware.cors_handler import configure_cors
+from app.middleware.json_provider import OrjsonProvider
+from app.stores import SQLiteMetadataStore
+from app.utils import gpu_jpeg, shared_images
 
 
-def gzip_response(f):
-    """Decorator to gzip responses larger than threshold."""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        @after_this_request
-        def compress(response):
-            if (response.status_code < 200 or 
-                response.status_code >= 300 or
-                'Content-Encoding' in response.headers or
-                len(response.get_data()) < 1024):  # Don't compress small responses
-                return response
-            
-            accept_encoding = request.headers.get('Accept-Encoding', '')
-            if 'gzip' not in accept_encoding.lower():
-                return response
-            
-            compressed = gzip.compress(response.get_data(), compresslevel=6)
-            response.set_data(compressed)
-            response.headers['Content-Encoding'] = 'gzip'
-            response.headers['Content-Length'] = len(compressed)
-            return response
-        return f(*args, **kwargs)
-    return decorated_function
+# One zstd compressor per thread; instances must not be shared concurrently
+_zstd_local = threading.local()
+
+
+def _is_static_path(path):
+    """Whether a route serves fixed listings (filter and noise types)."""
+    return path.endswith('/available') or path.endswith('/types')
+
+
+def _compress(data, encoding, config):
+    """Compress a body with gzip or zstd at the configured level."""
+    if encoding == 'zstd':
+        compressor = getattr(_zstd_local, 'compressor', None)
+        if compressor is None:
+            compressor = _zstd_local.compressor = zstandard.ZstdCompressor(
+                level=config.get('ZSTD_LEVEL', 3)
+            )
+        return compressor.compress(data)
+    return gzip.compress(data, compresslevel=config.get('GZIP_LEVEL', 1))
 
 
 def create_app(config_class=None):
@@ -58,11 +57,25 @@ def create_app(config_class=None):
     
     # Performance optimizations
     app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 31536000  # 1 year cache for static files
-    app.config['JSON_SORT_KEYS'] = False  # Faster JSON serialization
+    app.json = OrjsonProvider(app)  # orjson for jsonify and error payloads
+    app.json.sort_keys = False  # Skip key sorting on every response
+    app.json.compact = True  # No pretty-printing, even in debug mode
     
     # Ensure upload folder exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
+    # Image metadata shared by every worker serving this upload folder
+    store_path = app.config.get('IMAGE_STORE_PATH') or os.path.join(
+        app.config['UPLOAD_FOLDER'], 'metadata.sqlite3'
+    )
+    app.extensions['image_store'] = SQLiteMetadataStore(store_path)
+    
+    # Decoded images shared between worker processes through shared memory
+    shared_images.enable(app.config.get('SHARED_IMAGE_CACHE', False))
+    
+    # Concurrent JPEG decodes batched onto the GPU when one is available
+    gpu_jpeg.enable(app.config.get('GPU_JPEG_DECODE', False))
+    
     # Configure CORS
     configure_cors(app)
     
@@ -72,10 +85,13 @@ def create_app(config_class=None):
     # Register routes
     register_routes(app)
     
-    # Add gzip compression for large responses
+    # Compressed bodies of the fixed listings, built once per encoding
+    static_bodies = {}
+    
+    # Compress large JSON responses with zstd or gzip
     @app.after_request
     def compress_response(response):
-        """Compress large JSON responses with gzip."""
+        """Compress large JSON responses, preferring zstd over gzip."""
         if (response.status_code < 200 or 
             response.status_code >= 300 or
             'Content-Encoding' in response.headers or
@@ -83,17 +99,30 @@ def create_app(config_class=None):
             'application/json' not in response.content_type):
             return response
         
+        # Checked first, before get_data builds the body
+        if response.content_length is not None and response.content_length < 1024:
+            return response
         data = response.get_data()
         if len(data) < 1024:  # Don't compress small responses
             return response
         
-        accept_encoding = request.headers.get('Accept-Encoding', '')
-        if 'gzip' not in accept_encoding.lower():
+        accept_encoding = request.headers.get('Accept-Encoding', '').lower()
+        if 'zstd' in accept_encoding:
+            encoding = 'zstd'
+        elif 'gzip' in accept_encoding:
+            encoding = 'gzip'
+        else:
             return response
         
-        compressed = gzip.compress(data, compresslevel=6)
+        if _is_static_path(request.path):
+            key = (encoding, data)
+            compressed = static_bodies.get(key)
+            if compressed is None:
+                compressed = static_bodies[key] = _compress(data, encoding, app.config)
+        else:
+            compressed = _compress(data, encoding, app.config)
         response.set_data(compressed)
-        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Content-Encoding'] = encoding
         response.headers['Content-Length'] = len(compressed)
         response.headers['Vary'] = 'Accept-Encoding'
         return response
@@ -103,17 +132,15 @@ def create_app(config_class=None):
     def add_cache_headers(response):
         """Add caching headers to responses."""
         # Cache filter list and static data
-        if request.path.endswith('/available') or request.path.endswith('/types'):
+        if _is_static_path(request.path):
             response.headers['Cache-Control'] = 'public, max-age=3600'  # 1 hour
         return response
     
     return app
 
 
-# Create the application instance
-app = create_app()
-
-
 if __name__ == '__main__':
-    # Use threaded mode for better concurrent request handling
+    # Development server only; production runs under gunicorn (gunicorn.conf.py).
+    # Built here rather than at import, so importing create_app sets nothing up
+    app = create_app()
     app.run(host='0.0.0.0', port=5000, debug=True, threaded=True)
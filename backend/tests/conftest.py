@@ -0,0 +1,40 @@
+"""
+Shared pytest configuration.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Make the backend modules (main, config, app) importable from every test module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_addoption(parser):
+    """Add the --runslow option."""
+    parser.addoption(
+        '--runslow', action='store_true', default=False,
+        help='also run tests marked slow'
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip tests marked slow unless --runslow is given."""
+    if config.getoption('--runslow'):
+        return
+    skip_slow = pytest.mark.skip(reason='need --runslow option to run')
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip_slow)
+
+
+@pytest.fixture(scope='module')
+def rng():
+    """
+    Seeded random generator shared by a test module.
+    
+    Seeded per module rather than per session, so the data a module sees
+    does not depend on which other modules ran first in the same worker.
+    """
+    return np.random.default_rng(0)
@@ -2,22 +2,71 @@
 Tests for API endpoints.
 """
 import pytest
-import sys
-import os
 import io
+import os
+import base64
+import struct
+import zlib
 import numpy as np
-from PIL import Image
-
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from main import create_app
 from config import TestingConfig
+from app.utils.image_utils import read_image_size
+
+
+def assert_api(response, status, keys=(), error=None):
+    """
+    Check a JSON API response without parsing its body.
+    
+    The status is checked first, so a failing test reports the status
+    rather than a parse error on an unexpected body. Top-level keys and the
+    error message are looked up in the raw compact JSON.
+    
+    Args:
+        response: Test client response
+        status: Expected status code
+        keys: Keys the body must contain
+        error: Expected ``error`` message
+    """
+    assert response.status_code == status
+    for key in keys:
+        assert b'"%s":' % key.encode() in response.data
+    if error is not None:
+        assert b'"error":"%s"' % error.encode() in response.data
+
+
+def post_op(client, url, payload, expect=200, expect_keys=('result_image',)):
+    """
+    POST a JSON operation and check the status and top-level response keys.
+    
+    Returns:
+        The response, for further checks
+    """
+    response = client.post(url, json=payload)
+    assert_api(response, expect, expect_keys)
+    return response
+
+
+@pytest.fixture(scope='session')
+def testing_config(tmp_path_factory):
+    """Testing config with an upload folder private to this xdist worker."""
+    class WorkerTestingConfig(TestingConfig):
+        UPLOAD_FOLDER = str(tmp_path_factory.mktemp('uploads'))
+    return WorkerTestingConfig
+
+
+@pytest.fixture(scope='module')
+def app(testing_config):
+    """Create the test application once per module."""
+    app = create_app(testing_config)
+    app.config['TESTING'] = True
+    return app
 
 
 @pytest.fixture
-def app():
-    """Create test application."""
-    app = create_app(TestingConfig)
+def fresh_app(testing_config):
+    """Create an application of its own, for tests that register routes."""
+    app = create_app(testing_config)
     app.config['TESTING'] = True
     return app
 
@@ -28,22 +77,42 @@ def client(app):
     return app.test_client()
 
 
-@pytest.fixture
+def _make_png(width, height, rgb):
+    """Build a solid-color 8-bit RGB PNG from its chunks, without an encoder."""
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data +
+                struct.pack('>I', zlib.crc32(kind + data)))
+    
+    # Each scanline starts with filter type 0 (none)
+    row = b'\x00' + bytes(rgb) * width
+    return (b'\x89PNG\r\n\x1a\n' +
+            chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)) +
+            chunk(b'IDAT', zlib.compress(row * height)) +
+            chunk(b'IEND', b''))
+
+
+# 100x100 solid red; built by hand so the API tests never need an image encoder
+_PNG_BYTES = _make_png(100, 100, (255, 0, 0))
+
+
+@pytest.fixture(scope='session')
 def sample_image_bytes():
-    """Create sample image as bytes."""
-    img = Image.new('RGB', (100, 100), color='red')
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format='PNG')
-    img_bytes.seek(0)
-    return img_bytes
+    """Sample image as PNG bytes."""
+    return _PNG_BYTES
 
 
 @pytest.fixture
-def uploaded_image_id(client, sample_image_bytes):
+def sample_image_stream(sample_image_bytes):
+    """Fresh stream over the sample image for one upload."""
+    return io.BytesIO(sample_image_bytes)
+
+
+@pytest.fixture
+def uploaded_image_id(client, sample_image_stream):
     """Upload an image and return its ID."""
     response = client.post(
         '/api/images/upload',
-        data={'file': (sample_image_bytes, 'test.png')},
+        data={'file': (sample_image_stream, 'test.png')},
         content_type='multipart/form-data'
     )
     assert response.status_code == 201
@@ -61,14 +130,119 @@ class TestHealthCheck:
         assert data['status'] == 'healthy'
 
 
+class TestWsgi:
+    """Tests for the production entry point."""
+    
+    def test_import_does_not_build_app(self):
+        """Test importing the WSGI module defers creating the application."""
+        import importlib
+        
+        wsgi = importlib.import_module('backend.wsgi')
+        
+        assert 'app' not in vars(wsgi)
+        assert wsgi.get_app.cache_info().currsize == 0
+        with pytest.raises(AttributeError):
+            wsgi.application
+    
+    def test_main_import_does_not_build_app(self):
+        """Test importing the factory module builds no development app."""
+        import main
+        
+        assert 'app' not in vars(main)
+
+
+class TestCompression:
+    """Tests for response compression."""
+    
+    def test_large_json_gzipped(self, client, uploaded_image_id):
+        """Test large JSON bodies are gzipped when the client accepts it."""
+        import gzip
+        
+        response = client.get(
+            f'/api/histogram/{uploaded_image_id}',
+            headers={'Accept-Encoding': 'gzip'}
+        )
+        
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.headers['Vary'] == 'Accept-Encoding'
+        body = gzip.decompress(response.get_data())
+        assert b'histogram' in body
+    
+    def test_zstd_preferred(self, client, uploaded_image_id):
+        """Test clients accepting zstd get zstd even when gzip is also offered."""
+        import zstandard
+        
+        response = client.get(
+            f'/api/histogram/{uploaded_image_id}',
+            headers={'Accept-Encoding': 'gzip, deflate, br, zstd'}
+        )
+        
+        assert response.headers['Content-Encoding'] == 'zstd'
+        body = zstandard.ZstdDecompressor().decompress(response.get_data())
+        assert b'histogram' in body
+    
+    def test_static_listing_compressed_once(self, client):
+        """Test fixed listings reuse their compressed body across requests."""
+        import gzip
+        
+        responses = [
+            client.get('/api/filters/available', headers={'Accept-Encoding': 'gzip'})
+            for _ in range(2)
+        ]
+        
+        assert responses[0].headers['Content-Encoding'] == 'gzip'
+        assert responses[0].get_data() == responses[1].get_data()
+        assert b'filters' in gzip.decompress(responses[0].get_data())
+    
+    def test_not_gzipped_without_accept_encoding(self, client, uploaded_image_id):
+        """Test clients that do not accept gzip get plain JSON."""
+        response = client.get(f'/api/histogram/{uploaded_image_id}')
+        
+        assert 'Content-Encoding' not in response.headers
+        assert response.get_json()['success']
+
+
+class TestCors:
+    """Tests for CORS configuration."""
+    
+    def test_allowed_origin(self, client):
+        """Test configured origin is echoed back."""
+        response = client.get('/health', headers={'Origin': 'http://localhost:3000'})
+        
+        assert response.headers.get('Access-Control-Allow-Origin') == 'http://localhost:3000'
+    
+    def test_origin_prefix_rejected(self, client):
+        """Test origins that only share a prefix are not allowed."""
+        response = client.get('/health', headers={'Origin': 'http://localhost:3000.evil.com'})
+        
+        assert 'Access-Control-Allow-Origin' not in response.headers
+
+    def test_credentials_disabled_by_default(self, client):
+        """Test credentialed CORS is off unless configured."""
+        response = client.get('/health', headers={'Origin': 'http://localhost:3000'})
+        
+        assert 'Access-Control-Allow-Credentials' not in response.headers
+    
+    def test_cors_disabled(self):
+        """Test CORS setup is skipped when no origins are configured."""
+        class NoCorsConfig(TestingConfig):
+            CORS_ORIGINS = None
+
+        client = create_app(NoCorsConfig).test_client()
+        response = client.get('/health', headers={'Origin': 'http://localhost:3000'})
+
+        assert response.status_code == 200
+        assert 'Access-Control-Allow-Origin' not in response.headers
+
+
 class TestImageRoutes:
     """Tests for image routes."""
     
-    def test_upload_image(self, client, sample_image_bytes):
+    def test_upload_image(self, client, sample_image_stream):
         """Test image upload."""
         response = client.post(
             '/api/images/upload',
-            data={'file': (sample_image_bytes, 'test.png')},
+            data={'file': (sample_image_stream, 'test.png')},
             content_type='multipart/form-data'
         )
         
@@ -77,12 +251,46 @@ class TestImageRoutes:
         assert 'image_id' in data
         assert data['success'] == True
     
+    def test_upload_image_id_format(self, uploaded_image_id):
+        """Test image ids are 32-character hex tokens."""
+        assert len(uploaded_image_id) == 32
+        int(uploaded_image_id, 16)
+    
+    @pytest.mark.parametrize('filename,allowed', [
+        ('photo.png', True),
+        ('archive.tar.JPG', True),
+        ('photo.exe', False),
+        ('png', False),
+        ('photo.', False),
+    ])
+    def test_allowed_file(self, app, filename, allowed):
+        """Test extension checks use the last suffix, case-insensitively."""
+        from app.routes.image_routes import allowed_file
+        
+        with app.app_context():
+            assert allowed_file(filename) is allowed
+    
     def test_upload_no_file(self, client):
         """Test upload without file."""
         response = client.post('/api/images/upload')
         
         assert response.status_code == 400
     
+    def test_upload_undecodable(self, app, client, sample_image_stream, monkeypatch):
+        """Test files OpenCV cannot decode are rejected before being stored."""
+        from app.routes import image_routes
+        
+        monkeypatch.setattr(image_routes, 'decode_image', lambda data: None)
+        before = set(os.listdir(app.config['UPLOAD_FOLDER']))
+        response = client.post(
+            '/api/images/upload',
+            data={'file': (sample_image_stream, 'test.png')},
+            content_type='multipart/form-data'
+        )
+        
+        assert_api(response, 400, error='Failed to decode image')
+        assert set(os.listdir(app.config['UPLOAD_FOLDER'])) == before
+    
     def test_get_image(self, client, uploaded_image_id):
         """Test get image by ID."""
         response = client.get(f'/api/images/{uploaded_image_id}')
@@ -99,6 +307,24 @@ class TestImageRoutes:
         assert 'width' in data
         assert 'height' in data
     
+    def test_get_image_conditional(self, client, uploaded_image_id):
+        """Test image downloads are cacheable and revalidate with a 304."""
+        with client:
+            response = client.get(f'/api/images/{uploaded_image_id}', buffered=True)
+            
+            assert response.status_code == 200
+            assert response.headers['ETag'] == f'"{uploaded_image_id}"'
+            assert response.cache_control.public
+            assert response.cache_control.max_age == 3600
+            
+            revalidated = client.get(
+                f'/api/images/{uploaded_image_id}',
+                headers={'If-None-Match': response.headers['ETag']},
+                buffered=True
+            )
+            assert revalidated.status_code == 304
+            assert revalidated.get_data() == b''
+    
     def test_get_nonexistent_image(self, client):
         """Test get non-existent image."""
         response = client.get('/api/images/nonexistent-id')
@@ -107,13 +333,14 @@ class TestImageRoutes:
     
     def test_delete_image(self, client, uploaded_image_id):
         """Test delete image."""
-        response = client.delete(f'/api/images/{uploaded_image_id}')
-        
-        assert response.status_code == 200
-        
-        # Verify it's deleted
-        response = client.get(f'/api/images/{uploaded_image_id}')
-        assert response.status_code == 404
+        with client:
+            response = client.delete(f'/api/images/{uploaded_image_id}', buffered=True)
+            
+            assert response.status_code == 200
+            
+            # Verify it's deleted
+            response = client.get(f'/api/images/{uploaded_image_id}', buffered=True)
+            assert response.status_code == 404
     
     def test_list_images(self, client, uploaded_image_id):
         """Test list images."""
@@ -135,42 +362,18 @@ class TestHistogramRoutes:
         assert response.status_code == 200
         data = response.get_json()
         assert 'histogram' in data
+        assert set(data['histogram']) == {'blue', 'green', 'red'}
+        assert all(len(values) == 256 for values in data['histogram'].values())
+        assert sum(data['histogram']['blue']) == 100 * 100
     
-    def test_equalize_histogram(self, client, uploaded_image_id):
-        """Test histogram equalization."""
-        response = client.post(
-            '/api/histogram/equalize',
-            json={'image_id': uploaded_image_id, 'method': 'global'}
-        )
-        
-        assert response.status_code == 200
-        data = response.get_json()
-        assert 'result_image' in data
-    
-    def test_equalize_clahe(self, client, uploaded_image_id):
-        """Test CLAHE equalization."""
-        response = client.post(
-            '/api/histogram/equalize',
-            json={
-                'image_id': uploaded_image_id,
-                'method': 'clahe',
-                'clip_limit': 2.0,
-                'tile_size': 8
-            }
-        )
-        
-        assert response.status_code == 200
-    
-    def test_contrast_stretch(self, client, uploaded_image_id):
-        """Test contrast stretching."""
-        response = client.post(
-            '/api/histogram/stretch',
-            json={'image_id': uploaded_image_id}
-        )
-        
-        assert response.status_code == 200
-        data = response.get_json()
-        assert 'result_image' in data
+    @pytest.mark.parametrize('endpoint,payload', [
+        ('equalize', {'method': 'global'}),
+        ('equalize', {'method': 'clahe', 'clip_limit': 2.0, 'tile_size': 8}),
+        ('stretch', {}),
+    ], ids=['global', 'clahe', 'stretch'])
+    def test_histogram_operation(self, client, uploaded_image_id, endpoint, payload):
+        """Test equalization and contrast stretching return a result image."""
+        post_op(client, f'/api/histogram/{endpoint}', {'image_id': uploaded_image_id, **payload})
 
 
 class TestFilterRoutes:
@@ -185,45 +388,123 @@ class TestFilterRoutes:
         assert 'filters' in data
         assert 'blur' in data['filters']
     
-    def test_apply_blur_filter(self, client, uploaded_image_id):
-        """Test apply blur filter."""
-        response = client.post(
-            '/api/filters/apply',
-            json={
-                'image_id': uploaded_image_id,
-                'filter_type': 'blur',
-                'params': {'kernel_size': 5, 'sigma': 1.0}
-            }
-        )
+    @pytest.mark.parametrize('filter_type,params,expected_status,expected_keys', [
+        ('blur', {'kernel_size': 5, 'sigma': 1.0}, 200, ('result_image',)),
+        ('edge_canny', {'threshold1': 100, 'threshold2': 200}, 200, ('result_image',)),
+        ('invalid_filter', {}, 400, ('error',)),
+    ], ids=['blur', 'edge_canny', 'invalid'])
+    def test_apply_filter(self, client, uploaded_image_id, filter_type, params,
+                          expected_status, expected_keys):
+        """Test applying filters, and rejecting unknown ones."""
+        post_op(client, '/api/filters/apply', {
+            'image_id': uploaded_image_id,
+            'filter_type': filter_type,
+            'params': params
+        }, expect=expected_status, expect_keys=expected_keys)
+    
+    def test_apply_binary(self, client, uploaded_image_id):
+        """Test raw JPEG results and cache headers."""
+        payload = {'image_id': uploaded_image_id, 'filter_type': 'blur'}
         
-        assert response.status_code == 200
-        data = response.get_json()
-        assert 'result_image' in data
+        with client:
+            first = client.post('/api/filters/apply_binary', json=payload, buffered=True)
+            assert first.status_code == 200
+            assert first.mimetype == 'image/jpeg'
+            assert first.headers['X-Cache'] == 'MISS'
+            assert first.headers['X-Filter-Type'] == 'blur'
+            assert read_image_size(first.get_data()) == (100, 100)
+            
+            second = client.post('/api/filters/apply_binary', json=payload, buffered=True)
+            assert second.headers['X-Cache'] == 'HIT'
+            assert second.get_data() == first.get_data()
     
-    def test_apply_edge_detection(self, client, uploaded_image_id):
-        """Test apply edge detection."""
-        response = client.post(
-            '/api/filters/apply',
-            json={
-                'image_id': uploaded_image_id,
-                'filter_type': 'edge_canny',
-                'params': {'threshold1': 100, 'threshold2': 200}
-            }
+    def test_apply_binary_invalid_filter(self, client, uploaded_image_id):
+        """Test binary endpoint validation errors stay JSON."""
+        response = client.post('/api/filters/apply_binary', json={
+            'image_id': uploaded_image_id,
+            'filter_type': 'invalid_filter'
+        })
+        
+        assert_api(response, 400, keys=('error',))
+    
+    def test_preview_is_thumbnail(self, client):
+        """Test previews of large images are downsampled."""
+        img_bytes = io.BytesIO(_make_png(1200, 600, (0, 0, 255)))
+        upload = client.post(
+            '/api/images/upload',
+            data={'file': (img_bytes, 'large.png')},
+            content_type='multipart/form-data'
         )
+        image_id = upload.get_json()['image_id']
+        
+        response = client.post('/api/filters/preview', json={
+            'image_id': image_id,
+            'filter_type': 'median',
+            'params': {'kernel_size': 9}
+        })
         
         assert response.status_code == 200
+        preview = response.get_json()['preview_image'].split(',', 1)[1]
+        assert read_image_size(base64.b64decode(preview)) == (512, 256)
     
-    def test_apply_invalid_filter(self, client, uploaded_image_id):
-        """Test apply invalid filter."""
-        response = client.post(
-            '/api/filters/apply',
-            json={
-                'image_id': uploaded_image_id,
-                'filter_type': 'invalid_filter'
-            }
-        )
+    def test_preview_params_scaled(self):
+        """Test pixel-sized parameters shrink with the preview."""
+        from app.routes.filter_routes import _scale_preview_params
         
-        assert response.status_code == 400
+        scaled = _scale_preview_params('median', {'kernel_size': 21}, 0.25)
+        assert scaled['kernel_size'] == 5
+        scaled = _scale_preview_params('bilateral', {'d': -1}, 0.5)
+        assert scaled['d'] == -1
+        assert scaled['sigma_space'] == 37.5
+        assert _scale_preview_params('emboss', {}, 0.5) == {}
+    
+    def test_filter_cache_bounded_by_bytes(self, monkeypatch):
+        """Test large entries evict by total size, not just count."""
+        from app.routes import filter_routes
+        
+        monkeypatch.setattr(filter_routes, '_filter_cache', type(filter_routes._filter_cache)())
+        monkeypatch.setattr(filter_routes, '_filter_cache_bytes', 0)
+        monkeypatch.setattr(filter_routes, '_MAX_FILTER_CACHE_BYTES', 10)
+        
+        filter_routes._cache_result('a', 'x' * 4)
+        filter_routes._cache_result('b', b'y' * 4)
+        filter_routes._cache_result('a', 'x' * 5)
+        assert filter_routes._filter_cache_bytes == 9
+        
+        filter_routes._cache_result('c', 'z' * 3)
+        
+        assert filter_routes._get_cached_result('b') is None
+        assert filter_routes._get_cached_result('a') == 'x' * 5
+        assert filter_routes._filter_cache_bytes == 8
+    
+    def test_filter_cache_key_is_canonical(self):
+        """Test cache keys ignore dict ordering, including nested params."""
+        from app.routes.filter_routes import _get_filter_cache_key
+        
+        a = _get_filter_cache_key('img', 'custom', {'kernel': [[1, 2]], 'opts': {'x': 1, 'y': 2}})
+        b = _get_filter_cache_key('img', 'custom', {'opts': {'y': 2, 'x': 1}, 'kernel': [[1, 2]]})
+        c = _get_filter_cache_key('img', 'custom', {'kernel': [[2, 1]], 'opts': {'x': 1, 'y': 2}})
+        
+        assert a == b
+        assert a != c
+        assert len(a) == 32
+    
+    def test_filter_cache_evicts_least_recently_used(self, monkeypatch):
+        """Test cache hits refresh recency so hot entries survive eviction."""
+        from app.routes import filter_routes
+        
+        monkeypatch.setattr(filter_routes, '_filter_cache', type(filter_routes._filter_cache)())
+        monkeypatch.setattr(filter_routes, '_filter_cache_bytes', 0)
+        monkeypatch.setattr(filter_routes, '_MAX_FILTER_CACHE', 2)
+        
+        filter_routes._cache_result('a', 'A')
+        filter_routes._cache_result('b', 'B')
+        assert filter_routes._get_cached_result('a') == 'A'
+        filter_routes._cache_result('c', 'C')
+        
+        assert filter_routes._get_cached_result('a') == 'A'
+        assert filter_routes._get_cached_result('b') is None
+        assert filter_routes._get_cached_result('c') == 'C'
 
 
 class TestFourierRoutes:
@@ -231,32 +512,101 @@ class TestFourierRoutes:
     
     def test_compute_fft(self, client, uploaded_image_id):
         """Test FFT computation."""
+        post_op(client, '/api/fourier/transform', {'image_id': uploaded_image_id},
+                expect_keys=('magnitude_spectrum', 'phase_spectrum'))
+    
+    def test_compute_fft_linear_scale(self, client, uploaded_image_id):
+        """Test the linear magnitude visualization."""
         response = client.post(
             '/api/fourier/transform',
-            json={'image_id': uploaded_image_id}
+            json={'image_id': uploaded_image_id, 'log_scale': False}
         )
         
         assert response.status_code == 200
-        data = response.get_json()
-        assert 'magnitude_spectrum' in data
-        assert 'phase_spectrum' in data
+        assert response.get_json()['magnitude_spectrum'].startswith('data:image/png;base64,')
+    
+    def test_encoding_formats(self, client, uploaded_image_id):
+        """Test spectra stay lossless while photographic results use JPEG."""
+        fft = client.post('/api/fourier/transform', json={'image_id': uploaded_image_id})
+        assert fft.get_json()['magnitude_spectrum'].startswith('data:image/png;base64,')
+        
+        homomorphic = client.post('/api/fourier/homomorphic', json={'image_id': uploaded_image_id})
+        assert homomorphic.get_json()['result_image'].startswith('data:image/jpeg;base64,')
     
     def test_frequency_filter(self, client, uploaded_image_id):
         """Test frequency domain filter."""
-        response = client.post(
-            '/api/fourier/filter',
-            json={
-                'image_id': uploaded_image_id,
-                'filter_type': 'lowpass',
-                'cutoff': 0.3,
-                'filter_method': 'gaussian'
-            }
-        )
+        post_op(client, '/api/fourier/filter', {
+            'image_id': uploaded_image_id,
+            'filter_type': 'lowpass',
+            'cutoff': 0.3,
+            'filter_method': 'gaussian'
+        }, expect_keys=('result_image', 'filter_mask'))
+    
+    def test_frequency_filter_response_cached(self, client, uploaded_image_id):
+        """Test repeat requests are served from the response cache."""
+        from app.utils import response_cache
+        
+        payload = {'image_id': uploaded_image_id, 'filter_type': 'highpass', 'cutoff': 0.2}
+        with client:
+            first = client.post('/api/fourier/filter', json=payload, buffered=True)
+            assert first.status_code == 200
+            cached = len(response_cache.route_response_cache)
+            
+            second = client.post('/api/fourier/filter', json=payload, buffered=True)
+            assert second.status_code == 200
+            assert second.get_data() == first.get_data()
+            assert len(response_cache.route_response_cache) == cached
+            
+            payload['cutoff'] = 0.4
+            third = client.post('/api/fourier/filter', json=payload, buffered=True)
+            assert third.status_code == 200
+            assert len(response_cache.route_response_cache) == min(
+                cached + 1, response_cache._MAX_RESPONSE_CACHE
+            )
+    
+    def test_response_cache_byte_budget(self, client, uploaded_image_id, monkeypatch):
+        """Test cached bodies are evicted to stay within the byte budget."""
+        from app.utils import response_cache
+        
+        response_cache.clear_response_cache()
+        payload = {'image_id': uploaded_image_id, 'filter_type': 'lowpass', 'cutoff': 0.2}
+        with client:
+            first = client.post('/api/fourier/filter', json=payload, buffered=True)
+            assert first.status_code == 200
+            size = len(first.get_data())
+            monkeypatch.setattr(response_cache, '_MAX_RESPONSE_CACHE_BYTES', size + size // 2)
+            
+            payload['cutoff'] = 0.3
+            assert client.post('/api/fourier/filter', json=payload,
+                               buffered=True).status_code == 200
+        
+        assert len(response_cache.route_response_cache) == 1
+        assert response_cache._response_cache_bytes <= size + size // 2
+    
+    def test_stacked_decorators_parse_body_once(self, app, client, uploaded_image_id,
+                                                monkeypatch):
+        """Test cached_response and with_image share one parse of the body."""
+        import orjson
+        from types import SimpleNamespace
+        from app.utils import route_helpers
+        
+        calls = []
+        
+        def loads(data):
+            calls.append(data)
+            return orjson.loads(data)
+        
+        monkeypatch.setattr(route_helpers, 'orjson', SimpleNamespace(
+            loads=loads, JSONDecodeError=orjson.JSONDecodeError
+        ))
+        response = client.post('/api/fourier/transform', json={'image_id': uploaded_image_id})
         
         assert response.status_code == 200
-        data = response.get_json()
-        assert 'result_image' in data
-        assert 'filter_mask' in data
+        assert len(calls) == 1
+        
+        with app.test_request_context(json={'image_id': uploaded_image_id}):
+            assert route_helpers.request_json() is route_helpers.request_json()
+        assert len(calls) == 2
     
     def test_get_available_frequency_filters(self, client):
         """Test get available frequency filters."""
@@ -279,59 +629,211 @@ class TestNoiseRoutes:
         assert 'noise_types' in data
         assert 'gaussian' in data['noise_types']
     
-    def test_add_gaussian_noise(self, client, uploaded_image_id):
-        """Test add Gaussian noise."""
+    def test_get_denoise_methods(self, client):
+        """Test the precomputed denoise method listing."""
+        from app.routes.noise_routes import DENOISE_METHODS
+        
+        response = client.get('/api/noise/denoise-methods')
+        
+        assert response.status_code == 200
+        assert response.get_json() == {'success': True, 'denoise_methods': DENOISE_METHODS}
+    
+    @pytest.mark.parametrize('noise_type,params', [
+        ('gaussian', {'mean': 0, 'std': 25}),
+        ('salt_pepper', {'amount': 0.05}),
+    ], ids=['gaussian', 'salt_pepper'])
+    def test_add_noise(self, client, uploaded_image_id, noise_type, params):
+        """Test adding each noise type."""
+        post_op(client, '/api/noise/add', {
+            'image_id': uploaded_image_id,
+            'noise_type': noise_type,
+            'params': params
+        })
+    
+    def test_remove_noise(self, client, uploaded_image_id):
+        """Test remove noise."""
+        post_op(client, '/api/noise/remove', {
+            'image_id': uploaded_image_id,
+            'method': 'median',
+            'params': {'kernel_size': 5}
+        })
+    
+    def test_estimate_noise(self, client, uploaded_image_id):
+        """Test estimate noise level."""
+        post_op(client, '/api/noise/estimate', {'image_id': uploaded_image_id, 'method': 'mad'},
+                expect_keys=('noise_level',))
+    
+    @pytest.mark.parametrize('body,status,error', [
+        ({}, 400, 'image_id is required'),
+        ({'image_id': 'missing'}, 400, 'noise_type is required'),
+        ({'image_id': 'missing', 'noise_type': 'gaussian'}, 404, 'Image not found'),
+    ])
+    def test_add_noise_errors(self, client, body, status, error):
+        """Test request validation shared by the noise routes."""
+        response = client.post('/api/noise/add', json=body)
+        
+        assert_api(response, status, error=error)
+    
+    def test_noise_route_rejects_malformed_json(self, client):
+        """Test an unparseable body is reported like a missing image_id."""
         response = client.post(
-            '/api/noise/add',
-            json={
-                'image_id': uploaded_image_id,
-                'noise_type': 'gaussian',
-                'params': {'mean': 0, 'std': 25}
-            }
+            '/api/noise/estimate', data=b'{not json', content_type='application/json'
         )
         
-        assert response.status_code == 200
-        data = response.get_json()
-        assert 'result_image' in data
+        assert_api(response, 400, error='image_id is required')
     
-    def test_add_salt_pepper_noise(self, client, uploaded_image_id):
-        """Test add salt and pepper noise."""
+    def test_compare_denoising(self, client, uploaded_image_id):
+        """Test compare runs each known method once, in request order."""
         response = client.post(
-            '/api/noise/add',
+            '/api/noise/compare',
             json={
                 'image_id': uploaded_image_id,
-                'noise_type': 'salt_pepper',
-                'params': {'amount': 0.05}
+                'methods': ['median', 'unknown', 'gaussian', 'median', 'bilateral']
             }
         )
         
         assert response.status_code == 200
+        results = response.get_json()['results']
+        assert list(results) == ['median', 'gaussian', 'bilateral']
+        for entry in results.values():
+            assert entry['result_image'].startswith('data:image/')
     
-    def test_remove_noise(self, client, uploaded_image_id):
-        """Test remove noise."""
+    def test_compare_denoising_mosaic(self, client, uploaded_image_id):
+        """Test mosaic mode returns one image whose tiles match the per-method results."""
+        from app.utils.image_utils import base64_to_image
+        
+        methods = ['median', 'gaussian', 'bilateral']
+        separate = client.post(
+            '/api/noise/compare',
+            json={'image_id': uploaded_image_id, 'methods': methods}
+        ).get_json()
         response = client.post(
-            '/api/noise/remove',
-            json={
-                'image_id': uploaded_image_id,
-                'method': 'median',
-                'params': {'kernel_size': 5}
-            }
+            '/api/noise/compare',
+            json={'image_id': uploaded_image_id, 'methods': methods, 'mosaic': True}
         )
         
         assert response.status_code == 200
         data = response.get_json()
-        assert 'result_image' in data
+        assert list(data['layout']) == methods
+        assert all('result_image' not in entry for entry in data['results'].values())
+        
+        mosaic = base64_to_image(data['mosaic_image'])
+        for method, rect in data['layout'].items():
+            tile = mosaic[rect['y']:rect['y'] + rect['height'], rect['x']:rect['x'] + rect['width']]
+            expected = base64_to_image(separate['results'][method]['result_image'])
+            assert tile.shape == expected.shape
     
-    def test_estimate_noise(self, client, uploaded_image_id):
-        """Test estimate noise level."""
+    def test_compare_denoising_stream(self, client, uploaded_image_id):
+        """Test streaming mode sends one event per method, then a done event."""
+        import json
+        
         response = client.post(
-            '/api/noise/estimate',
-            json={'image_id': uploaded_image_id, 'method': 'mad'}
+            '/api/noise/compare',
+            json={'image_id': uploaded_image_id, 'methods': ['median', 'gaussian'], 'stream': True}
         )
         
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        events = response.get_data(as_text=True).strip().split('\n\n')
+        results = [json.loads(event[len('data: '):]) for event in events[:-1]]
+        assert sorted(result['method'] for result in results) == ['gaussian', 'median']
+        assert all(result['result_image'].startswith('data:image/') for result in results)
+        assert events[-1].startswith('event: done')
+
+
+class TestPipelineRoutes:
+    """Tests for running several operations in one request."""
+    
+    @pytest.mark.parametrize('ops', [
+        [{'op': 'filter', 'filter_type': 'blur', 'params': {'kernel_size': 5}}],
+        [{'op': 'equalize', 'method': 'clahe'}, {'op': 'stretch'}],
+        [{'op': 'add_noise', 'noise_type': 'gaussian'}, {'op': 'denoise', 'method': 'median'},
+         {'op': 'filter', 'filter_type': 'edge_canny'}],
+    ], ids=['blur', 'equalize_stretch', 'noise_denoise_edges'])
+    def test_pipeline_inline_image(self, client, sample_image_bytes, ops):
+        """Test a chain runs on an image sent inline, in a single request."""
+        response = client.post('/api/pipeline', json={
+            'image': base64.b64encode(sample_image_bytes).decode(),
+            'ops': ops
+        })
+        
         assert response.status_code == 200
         data = response.get_json()
-        assert 'noise_level' in data
+        assert data['ops'] == [step['op'] for step in ops]
+        assert (data['width'], data['height']) == (100, 100)
+        assert data['result_image'].startswith('data:image/')
+    
+    def test_pipeline_stored_image(self, client, uploaded_image_id):
+        """Test steps run on an uploaded image and return a decodable result."""
+        from app.utils.image_utils import base64_to_image
+        
+        response = client.post('/api/pipeline', json={
+            'image_id': uploaded_image_id,
+            'ops': [{'op': 'filter', 'filter_type': 'median', 'params': {'kernel_size': 3}}]
+        })
+        
+        assert response.status_code == 200
+        result = base64_to_image(response.get_json()['result_image'])
+        assert result.shape == (100, 100, 3)
+        # Median filtering leaves the solid red sample red (BGR order)
+        assert np.abs(result.astype(int) - [0, 0, 255]).max() <= 2
+    
+    def test_pipeline_multipart_upload(self, client, sample_image_stream):
+        """Test raw file bytes and the op list can be posted as a form."""
+        response = client.post(
+            '/api/pipeline',
+            data={'file': (sample_image_stream, 'test.png'),
+                  'ops': '[{"op": "filter", "filter_type": "sharpen"}]'},
+            content_type='multipart/form-data'
+        )
+        
+        assert response.status_code == 200
+        assert response.get_json()['ops'] == ['filter']
+    
+    def test_pipeline_multipart_undecodable(self, client, sample_image_stream, monkeypatch):
+        """Test a file that validates but cannot be decoded is a client error."""
+        from app.routes import pipeline_routes
+        
+        monkeypatch.setattr(pipeline_routes, 'decode_image', lambda data: None)
+        response = client.post(
+            '/api/pipeline',
+            data={'file': (sample_image_stream, 'test.png'), 'ops': '[{"op": "stretch"}]'},
+            content_type='multipart/form-data'
+        )
+        
+        assert_api(response, 400, error='Failed to decode image')
+    
+    @pytest.mark.parametrize('body,status,error', [
+        ({'image_id': 'missing', 'ops': [{'op': 'stretch'}]}, 404, 'Image not found'),
+        ({'ops': [{'op': 'stretch'}]}, 400, 'image_id or image is required'),
+        ({'image': 'bm90IGFuIGltYWdl', 'ops': [{'op': 'stretch'}]}, 400, 'Invalid image data'),
+    ])
+    def test_pipeline_source_errors(self, client, body, status, error):
+        """Test missing or undecodable images are rejected."""
+        response = client.post('/api/pipeline', json=body)
+        
+        assert_api(response, status, error=error)
+    
+    @pytest.mark.parametrize('ops,error', [
+        ([], 'ops must be a non-empty list'),
+        ([{'op': 'rotate'}], 'Unknown op at step 0: rotate'),
+        ([{'op': 'stretch'}, {'op': 'filter', 'filter_type': 'nope'}],
+         'Step 1: Unknown filter type: nope'),
+        ([{'op': 'stretch'}] * 17, 'At most 16 ops are allowed'),
+        ([{'op': ['filter']}], "Unknown op at step 0: ['filter']"),
+        ([{'op': 'add_noise', 'noise_type': ['gaussian']}],
+         "Step 0: Unknown noise type: ['gaussian']"),
+        ([{'op': 'denoise', 'method': {'median': 1}}],
+         "Step 0: Unknown denoising method: {'median': 1}"),
+        ([{'op': 'filter', 'filter_type': 'median', 'params': [3]}],
+         'Step 0: params must be an object'),
+    ], ids=['empty', 'unknown_op', 'unknown_filter', 'too_many', 'list_op',
+            'list_noise_type', 'dict_method', 'list_params'])
+    def test_pipeline_invalid_ops(self, client, uploaded_image_id, ops, error):
+        """Test the op list is validated before any step runs."""
+        response = client.post('/api/pipeline', json={'image_id': uploaded_image_id, 'ops': ops})
+        
+        assert_api(response, 400, error=error)
 
 
 class TestErrorHandling:
@@ -342,6 +844,69 @@ class TestErrorHandling:
         response = client.get('/api/nonexistent/endpoint')
         
         assert response.status_code == 404
+        data = response.get_json()
+        assert data['error'] == 'Not Found'
+        assert data['status_code'] == 404
+    
+    def test_404_head_error(self, client):
+        """Test HEAD 404 advertises the body length without sending it."""
+        expected = client.get('/api/nonexistent/endpoint')
+        response = client.head('/api/nonexistent/endpoint')
+        
+        assert response.status_code == 404
+        assert response.data == b''
+        assert response.content_length == len(expected.data)
+    
+    def test_405_error(self, client):
+        """Test 405 error response."""
+        response = client.delete('/api/filters/available')
+        
+        assert_api(response, 405, error='Method Not Allowed')
+    
+    @pytest.mark.parametrize('url', [
+        '/api/fourier/transform', '/api/fourier/inverse', '/api/fourier/filter',
+        '/api/fourier/homomorphic', '/api/histogram/equalize', '/api/histogram/stretch',
+    ])
+    @pytest.mark.parametrize('body,status,error', [
+        ({}, 400, 'image_id is required'),
+        ({'image_id': 'missing'}, 404, 'Image not found'),
+    ])
+    def test_image_route_errors(self, client, url, body, status, error):
+        """Test routes taking an image_id share the with_image error responses."""
+        assert_api(client.post(url, json=body), status, error=error)
+
+    def test_validation_error(self, fresh_app):
+        """Test ValidationError responses include the offending field."""
+        from app.middleware.error_handler import ValidationError
+        
+        def invalid_view():
+            raise ValidationError('Value "x" is invalid', field='kernel_size')
+        
+        fresh_app.add_url_rule('/test/invalid', view_func=invalid_view)
+        response = fresh_app.test_client().get('/test/invalid')
+        
+        assert response.status_code == 422
+        data = response.get_json()
+        assert data['error'] == 'Validation Error'
+        assert data['message'] == 'Value "x" is invalid'
+        assert data['field'] == 'kernel_size'
+    
+    def test_image_processing_error(self, fresh_app):
+        """Test ImageProcessingError responses use the raised status code."""
+        from app.middleware.error_handler import ImageProcessingError
+        
+        def failing_view():
+            raise ImageProcessingError('Cannot decode image', status_code=415)
+        
+        fresh_app.add_url_rule('/test/failing', view_func=failing_view)
+        response = fresh_app.test_client().get('/test/failing')
+        
+        assert response.status_code == 415
+        assert response.get_json() == {
+            'error': 'Image Processing Error',
+            'message': 'Cannot decode image',
+            'status_code': 415
+        }
     
     def test_invalid_json(self, client, uploaded_image_id):
         """Test invalid JSON handling."""
@@ -352,6 +917,20 @@ class TestErrorHandling:
         )
         
         assert response.status_code in [400, 415, 500]
+    
+    def test_400_error_body(self, client):
+        """Test 400 error response carries the error description."""
+        response = client.post(
+            '/api/filters/apply',
+            data='invalid json',
+            content_type='application/json'
+        )
+        
+        assert response.status_code == 400
+        data = response.get_json()
+        assert data['error'] == 'Bad Request'
+        assert data['status_code'] == 400
+        assert data['message']
 
 
 if __name__ == '__main__':
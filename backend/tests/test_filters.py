@@ -3,35 +3,36 @@ Tests for filter operations.
 """
 import pytest
 import numpy as np
-import sys
-import os
-
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import cv2
 
 from app.models.ImageProcessor import ImageProcessor
 
 
-@pytest.fixture
+@pytest.fixture(scope='module')
 def test_image():
-    """Create a test image with known pattern."""
-    # Create checkerboard pattern
-    image = np.zeros((100, 100, 3), dtype=np.uint8)
-    for i in range(10):
-        for j in range(10):
-            if (i + j) % 2 == 0:
-                image[i*10:(i+1)*10, j*10:(j+1)*10] = [255, 255, 255]
+    """Create a test image with known pattern; read-only, copy to modify."""
+    # Checkerboard of 10x10 pixel tiles, white where row + column is even
+    tiles = (np.add.outer(np.arange(10), np.arange(10)) % 2 == 0).astype(np.uint8) * 255
+    board = np.kron(tiles, np.ones((10, 10), dtype=np.uint8))
+    image = np.repeat(board[:, :, np.newaxis], 3, axis=2)
+    image.flags.writeable = False
     return image
 
 
-@pytest.fixture
-def noisy_image():
-    """Create a noisy test image."""
-    base = np.full((100, 100, 3), 128, dtype=np.uint8)
-    noise = np.random.normal(0, 25, base.shape).astype(np.int16)
-    noisy = np.clip(base.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+@pytest.fixture(scope='module')
+def noisy_image(rng):
+    """Create a noisy test image; read-only, copy to modify."""
+    noisy = np.clip(rng.normal(128, 25, (100, 100, 3)), 0, 255).astype(np.uint8)
+    noisy.flags.writeable = False
     return noisy
 
 
+@pytest.fixture
+def processor(test_image):
+    """Processor over the checkerboard image."""
+    return ImageProcessor(test_image)
+
+
 class TestBlurFilters:
     """Tests for blur filters."""
     
@@ -43,23 +44,21 @@ class TestBlurFilters:
         # Standard deviation should decrease after blurring
         assert np.std(blurred) <= np.std(noisy_image)
     
-    def test_box_blur(self, test_image):
+    def test_box_blur(self, processor, test_image):
         """Test box blur."""
-        processor = ImageProcessor(test_image)
         blurred = processor.box_blur(kernel_size=5)
         
         assert blurred.shape == test_image.shape
         # Edges should be less sharp
         assert np.std(blurred) < np.std(test_image)
     
-    def test_median_filter_salt_pepper(self):
+    def test_median_filter_salt_pepper(self, rng):
         """Test median filter on salt and pepper noise."""
         # Create image with salt and pepper noise
         image = np.full((100, 100), 128, dtype=np.uint8)
-        # Add salt
-        image[np.random.rand(100, 100) < 0.05] = 255
-        # Add pepper
-        image[np.random.rand(100, 100) < 0.05] = 0
+        salt, pepper = rng.random((2, 100, 100)) < 0.05
+        image[salt] = 255
+        image[pepper] = 0
         
         processor = ImageProcessor(image)
         filtered = processor.median_filter(kernel_size=3)
@@ -68,9 +67,9 @@ class TestBlurFilters:
         assert np.sum(filtered == 255) < np.sum(image == 255)
         assert np.sum(filtered == 0) < np.sum(image == 0)
     
-    def test_bilateral_preserves_edges(self, test_image):
+    @pytest.mark.slow
+    def test_bilateral_preserves_edges(self, processor):
         """Test that bilateral filter preserves edges."""
-        processor = ImageProcessor(test_image)
         filtered = processor.bilateral_filter(d=9, sigma_color=75, sigma_space=75)
         
         # Calculate edge strength in both
@@ -80,16 +79,23 @@ class TestBlurFilters:
         edges_filtered = processor_filtered.sobel_edge_detection()
         
         # Edge strength should be similar (bilateral preserves edges)
-        edge_ratio = np.sum(edges_filtered) / np.sum(edges_orig)
+        edge_ratio = float(edges_filtered.mean()) / max(float(edges_orig.mean()), 1e-9)
         assert 0.5 < edge_ratio < 1.5
+    
+    @pytest.mark.parametrize('kernel_size,sigma', [(3, 0), (5, 1.0), (9, 2.0), (25, 0)])
+    def test_gaussian_blur_matches_opencv(self, noisy_image, kernel_size, sigma):
+        """Test the separable blur tracks cv2.GaussianBlur within rounding."""
+        result = ImageProcessor(noisy_image).gaussian_blur(kernel_size, sigma)
+        expected = cv2.GaussianBlur(noisy_image, (kernel_size, kernel_size), sigma)
+        
+        assert np.abs(result.astype(int) - expected).max() <= 1
 
 
 class TestEdgeDetection:
     """Tests for edge detection filters."""
     
-    def test_sobel_detects_edges(self, test_image):
+    def test_sobel_detects_edges(self, processor):
         """Test Sobel edge detection on checkerboard."""
-        processor = ImageProcessor(test_image)
         edges = processor.sobel_edge_detection(ksize=3)
         
         # Should detect edges at checkerboard boundaries
@@ -97,16 +103,14 @@ class TestEdgeDetection:
         # Result should be grayscale
         assert len(edges.shape) == 2
     
-    def test_laplacian_detects_edges(self, test_image):
+    def test_laplacian_detects_edges(self, processor):
         """Test Laplacian edge detection."""
-        processor = ImageProcessor(test_image)
         edges = processor.laplacian_edge_detection(ksize=3)
         
         assert np.max(edges) > 0
     
-    def test_canny_detects_edges(self, test_image):
+    def test_canny_detects_edges(self, processor):
         """Test Canny edge detection."""
-        processor = ImageProcessor(test_image)
         edges = processor.canny_edge_detection(threshold1=50, threshold2=150)
         
         # Canny produces binary edges
@@ -127,38 +131,62 @@ class TestSharpeningFilters:
         
         # Calculate local variance as measure of sharpness
         def local_variance(img):
-            return np.mean(np.abs(np.diff(img.astype(float), axis=0)))
+            return cv2.absdiff(img[1:], img[:-1]).mean()
         
         # Sharpened image should have higher local variance
         assert local_variance(sharpened) >= local_variance(blurred) * 0.9
     
-    def test_unsharp_mask(self, test_image):
+    def test_unsharp_mask(self, processor, test_image):
         """Test unsharp mask."""
-        processor = ImageProcessor(test_image)
         sharpened = processor.unsharp_mask(sigma=1.0, strength=1.5, threshold=0)
         
         assert sharpened.shape == test_image.shape
+    
+    def test_unsharp_mask_threshold(self, noisy_image):
+        """Test low-contrast pixels are left untouched by the threshold."""
+        blurred = cv2.GaussianBlur(noisy_image, (0, 0), 1.0)
+        low_contrast = np.abs(noisy_image.astype(int) - blurred) < 10
+        
+        sharpened = ImageProcessor(noisy_image).unsharp_mask(sigma=1.0, strength=1.5, threshold=10)
+        
+        assert np.array_equal(sharpened[low_contrast], noisy_image[low_contrast])
 
 
 class TestCustomKernels:
     """Tests for custom kernel operations."""
     
-    def test_identity_kernel(self, test_image):
+    def test_identity_kernel(self, processor, test_image):
         """Test identity kernel produces same image."""
-        processor = ImageProcessor(test_image)
         identity = np.array([[0, 0, 0], [0, 1, 0], [0, 0, 0]], dtype=np.float32)
         result = processor.apply_custom_kernel(identity)
         
         np.testing.assert_array_almost_equal(result, test_image, decimal=5)
     
-    def test_custom_blur_kernel(self, test_image):
+    def test_custom_blur_kernel(self, processor, test_image):
         """Test custom averaging kernel."""
-        processor = ImageProcessor(test_image)
         blur_kernel = np.ones((3, 3), dtype=np.float32) / 9
         result = processor.apply_custom_kernel(blur_kernel)
         
         # Should produce blurring effect
         assert np.std(result) <= np.std(test_image)
+    
+    @pytest.mark.parametrize('kernel', [
+        np.outer([1, 2, 1], [1, 0, -1]).astype(np.float32),
+        np.outer([1, 4, 6, 4, 1], [1, 4, 6, 4, 1]).astype(np.float32) / 256,
+        np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float32),
+    ])
+    def test_custom_kernel_matches_filter2d(self, noisy_image, kernel):
+        """Test separable and non-separable kernels match cv2.filter2D."""
+        result = ImageProcessor(noisy_image).apply_custom_kernel(kernel)
+        
+        np.testing.assert_array_equal(result, cv2.filter2D(noisy_image, -1, kernel))
+    
+    def test_sharpen_matches_kernel(self, noisy_image):
+        """Test sharpen equals the documented 3x3 sharpening kernel."""
+        kernel = np.array([[0, -1, 0], [-1, 6, -1], [0, -1, 0]], dtype=np.float32)
+        result = ImageProcessor(noisy_image).sharpen(strength=1.0)
+        
+        np.testing.assert_array_equal(result, cv2.filter2D(noisy_image, -1, kernel))
 
 
 class TestFilterEdgeCases:
@@ -195,5 +223,99 @@ class TestFilterEdgeCases:
         assert processor.sharpen(1.0).shape == gray.shape
 
 
+
+class TestFilterFunctions:
+    """Tests for the stateless filter functions behind ImageProcessor."""
+    
+    @pytest.mark.parametrize('name,args', [
+        ('gaussian_blur', (5, 1.0)),
+        ('box_blur', (5,)),
+        ('median_filter', (5,)),
+        ('sobel_edge_detection', (3,)),
+        ('canny_edge_detection', (100, 200)),
+        ('calculate_histogram', ()),
+        ('clahe_equalization', (2.0, (8, 8))),
+    ])
+    def test_matches_processor(self, noisy_image, name, args):
+        """Test each function matches the ImageProcessor method it backs."""
+        from app.models import filters
+        
+        expected = getattr(ImageProcessor(noisy_image), name)(*args)
+        result = getattr(filters, name)(noisy_image, *args)
+        
+        if isinstance(expected, dict):
+            assert result == expected
+        else:
+            assert np.array_equal(result, expected)
+    
+    @pytest.mark.parametrize('name', ['histogram_equalization', 'clahe_equalization'])
+    @pytest.mark.parametrize('color', [False, True])
+    def test_equalization_returns_histogram(self, noisy_image, name, color):
+        """Test return_hist gives the same image and the histogram of the output."""
+        from app.models import filters
+        
+        image = noisy_image if color else cv2.cvtColor(noisy_image, cv2.COLOR_BGR2GRAY)
+        result, histogram = getattr(filters, name)(image, return_hist=True)
+        
+        assert np.array_equal(result, getattr(filters, name)(image))
+        assert histogram == filters.calculate_histogram(result)
+    
+    def test_equalization_matches_opencv(self):
+        """Test the table-based grayscale path matches cv2.equalizeHist."""
+        from app.models import filters
+        
+        rng = np.random.default_rng(0)
+        for shape in [(1, 1), (37, 53), (128, 96)]:
+            image = rng.normal(100, 30, shape).clip(0, 255).astype(np.uint8)
+            result, _ = filters.histogram_equalization(image, return_hist=True)
+            assert np.array_equal(result, cv2.equalizeHist(image))
+
+
+class TestFilterDispatch:
+    """Tests for the route-level filter dispatch table."""
+    
+    def test_every_filter_dispatches(self, test_image):
+        """Test each advertised filter runs with its defaults."""
+        from app.routes.filter_routes import AVAILABLE_FILTERS, apply_filter_to_image
+        
+        for filter_type in AVAILABLE_FILTERS:
+            result = apply_filter_to_image(test_image, filter_type, {})
+            assert result.shape[:2] == test_image.shape[:2]
+    
+    def test_params_override_defaults(self, test_image):
+        """Test request params override defaults without mutating them."""
+        from app.routes.filter_routes import AVAILABLE_FILTERS, apply_filter_to_image
+        
+        result = apply_filter_to_image(test_image, 'box_blur', {'kernel_size': 3})
+        
+        assert np.array_equal(result, cv2.blur(test_image, (3, 3)))
+        assert AVAILABLE_FILTERS['box_blur']['defaults'] == {'kernel_size': 5}
+    
+    def test_unknown_filter_raises(self, test_image):
+        """Test unknown filter types are rejected."""
+        from app.routes.filter_routes import apply_filter_to_image
+        
+        with pytest.raises(ValueError):
+            apply_filter_to_image(test_image, 'nope', {})
+    
+    @pytest.mark.parametrize('filter_type,params', [
+        ('bilateral', {'d': 9}),
+        ('median', {'kernel_size': 7}),
+        ('edge_canny', {}),
+    ])
+    def test_opencl_path_matches_cpu(self, test_image, monkeypatch, filter_type, params):
+        """Test the UMat path returns the same array as the CPU path."""
+        from app.models import filters
+        from app.routes.filter_routes import apply_filter_to_image
+        
+        monkeypatch.setattr(filters, 'opencl_available', lambda: False)
+        expected = apply_filter_to_image(test_image, filter_type, params)
+        monkeypatch.setattr(filters, 'opencl_available', lambda: True)
+        result = apply_filter_to_image(test_image, filter_type, params)
+        
+        assert isinstance(result, np.ndarray)
+        assert np.array_equal(result, expected)
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
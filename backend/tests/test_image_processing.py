@@ -4,33 +4,32 @@ Tests for ImageProcessor class.
 import pytest
 import numpy as np
 import cv2
-import sys
 import os
 
-# Add parent directory to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from app.models.ImageProcessor import ImageProcessor
 
 
-@pytest.fixture
-def sample_grayscale_image():
-    """Create a sample grayscale test image."""
-    return np.random.randint(0, 256, (100, 100), dtype=np.uint8)
+@pytest.fixture(scope='module')
+def sample_grayscale_image(rng):
+    """Create a sample grayscale test image; read-only, copy to modify."""
+    image = rng.integers(0, 256, (100, 100), dtype=np.uint8)
+    image.flags.writeable = False
+    return image
 
 
-@pytest.fixture
-def sample_color_image():
-    """Create a sample color test image."""
-    return np.random.randint(0, 256, (100, 100, 3), dtype=np.uint8)
+@pytest.fixture(scope='module')
+def sample_color_image(rng):
+    """Create a sample color test image; read-only, copy to modify."""
+    image = rng.integers(0, 256, (100, 100, 3), dtype=np.uint8)
+    image.flags.writeable = False
+    return image
 
 
-@pytest.fixture
+@pytest.fixture(scope='module')
 def gradient_image():
-    """Create a gradient test image."""
-    gradient = np.zeros((100, 100), dtype=np.uint8)
-    for i in range(100):
-        gradient[:, i] = int(i * 255 / 99)
+    """Create a gradient test image; read-only, copy to modify."""
+    gradient = np.tile(np.linspace(0, 255, 100, dtype=np.uint8), (100, 1))
+    gradient.flags.writeable = False
     return gradient
 
 
@@ -49,12 +48,40 @@ class TestImageProcessorInit:
         assert processor.is_color == True
         assert processor.image.shape == (100, 100, 3)
     
+    def test_init_shares_image_read_only(self, sample_color_image):
+        """Test that initialization shares the buffer through a read-only view."""
+        image = sample_color_image.copy()
+        processor = ImageProcessor(image)
+        
+        assert np.shares_memory(processor.image, image)
+        with pytest.raises(ValueError):
+            processor.image[0, 0] = [0, 0, 0]
+        # The caller's array stays writable
+        assert image.flags.writeable
+    
     def test_init_copies_image(self, sample_color_image):
-        """Test that initialization creates a copy."""
-        processor = ImageProcessor(sample_color_image)
+        """Test that optimize_memory=False creates a private copy."""
+        processor = ImageProcessor(sample_color_image, optimize_memory=False)
+        
+        assert processor.image is not sample_color_image
+        assert processor.image.ctypes.data != sample_color_image.ctypes.data
+        assert processor.image.base is None
+        # The copy is writable even though the fixture is not
         processor.image[0, 0] = [0, 0, 0]
-        assert not np.array_equal(processor.image, sample_color_image) or \
-               np.array_equal(sample_color_image[0, 0], [0, 0, 0])
+    
+    def test_grayscale_cached_read_only(self, sample_color_image):
+        """Test the grayscale conversion is computed once and read-only."""
+        processor = ImageProcessor(sample_color_image)
+        gray = processor.to_grayscale()
+        
+        assert processor.to_grayscale() is gray
+        assert not gray.flags.writeable
+    
+    def test_grayscale_input_not_copied(self, sample_grayscale_image):
+        """Test grayscale input is returned without a copy."""
+        gray = ImageProcessor(sample_grayscale_image).to_grayscale()
+        
+        assert np.shares_memory(gray, sample_grayscale_image)
 
 
 class TestHistogramOperations:
@@ -109,59 +136,46 @@ class TestHistogramOperations:
         
         assert stretched.shape == gradient_image.shape
         assert stretched.dtype == np.uint8
-
-
-class TestSpatialFilters:
-    """Tests for spatial filtering operations."""
     
-    def test_gaussian_blur(self, sample_color_image):
-        """Test Gaussian blur."""
+    def test_contrast_stretch_color(self, sample_color_image):
+        """Test each channel is stretched to the full range."""
         processor = ImageProcessor(sample_color_image)
-        blurred = processor.gaussian_blur(kernel_size=5, sigma=1.0)
-        
-        assert blurred.shape == sample_color_image.shape
-    
-    def test_median_filter(self, sample_color_image):
-        """Test median filter."""
-        processor = ImageProcessor(sample_color_image)
-        filtered = processor.median_filter(kernel_size=5)
-        
-        assert filtered.shape == sample_color_image.shape
-    
-    def test_bilateral_filter(self, sample_color_image):
-        """Test bilateral filter."""
-        processor = ImageProcessor(sample_color_image)
-        filtered = processor.bilateral_filter(d=9, sigma_color=75, sigma_space=75)
-        
-        assert filtered.shape == sample_color_image.shape
-    
-    def test_sharpen(self, sample_color_image):
-        """Test sharpening."""
-        processor = ImageProcessor(sample_color_image)
-        sharpened = processor.sharpen(strength=1.0)
-        
-        assert sharpened.shape == sample_color_image.shape
-    
-    def test_sobel_edge_detection(self, sample_color_image):
-        """Test Sobel edge detection."""
-        processor = ImageProcessor(sample_color_image)
-        edges = processor.sobel_edge_detection(ksize=3)
+        stretched = processor.contrast_stretch(low_percentile=2, high_percentile=98)
         
-        assert len(edges.shape) == 2  # Should be grayscale
+        assert stretched.shape == sample_color_image.shape
+        assert (stretched.reshape(-1, 3).min(axis=0) == 0).all()
+        assert (stretched.reshape(-1, 3).max(axis=0) == 255).all()
     
-    def test_canny_edge_detection(self, sample_color_image):
-        """Test Canny edge detection."""
-        processor = ImageProcessor(sample_color_image)
-        edges = processor.canny_edge_detection(threshold1=100, threshold2=200)
+    def test_contrast_stretch_flat_image(self):
+        """Test a constant image is returned unchanged."""
+        flat = np.full((20, 20), 128, dtype=np.uint8)
+        stretched = ImageProcessor(flat).contrast_stretch()
         
-        assert len(edges.shape) == 2  # Should be grayscale
+        assert np.array_equal(stretched, flat)
+
+
+class TestSpatialFilters:
+    """Tests for spatial filtering operations."""
     
-    def test_emboss(self, sample_color_image):
-        """Test emboss effect."""
-        processor = ImageProcessor(sample_color_image)
-        embossed = processor.emboss()
+    @pytest.mark.parametrize('method,kwargs,out_gray', [
+        ('gaussian_blur', {'kernel_size': 5, 'sigma': 1.0}, False),
+        ('median_filter', {'kernel_size': 5}, False),
+        pytest.param('bilateral_filter', {'d': 9, 'sigma_color': 75, 'sigma_space': 75}, False,
+                     marks=pytest.mark.slow),
+        ('sharpen', {'strength': 1.0}, False),
+        ('emboss', {}, False),
+        ('sobel_edge_detection', {'ksize': 3}, True),
+        ('canny_edge_detection', {'threshold1': 100, 'threshold2': 200}, True),
+    ], ids=['gaussian_blur', 'median_filter', 'bilateral_filter', 'sharpen', 'emboss',
+            'sobel_edge_detection', 'canny_edge_detection'])
+    @pytest.mark.parametrize('image_fixture', ['sample_color_image', 'sample_grayscale_image'],
+                             ids=['color', 'gray'])
+    def test_spatial_filter_shape(self, request, image_fixture, method, kwargs, out_gray):
+        """Test filters keep the input shape; edge detectors return grayscale."""
+        image = request.getfixturevalue(image_fixture)
+        result = getattr(ImageProcessor(image), method)(**kwargs)
         
-        assert embossed.shape == sample_color_image.shape
+        assert result.shape == (image.shape[:2] if out_gray else image.shape)
 
 
 class TestFourierOperations:
@@ -175,6 +189,17 @@ class TestFourierOperations:
         assert magnitude.shape == sample_grayscale_image.shape
         assert phase.shape == sample_grayscale_image.shape
     
+    @pytest.mark.parametrize('shape', [(64, 64), (63, 80), (60, 81)])
+    def test_compute_fft_matches_full_fft(self, shape):
+        """Test the half-spectrum FFT expands to the full spectrum."""
+        image = np.random.randint(0, 256, shape, dtype=np.uint8)
+        magnitude, phase = ImageProcessor(image).compute_fft(shift=True)
+        
+        expected = np.fft.fftshift(np.fft.fft2(image.astype(np.float32)))
+        assert np.allclose(magnitude, np.abs(expected), rtol=1e-4, atol=1e-2)
+        assert np.allclose(magnitude * np.exp(1j * phase), expected, rtol=1e-4, atol=1e-1)
+    
+    @pytest.mark.slow
     def test_inverse_fft(self, sample_grayscale_image):
         """Test inverse FFT."""
         processor = ImageProcessor(sample_grayscale_image)
@@ -183,6 +208,19 @@ class TestFourierOperations:
         
         assert reconstructed.shape == sample_grayscale_image.shape
     
+    @pytest.mark.slow
+    @pytest.mark.parametrize('shape', [(64, 64), (63, 80), (60, 81)])
+    @pytest.mark.parametrize('shift', [True, False])
+    def test_inverse_fft_round_trip(self, shape, shift):
+        """Test the half-spectrum inverse reconstructs the image."""
+        image = np.random.randint(0, 256, shape, dtype=np.uint8)
+        processor = ImageProcessor(image)
+        magnitude, phase = processor.compute_fft(shift=shift)
+        reconstructed = processor.compute_inverse_fft(magnitude, phase, shift=shift)
+        
+        assert np.abs(reconstructed.astype(int) - image).max() <= 1
+    
+    @pytest.mark.slow
     def test_frequency_filter_lowpass(self, sample_grayscale_image):
         """Test low pass frequency filter."""
         processor = ImageProcessor(sample_grayscale_image)
@@ -193,6 +231,7 @@ class TestFourierOperations:
         assert filtered.shape == sample_grayscale_image.shape
         assert mask.shape == sample_grayscale_image.shape
     
+    @pytest.mark.slow
     def test_frequency_filter_highpass(self, sample_grayscale_image):
         """Test high pass frequency filter."""
         processor = ImageProcessor(sample_grayscale_image)
@@ -201,6 +240,14 @@ class TestFourierOperations:
         )
         
         assert filtered.shape == sample_grayscale_image.shape
+    
+    def test_homomorphic_filter(self, sample_color_image):
+        """Test homomorphic filtering returns a grayscale uint8 image."""
+        processor = ImageProcessor(sample_color_image)
+        result = processor.homomorphic_filter(gamma_low=0.3, gamma_high=1.5, cutoff=30)
+        
+        assert result.shape == sample_color_image.shape[:2]
+        assert result.dtype == np.uint8
 
 
 class TestNoiseOperations:
@@ -215,6 +262,21 @@ class TestNoiseOperations:
         # Image should be different after adding noise
         assert not np.array_equal(noisy, sample_color_image)
     
+    @pytest.mark.parametrize('method, kwargs, expected_mean, expected_std', [
+        ('add_gaussian_noise', {'mean': 10, 'std': 20}, 138, 20),
+        ('add_uniform_noise', {'low': -40, 'high': 40}, 128, 80 / np.sqrt(12)),
+        ('add_speckle_noise', {'std': 0.1}, 128, 12.8),
+    ])
+    def test_noise_statistics(self, method, kwargs, expected_mean, expected_std):
+        """Test additive and multiplicative noise have the requested moments."""
+        image = np.full((200, 200, 3), 128, dtype=np.uint8)
+        noisy = getattr(ImageProcessor(image), method)(**kwargs)
+        
+        assert noisy.dtype == np.uint8
+        assert noisy.shape == image.shape
+        assert abs(noisy.mean() - expected_mean) < 1
+        assert abs(noisy.std() - expected_std) < 1
+    
     def test_add_salt_pepper_noise(self, sample_color_image):
         """Test salt and pepper noise addition."""
         processor = ImageProcessor(sample_color_image)
@@ -222,6 +284,19 @@ class TestNoiseOperations:
         
         assert noisy.shape == sample_color_image.shape
     
+    def test_salt_pepper_noise_amount(self):
+        """Test the corrupted fraction matches the requested amount."""
+        image = np.full((200, 200, 3), 128, dtype=np.uint8)
+        noisy = ImageProcessor(image).add_salt_pepper_noise(amount=0.1, salt_ratio=0.5)
+        
+        salt = np.all(noisy == 255, axis=2).mean()
+        pepper = np.all(noisy == 0, axis=2).mean()
+        assert 0.04 < salt < 0.06
+        assert 0.04 < pepper < 0.06
+        # Whole pixels are corrupted, never individual channels
+        assert np.isin(noisy, [0, 128, 255]).all()
+        assert np.array_equal(image, np.full((200, 200, 3), 128, dtype=np.uint8))
+    
     def test_add_poisson_noise(self, sample_color_image):
         """Test Poisson noise addition."""
         processor = ImageProcessor(sample_color_image)
@@ -229,6 +304,7 @@ class TestNoiseOperations:
         
         assert noisy.shape == sample_color_image.shape
     
+    @pytest.mark.slow
     def test_non_local_means_denoise(self, sample_color_image):
         """Test NLM denoising."""
         processor = ImageProcessor(sample_color_image)
@@ -236,6 +312,19 @@ class TestNoiseOperations:
         
         assert denoised.shape == sample_color_image.shape
     
+    def test_wiener_filter_color(self):
+        """Test Wiener filtering reduces noise on every channel."""
+        clean = np.full((64, 64, 3), (60, 120, 180), dtype=np.uint8)
+        noise = np.random.normal(0, 20, clean.shape)
+        noisy = np.clip(clean + noise, 0, 255).astype(np.uint8)
+        
+        denoised = ImageProcessor(noisy).wiener_filter()
+        
+        assert denoised.shape == noisy.shape
+        assert denoised.dtype == np.uint8
+        for i in range(3):
+            assert denoised[:, :, i].std() < noisy[:, :, i].std()
+    
     def test_estimate_noise(self, sample_grayscale_image):
         """Test noise estimation."""
         processor = ImageProcessor(sample_grayscale_image)
@@ -243,6 +332,30 @@ class TestNoiseOperations:
         
         assert isinstance(noise_level, float)
         assert noise_level >= 0
+    
+    def test_estimate_noise_difference(self, sample_grayscale_image):
+        """Test difference-based estimation matches the NumPy definition."""
+        gray = sample_grayscale_image.astype(np.float32)
+        expected = np.sqrt((np.var(np.diff(gray, axis=1)) + np.var(np.diff(gray, axis=0))) / 2)
+        
+        noise_level = ImageProcessor(sample_grayscale_image).estimate_noise(method='wavelet')
+        
+        assert noise_level == pytest.approx(expected, rel=1e-5)
+    
+    def test_noise_and_denoise_leave_shared_image_untouched(self, sample_color_image):
+        """Test every route-level method runs on a shared read-only image."""
+        from app.routes.noise_routes import (
+            DENOISE_METHODS, NOISE_TYPES, add_noise_to_image, denoise_image
+        )
+        
+        image = sample_color_image.copy()
+        image.setflags(write=False)
+        for noise_type, info in NOISE_TYPES.items():
+            add_noise_to_image(ImageProcessor(image), noise_type, info['defaults'])
+        for method, info in DENOISE_METHODS.items():
+            denoise_image(ImageProcessor(image), method, info['defaults'])
+        
+        assert np.array_equal(image, sample_color_image)
 
 
 class TestStatistics:
@@ -268,6 +381,769 @@ class TestStatistics:
         assert 'red' in stats
         assert 'green' in stats
         assert 'blue' in stats
+    
+    @pytest.mark.parametrize('shape', [(50, 50), (51, 50, 3), (1, 2)])
+    def test_get_statistics_match_numpy(self, shape):
+        """Test fused statistics match the NumPy reductions."""
+        image = np.random.randint(0, 256, shape, dtype=np.uint8)
+        stats = ImageProcessor(image).get_statistics()
+        
+        if image.ndim == 3:
+            channels = {'blue': image[:, :, 0], 'green': image[:, :, 1], 'red': image[:, :, 2]}
+        else:
+            channels = {'intensity': image}
+        for name, ch in channels.items():
+            assert stats[name]['mean'] == pytest.approx(np.mean(ch))
+            assert stats[name]['std'] == pytest.approx(np.std(ch))
+            assert stats[name]['min'] == ch.min()
+            assert stats[name]['max'] == ch.max()
+            assert stats[name]['median'] == np.median(ch)
+
+
+class TestImageCache:
+    """Tests for the decoded image cache."""
+    
+    def test_cached_image_is_shared_read_only(self, tmp_path, sample_color_image):
+        """Test repeat loads share one read-only decode."""
+        from app.utils.image_utils import get_cached_image, clear_image_cache
+        
+        path = str(tmp_path / 'cached.png')
+        cv2.imwrite(path, sample_color_image)
+        clear_image_cache()
+        
+        first = get_cached_image(path)
+        second = get_cached_image(path)
+        
+        assert np.array_equal(first, sample_color_image)
+        assert np.shares_memory(first, second)
+        assert not first.flags.writeable
+        with pytest.raises(ValueError):
+            first[0, 0] = 0
+    
+    def test_cached_image_missing_file(self, tmp_path):
+        """Test a missing file returns None."""
+        from app.utils.image_utils import get_cached_image
+        
+        assert get_cached_image(str(tmp_path / 'missing.png')) is None
+    
+    def test_cached_image_evicts_unused_entries(self, tmp_path, monkeypatch):
+        """Test the cache is bounded and keeps entries that were hit."""
+        from app.utils import image_utils
+        from app.utils.clock_cache import ClockProCache
+        
+        monkeypatch.setattr(image_utils, '_image_cache', ClockProCache(3))
+        paths = []
+        for i in range(4):
+            path = str(tmp_path / f'{i}.png')
+            cv2.imwrite(path, np.full((4, 4), i, dtype=np.uint8))
+            paths.append(path)
+        
+        image_utils.get_cached_image(paths[0])
+        image_utils.get_cached_image(paths[1])
+        image_utils.get_cached_image(paths[0])
+        image_utils.get_cached_image(paths[2])
+        image_utils.get_cached_image(paths[3])
+        
+        cache = image_utils._image_cache
+        assert len(cache) == 3
+        assert image_utils._file_key(paths[0]) in cache
+        assert image_utils._file_key(paths[1]) not in cache
+    
+    def test_cached_image_byte_budget(self, tmp_path, monkeypatch):
+        """Test the cache also evicts to stay within its byte budget."""
+        from app.utils import image_utils
+        from app.utils.clock_cache import ClockProCache
+        
+        # Each 4x4 BGR decode weighs 48 bytes
+        monkeypatch.setattr(image_utils, '_image_cache', ClockProCache(
+            10, max_weight=100, weigher=lambda image: image.nbytes
+        ))
+        paths = []
+        for i in range(3):
+            path = str(tmp_path / f'{i}.png')
+            cv2.imwrite(path, np.full((4, 4), i, dtype=np.uint8))
+            paths.append(path)
+        large = str(tmp_path / 'large.png')
+        cv2.imwrite(large, np.zeros((8, 8), dtype=np.uint8))
+        
+        for path in paths:
+            image_utils.get_cached_image(path)
+        assert len(image_utils._image_cache) == 2
+        assert image_utils._image_cache.weight == 96
+        
+        # Larger than the whole budget: served, but never cached
+        assert image_utils.get_cached_image(large).shape == (8, 8, 3)
+        assert image_utils._file_key(large) not in image_utils._image_cache
+    
+    def test_cached_image_evicts_in_background(self, tmp_path, monkeypatch):
+        """Test get_cached_image leaves eviction to the background thread."""
+        from app.utils import image_utils
+        
+        cache = image_utils._image_cache
+        image_utils.clear_image_cache()
+        monkeypatch.setattr(cache, 'max_entries', 2)
+        for i in range(4):
+            path = str(tmp_path / f'{i}.png')
+            cv2.imwrite(path, np.full((4, 4), i, dtype=np.uint8))
+            image_utils.get_cached_image(path)
+        cache.flush()
+        
+        assert len(cache) == 2
+        image_utils.clear_image_cache()
+    
+    def test_cached_image_invalidated_by_size(self, tmp_path):
+        """Test a rewrite that keeps the mtime is still picked up."""
+        from app.utils.image_utils import get_cached_image, clear_image_cache
+        
+        clear_image_cache()
+        path = str(tmp_path / 'rewritten.png')
+        cv2.imwrite(path, np.zeros((4, 4), dtype=np.uint8))
+        stat = os.stat(path)
+        assert get_cached_image(path)[0, 0, 0] == 0
+        
+        cv2.imwrite(path, np.random.randint(1, 256, (8, 8), dtype=np.uint8))
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert get_cached_image(path).shape == (8, 8, 3)
+    
+    def test_load_image_cache_hits_share_memory(self, tmp_path, sample_color_image):
+        """Test cached loads decode once and share a read-only array unless copied."""
+        from app.utils import image_utils
+        
+        path = str(tmp_path / 'shared_hits.png')
+        cv2.imwrite(path, sample_color_image)
+        image_utils.clear_image_cache()
+        
+        first = image_utils.load_image(path)
+        second = image_utils.load_image(path)
+        assert np.shares_memory(first, second)
+        assert not first.flags.writeable
+        
+        writable = image_utils.load_image(path, copy=True)
+        writable[:] = 0
+        assert writable.flags.writeable
+        assert not np.shares_memory(writable, first)
+        assert len(image_utils._image_cache) == 1
+        assert np.array_equal(image_utils.load_image(path), sample_color_image)
+    
+    def test_cached_fft_matches_direct(self, tmp_path, sample_color_image):
+        """Test filters fed the cached spectrum match the uncached path."""
+        from app.utils.image_utils import get_cached_fft, get_cached_image, clear_image_cache
+        
+        path = str(tmp_path / 'spectrum.png')
+        cv2.imwrite(path, sample_color_image)
+        clear_image_cache()
+        
+        spectrum = get_cached_fft(path)
+        assert get_cached_fft(path) is spectrum
+        assert not spectrum.flags.writeable
+        
+        processor = ImageProcessor(get_cached_image(path))
+        cached, _ = processor.apply_frequency_filter('highpass', 0.2, spectrum=spectrum)
+        direct, _ = processor.apply_frequency_filter('highpass', 0.2)
+        assert np.array_equal(cached, direct)
+        
+        log_spectrum = get_cached_fft(path, log=True)
+        assert np.array_equal(
+            processor.homomorphic_filter(spectrum=log_spectrum),
+            processor.homomorphic_filter()
+        )
+    
+    def test_fft_cache_bounded_by_bytes(self, tmp_path, sample_color_image, monkeypatch):
+        """Test spectra are evicted once their summed nbytes exceed the budget."""
+        from app.utils import image_utils
+        from app.utils.clock_cache import ClockProCache
+        
+        spectrum_bytes = ImageProcessor(sample_color_image).grayscale_spectrum().nbytes
+        cache = ClockProCache(8, 2 * spectrum_bytes,
+                              weigher=lambda spectrum: spectrum.nbytes)
+        monkeypatch.setattr(image_utils, '_fft_cache', cache)
+        
+        for i in range(4):
+            path = str(tmp_path / f'spectrum_{i}.png')
+            cv2.imwrite(path, sample_color_image)
+            assert image_utils.get_cached_fft(path) is not None
+        assert len(cache) == 2
+        assert cache.weight == 2 * spectrum_bytes
+    
+    def test_upload_written_atomically_and_cached(self, tmp_path, sample_color_image,
+                                                   monkeypatch):
+        """Test uploads land whole under the final name and prime the cache."""
+        from app.utils import image_utils
+        
+        ok, encoded = cv2.imencode('.png', sample_color_image)
+        data = encoded.tobytes()
+        path = str(tmp_path / 'upload.png')
+        image = image_utils.decode_image(data)
+        
+        image_utils.save_upload(path, data, image)
+        assert os.listdir(tmp_path) == ['upload.png']
+        assert np.array_equal(image_utils.load_image(path, use_cache=False), sample_color_image)
+        assert np.shares_memory(image_utils.get_cached_image(path), image)
+        
+        # A failed write leaves neither the final file nor the temporary one
+        def fail_replace(src, dst):
+            raise OSError('disk full')
+        monkeypatch.setattr(image_utils.os, 'replace', fail_replace)
+        with pytest.raises(OSError):
+            image_utils.save_upload(str(tmp_path / 'failed.png'), data)
+        assert os.listdir(tmp_path) == ['upload.png']
+    
+    # Segments live in the system-wide shared memory namespace
+    @pytest.mark.xdist_group('shared_memory')
+    def test_shared_image_cache(self, tmp_path, sample_color_image, monkeypatch):
+        """Test a decode published to shared memory is mapped instead of decoded."""
+        from app.utils import image_utils, shared_images
+        
+        path = str(tmp_path / 'shared.png')
+        cv2.imwrite(path, sample_color_image)
+        image_utils.clear_image_cache()
+        shared_images.enable()
+        try:
+            image_utils.get_cached_image(path)
+            # Forget the local decode and mapping, as a different worker would
+            image_utils.clear_image_cache()
+            published = list(shared_images._segments.values())
+            shared_images._segments.clear()
+            monkeypatch.setattr(image_utils, '_read_only_imread', lambda filepath: None)
+            
+            mapped = image_utils.get_cached_image(path)
+            assert np.array_equal(mapped, sample_color_image)
+            assert not mapped.flags.writeable
+            del mapped
+            image_utils.clear_image_cache()
+            for segment, owned in published:
+                shared_images._release(segment, owned)
+        finally:
+            shared_images.enable(False)
+        
+        assert shared_images.attach((0, 0, 0, 0)) is None
+    
+    def test_shared_image_malformed_segment(self):
+        """Test a segment with a corrupt header is ignored, not raised."""
+        from multiprocessing import shared_memory
+        from app.utils import shared_images
+        
+        key = (0, 0, 0, 1)
+        segment = shared_memory.SharedMemory(
+            name=shared_images._segment_name(key), create=True, size=shared_images._HEADER_SIZE
+        )
+        shared_images.enable()
+        try:
+            shared_images._HEADER.pack_into(segment.buf, 0, shared_images._READY, 1,
+                                            1 << 40, 0, 0, b'?bogus')
+            assert shared_images.attach(key) is None
+            assert not shared_images._segments
+        finally:
+            shared_images.enable(False)
+            segment.close()
+            segment.unlink()
+
+
+class TestClockProCache:
+    """Tests for the scan-resistant ClockProCache."""
+    
+    def test_clock_cache_resists_scans(self):
+        """Test referenced entries survive a scan of one-off keys."""
+        from app.utils.clock_cache import ClockProCache
+        
+        cache = ClockProCache(4)
+        for key in ('a', 'b'):
+            cache.insert(key, key)
+            cache.get(key)
+        for i in range(20):
+            cache.insert(i, i)
+        
+        assert len(cache) == 4
+        assert cache.get('a') == 'a' and cache.get('b') == 'b'
+    
+    def test_clock_cache_weight_limit(self):
+        """Test the total weight stays bounded and oversized values are skipped."""
+        from app.utils.clock_cache import ClockProCache
+        
+        cache = ClockProCache(10, max_weight=100, weigher=lambda value: value.nbytes)
+        for i in range(5):
+            cache.insert(i, np.zeros(40, dtype=np.uint8))
+        cache.insert('big', np.zeros(101, dtype=np.uint8))
+        cache.insert(4, np.zeros(10, dtype=np.uint8))
+        
+        assert cache.weight <= 100
+        assert 'big' not in cache
+        assert cache.get(4).nbytes == 10
+    
+    def test_clock_cache_single_load(self):
+        """Test concurrent misses on one key run the loader once."""
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from app.utils.clock_cache import ClockProCache
+        
+        cache = ClockProCache(4)
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+        
+        def loader():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'value'
+        
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            first = pool.submit(cache.get_or_insert, 'key', loader)
+            started.wait(5)
+            others = [pool.submit(cache.get_or_insert, 'key', loader) for _ in range(3)]
+            release.set()
+            results = [first.result()] + [future.result() for future in others]
+        
+        assert results == ['value'] * 4
+        assert len(calls) == 1
+    
+    def test_clock_cache_background_eviction(self):
+        """Test inserts leave eviction to the background thread."""
+        from app.utils.clock_cache import ClockProCache
+        
+        cache = ClockProCache(4, max_weight=100, weigher=lambda value: value,
+                              background_eviction=True)
+        cache.insert('hot', 10)
+        cache.get('hot')
+        for i in range(6):
+            cache.insert(i, 10)
+        cache.flush()
+        
+        assert len(cache) == 4
+        assert cache.get('hot') == 10
+        
+        # Far over the limits, an insert evicts inline as well
+        for i in range(6, 200):
+            cache.insert(i, 20)
+        assert cache.weight <= 200
+        cache.flush()
+        assert cache.weight <= 100
+
+
+class TestImageDecoding:
+    """Tests for decoding images from bytes and files."""
+    
+    def test_reduced_decode(self, tmp_path):
+        """Test JPEG previews decode at reduced scale and PNGs at full size."""
+        from app.utils.image_utils import load_image_reduced
+        
+        image = np.random.randint(0, 256, (1200, 2400, 3), dtype=np.uint8)
+        jpeg_path = str(tmp_path / 'large.jpg')
+        png_path = str(tmp_path / 'large.png')
+        cv2.imwrite(jpeg_path, image)
+        cv2.imwrite(png_path, image)
+        
+        # 2400 / 4 = 600 is the smallest scale still at least 512 wide
+        assert load_image_reduced(jpeg_path, 512).shape == (300, 600, 3)
+        assert load_image_reduced(jpeg_path, 512, size=(2400, 1200)).shape == (300, 600, 3)
+        assert load_image_reduced(jpeg_path, 2000).shape == (1200, 2400, 3)
+        assert load_image_reduced(png_path, 512).shape == (1200, 2400, 3)
+    
+    @pytest.mark.parametrize('extension', ['.jpg', '.png'])
+    def test_decode_with_max_dim(self, tmp_path, extension):
+        """Test bounded decodes from bytes and from disk return the exact size."""
+        from app.utils.converters import bytes_to_image
+        from app.utils.image_utils import _jpeg_size, load_image
+        
+        image = np.random.randint(0, 256, (1200, 2400, 3), dtype=np.uint8)
+        ok, encoded = cv2.imencode(extension, image)
+        data = encoded.tobytes()
+        path = str(tmp_path / f'large{extension}')
+        with open(path, 'wb') as f:
+            f.write(data)
+        
+        expected_size = (2400, 1200) if extension == '.jpg' else None
+        assert _jpeg_size(data) == expected_size
+        assert bytes_to_image(data, max_dim=1000).shape == (500, 1000, 3)
+        assert load_image(path, max_dim=1000).shape == (500, 1000, 3)
+        assert bytes_to_image(data).shape == image.shape
+    
+    def test_jpeg_decode_matches_opencv(self, sample_color_image):
+        """Test JPEG decodes match imdecode, including Exif orientation."""
+        import io
+        from PIL import Image
+        from app.utils.image_utils import decode_image
+        
+        ok, encoded = cv2.imencode('.jpg', sample_color_image)
+        data = encoded.tobytes()
+        assert np.array_equal(decode_image(data), cv2.imdecode(encoded, cv2.IMREAD_COLOR))
+        
+        # Orientation 6 (rotate 90 degrees clockwise) on a landscape image
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        buffer = io.BytesIO()
+        Image.new('RGB', (40, 20)).save(buffer, format='JPEG', exif=exif)
+        assert decode_image(buffer.getvalue()).shape == (40, 20, 3)
+    
+    def test_jpeg_batcher(self):
+        """Test lone decodes use the fallback and concurrent ones share a batch."""
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from app.utils.gpu_jpeg import JpegBatcher
+        
+        batches = []
+        
+        def decode_batch(datas):
+            batches.append(list(datas))
+            return [f'gpu-{data}' for data in datas]
+        
+        batcher = JpegBatcher(decode_batch, window=0.2)
+        assert batcher.decode('a', lambda data: f'cpu-{data}') == 'cpu-a'
+        assert batches == []
+        
+        # A slow CPU decode in flight makes later callers batch together
+        release = threading.Event()
+        
+        def slow_fallback(data):
+            release.wait(5)
+            return f'cpu-{data}'
+        
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            slow = pool.submit(batcher.decode, 'x', slow_fallback)
+            while batcher._active == 0:
+                pass
+            results = list(pool.map(lambda data: batcher.decode(data, str), ['b', 'c']))
+            release.set()
+            assert slow.result() == 'cpu-x'
+        
+        assert results == ['gpu-b', 'gpu-c']
+        assert batches == [['b', 'c']]
+
+
+class TestImageEncoding:
+    """Tests for image encoding and base64 conversion."""
+    
+    @pytest.mark.parametrize('format,prefix', [
+        ('png', 'data:image/png;base64,'),
+        ('jpeg', 'data:image/jpeg;base64,'),
+        ('bmp', 'data:image/bmp;base64,'),
+    ])
+    def test_base64_round_trip(self, sample_color_image, format, prefix):
+        """Test data URLs carry the right MIME type and decode back."""
+        from app.utils.image_utils import base64_to_image, image_to_base64
+        
+        data_url = image_to_base64(sample_color_image, format=format)
+        decoded = base64_to_image(data_url)
+        
+        assert data_url.startswith(prefix)
+        assert decoded.shape == sample_color_image.shape
+        if format != 'jpeg':
+            assert np.array_equal(decoded, sample_color_image)
+    
+    def test_base64_without_prefix(self, sample_color_image):
+        """Test bare base64 payloads decode and malformed ones return None."""
+        from app.utils.image_utils import base64_to_image, image_to_base64
+        
+        payload = image_to_base64(sample_color_image, format='png').split(',', 1)[1]
+        assert np.array_equal(base64_to_image(payload), sample_color_image)
+        assert base64_to_image('data:image/png;base64,bm90IGFuIGltYWdl') is None
+    
+    def test_auto_lossless_format(self, sample_color_image):
+        """Test small auto-format images use the requested lossless format."""
+        from app.utils.image_utils import encode_image
+        
+        assert encode_image(sample_color_image)[1] == 'image/png'
+        assert encode_image(sample_color_image, auto_lossless='bmp')[1] == 'image/bmp'
+        large = np.zeros((800, 800, 3), dtype=np.uint8)
+        assert encode_image(large, auto_lossless='bmp')[1] == 'image/jpeg'
+    
+    def test_auto_jpeg_quality(self):
+        """Test large auto-format previews encode at quality 80, explicit JPEG at 85."""
+        from app.utils.image_utils import encode_image
+        
+        image = cv2.resize(np.random.randint(0, 256, (80, 80, 3), dtype=np.uint8), (800, 800))
+        auto, _ = encode_image(image)
+        assert np.array_equal(auto, encode_image(image, 'jpeg', 80)[0])
+        assert encode_image(image, 'jpeg')[0].size > auto.size
+
+
+class TestResize:
+    """Tests for image resizing."""
+    
+    @pytest.mark.parametrize('shape', [(1000, 3000, 3), (257, 1031)])
+    def test_resize_image_pyramid(self, shape):
+        """Test large downscales hit the exact size and stay close to INTER_AREA."""
+        from app.utils.image_utils import resize_image
+        
+        # Smooth content, where pyramid and area resampling should agree
+        yy, xx = np.mgrid[0:shape[0], 0:shape[1]]
+        image = (127.5 + 127.5 * np.sin(xx / 200.0) * np.cos(yy / 150.0)).astype(np.uint8)
+        if len(shape) == 3:
+            image = cv2.merge([image, 255 - image, image])
+        
+        result = resize_image(image, 256)
+        scale = 256 / max(shape[:2])
+        expected_size = (int(shape[1] * scale), int(shape[0] * scale))
+        expected = cv2.resize(image, expected_size, interpolation=cv2.INTER_AREA)
+        
+        assert result.shape == expected.shape
+        assert np.abs(result.astype(int) - expected.astype(int)).mean() < 3
+    
+    def test_resize_keeps_skinny_sides(self):
+        """Test extreme aspect ratios never round a side down to zero pixels."""
+        from app.utils.image_utils import resize_for_processing, resize_image
+        
+        panorama = np.zeros((2, 5000), dtype=np.uint8)
+        assert resize_image(panorama, 1000).shape == (1, 1000)
+        
+        resized, scale = resize_for_processing(np.zeros((1, 40000), dtype=np.uint8), 10000)
+        assert resized.shape == (1, 20000)
+        assert scale == pytest.approx(0.5)
+        
+        image = np.zeros((100, 100), dtype=np.uint8)
+        kept, scale = resize_for_processing(image, 20000)
+        assert kept is image and scale == 1.0
+
+
+class TestRotation:
+    """Tests for image rotation."""
+    
+    @pytest.mark.parametrize('angle,k', [(0, 0), (90, 1), (180, 2), (270, 3), (-90, 3), (450.0, 1)])
+    def test_rotate_quarter_turns(self, sample_color_image, angle, k):
+        """Test multiples of 90 degrees rotate counter-clockwise without interpolation."""
+        from app.utils.image_utils import rotate_image
+        
+        image = sample_color_image[:, :80]
+        rotated = rotate_image(image, angle)
+        
+        assert np.array_equal(rotated, np.rot90(image, k))
+        assert not np.shares_memory(rotated, image)
+    
+    def test_rotate_generic_angle(self, sample_color_image):
+        """Test other angles expand the canvas and reuse the cached transform."""
+        from app.utils.image_utils import _rotation_transform, rotate_image
+        
+        first = rotate_image(sample_color_image, 30)
+        second = rotate_image(sample_color_image, 30)
+        
+        assert np.array_equal(first, second)
+        assert first.shape[0] > sample_color_image.shape[0]
+        assert _rotation_transform.cache_info().hits >= 1
+
+
+class TestConverters:
+    """Tests for the data converter helpers."""
+    
+    @pytest.mark.parametrize('shape', [(40, 60), (40, 60, 3)])
+    def test_image_to_bytes_round_trip(self, shape):
+        """Test PNG bytes decode back to the same BGR or grayscale pixels."""
+        from app.utils.converters import image_to_bytes
+        
+        image = np.random.randint(0, 256, shape, dtype=np.uint8)
+        data = image_to_bytes(image)
+        
+        assert data.startswith(b'\x89PNG')
+        decoded = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED)
+        assert np.array_equal(decoded, image)
+    
+    def test_image_to_bytes_jpeg(self, sample_color_image):
+        """Test JPEG output is accepted as a format name."""
+        from app.utils.converters import image_to_bytes
+        
+        assert image_to_bytes(sample_color_image, format='JPEG').startswith(b'\xff\xd8')
+    
+    def test_statistics_to_dict(self, sample_color_image):
+        """Test per-channel statistics match the individual NumPy reductions."""
+        from app.utils.converters import statistics_to_dict
+        
+        stats = statistics_to_dict(sample_color_image)
+        assert list(stats['channels']) == ['blue', 'green', 'red']
+        for i, name in enumerate(['blue', 'green', 'red']):
+            channel = sample_color_image[:, :, i]
+            entry = stats['channels'][name]
+            assert entry['min'] == int(channel.min())
+            assert entry['max'] == int(channel.max())
+            assert entry['mean'] == pytest.approx(float(channel.mean()))
+            assert entry['std'] == pytest.approx(float(channel.std()))
+            assert entry['median'] == float(np.median(channel))
+        
+        gray = statistics_to_dict(sample_color_image[:, :, 0])
+        assert gray['channels']['gray'] == pytest.approx(stats['channels']['blue'])
+    
+    def test_histogram_to_dict(self):
+        """Test range, peak and mean of a histogram, including an empty one."""
+        from app.utils.converters import histogram_to_dict
+        
+        histogram = np.zeros((256, 1), dtype=np.float32)
+        histogram[10] = 1
+        histogram[20] = 3
+        result = histogram_to_dict(histogram)
+        
+        assert (result['min'], result['max'], result['peak']) == (10, 20, 20)
+        assert result['mean'] == pytest.approx(17.5)
+        assert len(result['values']) == 256
+        
+        empty = histogram_to_dict(np.zeros(256, dtype=np.float32))
+        assert (empty['min'], empty['max'], empty['peak'], empty['mean']) == (0, 0, 0, 0.0)
+    
+    @pytest.mark.parametrize('dtype', [np.uint8, np.float32, np.int64])
+    def test_normalize_image(self, dtype):
+        """Test normalization spans the target range and handles flat input."""
+        from app.utils.converters import normalize_image
+        
+        image = np.array([[10, 20], [30, 110]], dtype=dtype)
+        result = normalize_image(image)
+        
+        assert result.dtype == image.dtype
+        assert result.min() == pytest.approx(0, abs=1e-4)
+        assert result.max() == pytest.approx(255, abs=1e-4)
+        assert result[0, 1] == pytest.approx(25.5, abs=1)
+        assert np.all(normalize_image(np.full((2, 2), 7, dtype=dtype), 5, 9) == 5)
+        
+        for shape in [(2, 2, 1), (3,), (2, 2, 3)]:
+            image = np.arange(np.prod(shape), dtype=dtype).reshape(shape)
+            assert normalize_image(image).shape == shape
+    
+    def test_clip_image(self):
+        """Test clipping saturates at both ends and passes uint8 through."""
+        from app.utils.converters import clip_image
+        
+        image = np.array([[-5.0, 3.0, 300.0], [128.0, 0.0, 255.0]], dtype=np.float32)
+        result = clip_image(image)
+        
+        assert result.dtype == np.uint8
+        assert result.tolist() == [[0, 3, 255], [128, 0, 255]]
+        color = np.random.uniform(-100, 400, (4, 4, 3))
+        assert np.array_equal(clip_image(color), np.clip(np.rint(color), 0, 255))
+        
+        uint8_image = np.zeros((2, 2), dtype=np.uint8)
+        assert clip_image(uint8_image) is uint8_image
+        
+        for shape in [(3,), (2, 2, 1), (2, 2, 4)]:
+            image = np.full(shape, 300.0, dtype=np.float32)
+            assert clip_image(image).shape == shape
+    
+    def test_color_space_convert(self, sample_color_image):
+        """Test direct, two-step, identity and unsupported conversions."""
+        from app.utils.converters import color_space_convert
+        
+        hsv = cv2.cvtColor(sample_color_image, cv2.COLOR_BGR2HSV)
+        assert np.array_equal(color_space_convert(sample_color_image, 'BGR', 'hsv'), hsv)
+        
+        original = hsv.copy()
+        expected = cv2.cvtColor(cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR), cv2.COLOR_BGR2LAB)
+        assert np.array_equal(color_space_convert(hsv, 'hsv', 'lab'), expected)
+        gray = cv2.cvtColor(cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR), cv2.COLOR_BGR2GRAY)
+        assert np.array_equal(color_space_convert(hsv, 'hsv', 'gray'), gray)
+        assert np.array_equal(hsv, original)
+        
+        assert color_space_convert(sample_color_image, 'bgr', 'bgr') is sample_color_image
+        assert color_space_convert(sample_color_image, 'gray', 'bgr') is sample_color_image
+    
+    def test_encode_json_safe(self):
+        """Test NumPy values, including non-contiguous arrays, become plain data."""
+        from app.utils.converters import encode_json_safe
+        
+        array = np.arange(12, dtype=np.float32).reshape(3, 4)
+        data = {
+            'array': array,
+            'column': array[:, 1],
+            'scalar': np.int64(7),
+            'nested': [(np.float64(0.5), 'x')],
+        }
+        
+        assert encode_json_safe(data) == {
+            'array': array.tolist(),
+            'column': [1.0, 5.0, 9.0],
+            'scalar': 7,
+            'nested': [[0.5, 'x']],
+        }
+
+
+class TestValidation:
+    """Tests for upload validation."""
+    
+    @staticmethod
+    def _encode(image_mode, size, format):
+        import io
+        from PIL import Image
+        
+        buffer = io.BytesIO()
+        Image.new(image_mode, size).save(buffer, format=format)
+        return buffer.getvalue()
+    
+    @pytest.mark.parametrize('format', ['PNG', 'JPEG', 'GIF', 'BMP', 'TIFF'])
+    def test_read_image_size(self, format):
+        """Test dimensions are read from the header of each upload format."""
+        from app.utils.image_utils import read_image_size
+        
+        assert read_image_size(self._encode('RGB', (123, 45), format)) == (123, 45)
+    
+    @pytest.mark.parametrize('mode,format', [
+        ('L', 'PNG'), ('RGBA', 'PNG'), ('P', 'PNG'), ('RGB', 'JPEG'),
+        ('L', 'JPEG'), ('RGB', 'GIF'), ('RGB', 'BMP'), ('RGB', 'TIFF'),
+        ('L', 'TIFF'),
+    ])
+    def test_image_info_from_header(self, tmp_path, mode, format):
+        """Test header info matches what the decoded image reports."""
+        from app.utils.image_utils import get_image_info, load_image
+        
+        path = tmp_path / f'info.{format.lower()}'
+        path.write_bytes(self._encode(mode, (123, 45), format))
+        info = get_image_info(str(path))
+        
+        assert (info['width'], info['height'], info['channels']) == (123, 45, 3)
+        assert info['format'] == format
+        assert info == get_image_info(str(path), load_image(str(path), use_cache=False))
+    
+    def test_image_info_missing_file(self, tmp_path):
+        """Test unreadable files report an error."""
+        from app.utils.image_utils import get_image_info
+        
+        assert get_image_info(str(tmp_path / 'missing.png')) == {'error': 'Failed to load image'}
+    
+    def test_read_image_size_unknown(self):
+        """Test unknown and truncated headers return None."""
+        from app.utils.image_utils import read_image_size
+        
+        assert read_image_size(b'not an image') is None
+        assert read_image_size(self._encode('RGB', (8, 8), 'JPEG')[:20]) is None
+    
+    @pytest.mark.parametrize('filename,expected', [
+        ('photo.png', 'photo.png'),
+        ('../../etc/passwd', 'etcpasswd'),
+        ('..\\a\\b.jpg', 'ab.jpg'),
+        ('na\x00me.png', 'name.png'),
+        (' . ', 'unnamed'),
+    ])
+    def test_sanitize_filename(self, filename, expected):
+        """Test separators and null bytes are dropped and empty names replaced."""
+        from app.utils.validation import sanitize_filename
+        
+        assert sanitize_filename(filename) == expected
+    
+    def test_validate_image_file(self):
+        """Test valid, oversized and non-image uploads."""
+        import io
+        from werkzeug.datastructures import FileStorage
+        from app.utils.validation import validate_image_file
+        
+        def upload(data):
+            return FileStorage(io.BytesIO(data), filename='upload.png')
+        
+        assert validate_image_file(upload(self._encode('L', (64, 32), 'PNG'))) == (True, '')
+        
+        valid, message = validate_image_file(upload(self._encode('L', (5000, 10), 'PNG')))
+        assert not valid and 'dimensions' in message
+        
+        valid, message = validate_image_file(upload(b'not an image at all'))
+        assert not valid and message.startswith('Invalid image file')
+        
+        truncated = self._encode('RGB', (64, 32), 'PNG')[:-40]
+        valid, message = validate_image_file(upload(truncated))
+        assert not valid and message.startswith('Invalid image file')
+    
+    def test_validate_image_file_rewinds(self):
+        """Test the upload can be read in full after validation."""
+        import io
+        from werkzeug.datastructures import FileStorage
+        from app.utils.validation import validate_image_file
+        
+        data = self._encode('RGB', (64, 32), 'JPEG')
+        file = FileStorage(io.BytesIO(data), filename='upload.jpg')
+        
+        assert validate_image_file(file) == (True, '')
+        assert file.read() == data
 
 
 if __name__ == '__main__':
@@ -0,0 +1,152 @@
+"""
+Tests for image metadata and array stores.
+"""
+import os
+
+import pytest
+import numpy as np
+
+from app.stores import SQLiteMetadataStore
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    """Path to a fresh metadata database."""
+    return str(tmp_path / 'metadata.sqlite3')
+
+
+class TestSQLiteMetadataStore:
+    """Tests for the SQLite-backed metadata store."""
+    
+    def test_put_get_delete(self, store_path):
+        """Test basic round trip of image metadata."""
+        store = SQLiteMetadataStore(store_path)
+        metadata = {'id': 'a', 'filepath': '/tmp/a.png', 'width': 10}
+        
+        store.put('a', metadata)
+        
+        assert store.get('a') == metadata
+        assert 'a' in store
+        assert store.delete('a')
+        assert store.get('a') is None
+        assert not store.delete('a')
+    
+    def test_list_in_insertion_order(self, store_path):
+        """Test listing returns every stored image."""
+        store = SQLiteMetadataStore(store_path)
+        store.put('a', {'id': 'a'})
+        store.put('b', {'id': 'b'})
+        
+        assert [data['id'] for data in store.list()] == ['a', 'b']
+    
+    def test_shared_between_instances(self, store_path):
+        """Test separate connections (as in separate workers) see each other's writes."""
+        writer = SQLiteMetadataStore(store_path)
+        reader = SQLiteMetadataStore(store_path)
+        
+        writer.put('a', {'id': 'a'})
+        assert reader.get('a') == {'id': 'a'}
+        
+        reader.delete('a')
+        assert 'a' not in writer
+    
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork()')
+    def test_forked_child_opens_own_connection(self, store_path):
+        """Test a store used before fork() works in the child, as in preloaded workers."""
+        store = SQLiteMetadataStore(store_path)
+        store.put('parent', {'id': 'parent'})
+        parent_conn = store._conn
+        
+        pid = os.fork()
+        if pid == 0:
+            # Child: report failures through the exit status only
+            try:
+                ok = (store.get('parent') == {'id': 'parent'} and
+                      store._conn is not parent_conn)
+                store.put('child', {'id': 'child'})
+            except BaseException:
+                ok = False
+            os._exit(0 if ok else 1)
+        
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+        assert store._conn is parent_conn
+        assert store.get('child') == {'id': 'child'}
+
+
+
+class TestArrayStorage:
+    """Tests for compressed array storage."""
+    
+    @pytest.mark.parametrize('dtype', [np.uint8, np.float32])
+    def test_compressed_save_load_delete(self, tmp_path, monkeypatch, dtype):
+        """Test cold arrays round trip exactly and are stored compressed."""
+        from app.utils import storage
+        
+        monkeypatch.setattr(storage, 'BASE_DIR', str(tmp_path))
+        image = np.zeros((200, 300, 3), dtype=dtype)
+        image[50:150, 100:200] = 7
+        
+        image_id = storage.save_image(image, compress=True)
+        path = tmp_path / image_id[:2] / f'{image_id}.b2nd'
+        loaded = storage.load_image(image_id)
+        
+        assert loaded.dtype == image.dtype
+        assert np.array_equal(loaded, image)
+        assert path.stat().st_size < image.nbytes / 10
+        storage.delete_image(image_id)
+        assert storage.load_image(image_id) is None
+    
+    def test_uncompressed_load_is_memory_mapped(self, tmp_path, monkeypatch):
+        """Test hot arrays load as read-only maps, with a writable copy on request."""
+        from app.utils import storage
+        
+        monkeypatch.setattr(storage, 'BASE_DIR', str(tmp_path))
+        image = np.random.randint(0, 256, (50, 60, 3), dtype=np.uint8)
+        image_id = storage.save_image(image)
+        
+        mapped = storage.load_image(image_id)
+        assert isinstance(mapped, np.memmap)
+        assert not mapped.flags.writeable
+        assert np.array_equal(mapped, image)
+        
+        writable = storage.load_image_writable(image_id)
+        writable[:] = 0
+        assert np.array_equal(storage.load_image(image_id), image)
+        
+        del mapped
+        storage.delete_image(image_id)
+        assert storage.load_image(image_id) is None
+    
+    @pytest.mark.parametrize('compress', [False, True])
+    def test_files_are_sharded_and_renamed_into_place(self, tmp_path, monkeypatch, compress):
+        """Test arrays land in a subdirectory named after the id prefix."""
+        from app.utils import storage
+        
+        monkeypatch.setattr(storage, 'BASE_DIR', str(tmp_path))
+        image_id = storage.save_image(np.ones((8, 8), dtype=np.uint8), compress=compress)
+        
+        shard = tmp_path / image_id[:2]
+        extension = 'b2nd' if compress else 'npy'
+        assert [p.name for p in shard.iterdir()] == [f'{image_id}.{extension}']
+        assert np.array_equal(storage.load_image(image_id), np.ones((8, 8), dtype=np.uint8))
+    
+    @pytest.mark.parametrize('compress', [False, True])
+    def test_arrays_stored_before_sharding_still_load(self, tmp_path, monkeypatch, compress):
+        """Test arrays at the old flat path are found and deleted."""
+        from app.utils import storage
+        
+        monkeypatch.setattr(storage, 'BASE_DIR', str(tmp_path))
+        image = np.arange(64, dtype=np.uint8).reshape(8, 8)
+        image_id = storage.save_image(image, compress=compress)
+        extension = 'b2nd' if compress else 'npy'
+        legacy = tmp_path / f'{image_id}.{extension}'
+        os.replace(tmp_path / image_id[:2] / legacy.name, legacy)
+        
+        assert np.array_equal(storage.load_image(image_id), image)
+        storage.delete_image(image_id)
+        assert not legacy.exists()
+        assert storage.load_image(image_id) is None
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
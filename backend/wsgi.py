@@ -1,10 +1,28 @@
 """
 WSGI entry point for production deployment.
+
+The application is built on first access to ``app`` rather than at import,
+so tooling that only imports this module does not run the production
+setup. WSGI servers look ``app`` up right after importing, which under
+gunicorn happens in each worker after it forks.
 """
-from backend.main import create_app
-from backend.config import ProductionConfig
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def get_app():
+    """Create the production application once."""
+    from backend.main import create_app
+    from backend.config import ProductionConfig
+
+    return create_app(ProductionConfig)
+
+
+def __getattr__(name):
+    if name == 'app':
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-app = create_app(ProductionConfig)
 
 if __name__ == '__main__':
-    app.run()
+    get_app().run()
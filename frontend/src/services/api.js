@@ -206,6 +206,21 @@ export const filterAPI = {
     return response.data
   }, 300),
   
+  // Full-resolution result as raw JPEG bytes; returns an object URL
+  // (release it with URL.revokeObjectURL when replaced)
+  applyBinary: async (imageId, filterType, params = {}) => {
+    const response = await api.post('/filters/apply_binary', {
+      image_id: imageId,
+      filter_type: filterType,
+      params,
+      use_cache: true
+    }, { responseType: 'blob' })
+    return {
+      url: URL.createObjectURL(response.data),
+      cached: response.headers['x-cache'] === 'HIT'
+    }
+  },
+  
   applyMultiple: async (imageId, filters) => {
     const response = await api.post('/filters/apply-multiple', {
       image_id: imageId,